@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0005_remove_budget_notes'),
+        ('order', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='converted_order',
+            field=models.OneToOneField(blank=True, db_column='converted_order_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='budget', to='order.order'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budget', '0006_budget_converted_order'),
+        ('customers', '0004_alter_customer_options_alter_customer_address_and_more'),
+        ('order', '0002_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['budget_date', 'id'], name='budget_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['customer', 'budget_date', 'id'], name='budget_customer_date_idx'),
+        ),
+    ]
@@ -14,11 +14,23 @@ class Budget(models.Model):
     )
     budget_date = models.DateTimeField(default=timezone.now)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    converted_order = models.OneToOneField(
+        'order.Order',
+        on_delete=models.SET_NULL,
+        db_column='converted_order_id',
+        related_name='budget',
+        blank=True,
+        null=True
+    )
 
     class Meta:
         verbose_name = "Budget"
         verbose_name_plural = "Budgets"
         ordering = ['budget_date']
+        indexes = [
+            models.Index(fields=['budget_date', 'id'], name='budget_date_id_idx'),
+            models.Index(fields=['customer', 'budget_date', 'id'], name='budget_customer_date_idx'),
+        ]
 
 
     def __str__(self):
@@ -46,4 +58,9 @@ class BudgetItem(models.Model):
         ordering = ['id']
 
     def __str__(self):
-        return f"{self.quantity}x {self.product.description} (Sale #{self.sale.id})"
+        # Usa apenas o que já está carregado para não disparar consultas
+        if BudgetItem.product.is_cached(self):
+            product = self.product.description
+        else:
+            product = f"Product #{self.product_id}"
+        return f"{self.quantity}x {product} (Budget #{self.budget_id})"
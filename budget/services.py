@@ -0,0 +1,161 @@
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from customers.services import invalidate_customer_summaries
+from order.models import Order, OrderItem
+from product.models import Product, StockMovement
+from product.services import (
+    aggregate_lines, allocate_stock, decrement_stock, load_products, price_lines,
+)
+from reports.services import add_orders
+from search.models import SearchDocument
+from search.services import index_objects
+from .models import Budget, BudgetItem
+
+
+def items_prefetch():
+    return Prefetch('items', queryset=BudgetItem.objects.select_related('product'))
+
+
+def budgets_with_items(queryset=None):
+    """
+    Orçamentos com cliente, itens e produtos carregados em duas consultas.
+
+    Usado pela tela de detalhe, pelos e-mails e pelas exportações para que
+    percorrer budget.items.all e item.product não gere consultas por item.
+    """
+    if queryset is None:
+        queryset = Budget.objects.all()
+    return queryset.select_related('customer').prefetch_related(items_prefetch())
+
+
+def prefetch_budget_items(budgets):
+    """Carrega itens e produtos de orçamentos já em memória com uma única consulta."""
+    prefetch_related_objects(budgets, items_prefetch())
+    return budgets
+
+
+def create_budget(customer, lines):
+    """
+    Cria um orçamento com todos os seus itens em número constante de consultas.
+
+    Args:
+        customer: Instância de Customer
+        lines: Lista de tuplas (product_id, quantity)
+
+    Raises:
+        ValueError: Se alguma linha referenciar um produto inexistente
+    """
+    products = load_products(lines)
+    priced, total = price_lines(lines, products)
+
+    with transaction.atomic():
+        budget = Budget.objects.create(customer=customer, total_amount=total)
+        BudgetItem.objects.bulk_create([
+            BudgetItem(budget=budget, product=product, quantity=quantity, subtotal=subtotal)
+            for product, quantity, subtotal in priced
+        ])
+    return budget
+
+
+def convert_budgets(budget_ids):
+    """
+    Converte vários orçamentos em pedidos em uma única transação.
+
+    Os orçamentos e os produtos envolvidos são bloqueados e carregados de uma
+    só vez; cada orçamento é validado contra o estoque restante (na ordem dos
+    ids) e os aceitos geram pedidos e itens via bulk_create, com uma única
+    baixa de estoque condicional para todos eles.
+
+    Args:
+        budget_ids: Iterável de ids de orçamentos
+
+    Returns:
+        Lista de dicionários, um por id, com as chaves budget_id, order
+        (Order criado ou None), error (mensagem ou None) e shortages
+    """
+    budget_ids = sorted({int(budget_id) for budget_id in budget_ids})
+    results = {
+        budget_id: {'budget_id': budget_id, 'order': None, 'error': 'Orçamento não encontrado', 'shortages': []}
+        for budget_id in budget_ids
+    }
+
+    with transaction.atomic():
+        budgets = list(
+            Budget.objects.select_for_update(of=('self',))
+            .select_related('customer')
+            .filter(id__in=budget_ids)
+            .order_by('id')
+        )
+        items = list(BudgetItem.objects.filter(budget__in=budgets).order_by('id'))
+        items_by_budget = {}
+        for item in items:
+            items_by_budget.setdefault(item.budget_id, []).append(item)
+
+        products = Product.objects.select_for_update().in_bulk({item.product_id for item in items})
+
+        accepted = []
+        total_demand = {}
+        for budget in budgets:
+            result = results[budget.id]
+            budget_items = items_by_budget.get(budget.id, [])
+            if budget.converted_order_id is not None:
+                result['error'] = f'Orçamento já convertido no Pedido #{budget.converted_order_id}'
+                continue
+            if not budget_items:
+                result['error'] = 'Orçamento sem itens'
+                continue
+
+            demand = aggregate_lines((item.product_id, item.quantity) for item in budget_items)
+            shortages = allocate_stock(demand, products)
+            if shortages:
+                result['error'] = 'Estoque insuficiente'
+                result['shortages'] = shortages
+                continue
+
+            for product_id, quantity in demand.items():
+                total_demand[product_id] = total_demand.get(product_id, 0) + quantity
+            result['error'] = None
+            accepted.append(budget)
+
+        if not accepted:
+            return [results[budget_id] for budget_id in budget_ids]
+
+        decrement_stock(total_demand)
+
+        orders = Order.objects.bulk_create([
+            Order(customer=budget.customer, total_amount=budget.total_amount, customer_state=budget.customer.state or '')
+            for budget in accepted
+        ])
+        index_objects(SearchDocument.KIND_ORDER, orders)
+        invalidate_customer_summaries(order.customer_id for order in orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=products[item.product_id],
+                quantity=item.quantity,
+                subtotal=item.subtotal,
+            )
+            for budget, order in zip(accepted, orders)
+            for item in items_by_budget[budget.id]
+        ])
+        add_orders(orders)
+
+        movements = []
+        for budget, order in zip(accepted, orders):
+            budget.converted_order = order
+            results[budget.id]['order'] = order
+            demand = aggregate_lines((item.product_id, item.quantity) for item in items_by_budget[budget.id])
+            movements.extend(
+                StockMovement(
+                    product_id=product_id,
+                    kind=StockMovement.KIND_BUDGET_CONVERSION,
+                    quantity=-quantity,
+                    reference=f'order:{order.id}',
+                )
+                for product_id, quantity in demand.items()
+            )
+        Budget.objects.bulk_update(accepted, ['converted_order'])
+        StockMovement.objects.bulk_create(movements)
+
+    return [results[budget_id] for budget_id in budget_ids]
@@ -7,6 +7,107 @@ document.addEventListener("DOMContentLoaded", () => {
   const totalRow = document.querySelector('.value-total-row');
   const hiddenInput = document.querySelector('.products-hidden');
 
+  const productSearch = document.querySelector('.product-search');
+  let searchTimer = null;
+  let searchController = null;
+
+  // Busca os produtos no servidor conforme o usuário digita
+  async function searchProducts(query) {
+    if (searchController) searchController.abort();
+    searchController = new AbortController();
+
+    const params = new URLSearchParams({ q: query });
+    if (productSelect.dataset.inStock) params.set('in_stock', '1');
+
+    try {
+      const response = await fetch(`${productSelect.dataset.searchUrl}?${params}`, {
+        signal: searchController.signal,
+      });
+      const data = await response.json();
+
+      productSelect.innerHTML = '';
+      if (!data.results.length) {
+        const option = document.createElement('option');
+        option.value = '';
+        option.textContent = 'Nenhum produto encontrado';
+        productSelect.appendChild(option);
+        return;
+      }
+
+      data.results.forEach(product => {
+        const option = document.createElement('option');
+        option.value = product.id;
+        option.dataset.name = product.description;
+        option.dataset.price = product.price;
+        option.textContent = `${product.description} - R$ ${product.price}`;
+        productSelect.appendChild(option);
+      });
+    } catch (error) {
+      if (error.name !== 'AbortError') console.error(error);
+    }
+  }
+
+  productSearch.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => searchProducts(productSearch.value.trim()), 250);
+  });
+
+  searchProducts('');
+
+  const clientSearch = document.querySelector('.client-search');
+  const clientSelect = document.querySelector('.client-select');
+  const clientMore = document.querySelector('.client-more');
+  let clientQuery = '';
+  let clientPage = 1;
+  let clientTimer = null;
+  let clientController = null;
+
+  // Busca os clientes no servidor; sem texto, vêm os usados por último
+  async function searchCustomers(query, page = 1) {
+    if (clientController) clientController.abort();
+    clientController = new AbortController();
+
+    const params = new URLSearchParams({ q: query, page });
+
+    try {
+      const response = await fetch(`${clientSelect.dataset.lookupUrl}?${params}`, {
+        signal: clientController.signal,
+      });
+      const data = await response.json();
+
+      if (page === 1) clientSelect.innerHTML = '';
+      clientQuery = query;
+      clientPage = data.page;
+      clientMore.hidden = !data.has_next;
+
+      if (page === 1 && !data.results.length) {
+        const option = document.createElement('option');
+        option.value = '';
+        option.textContent = 'Nenhum cliente encontrado';
+        clientSelect.appendChild(option);
+        return;
+      }
+
+      data.results.forEach(customer => {
+        const option = document.createElement('option');
+        option.value = customer.id;
+        option.textContent = customer.cpf ? `${customer.name} - ${customer.cpf}` : customer.name;
+        clientSelect.appendChild(option);
+      });
+    } catch (error) {
+      if (error.name !== 'AbortError') console.error(error);
+    }
+  }
+
+  clientSearch.addEventListener('input', () => {
+    clearTimeout(clientTimer);
+    clientTimer = setTimeout(() => searchCustomers(clientSearch.value.trim()), 250);
+  });
+
+  clientMore.addEventListener('click', () => searchCustomers(clientQuery, clientPage + 1));
+
+  searchCustomers('');
+
   function setTableProducts() {
     productsTable.innerHTML = "";
 
@@ -33,8 +134,8 @@ document.addEventListener("DOMContentLoaded", () => {
     e.preventDefault();
 
     const selectedOption = productSelect.selectedOptions[0];
-    const name = selectedOption.dataset.name;
-    const value = parseFloat(selectedOption.dataset.price);
+    const name = selectedOption?.dataset.name;
+    const value = parseFloat(selectedOption?.dataset.price);
     const quantity = parseInt(productQuantity.value);
 
     if(!name){
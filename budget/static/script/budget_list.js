@@ -95,7 +95,7 @@ document.addEventListener('DOMContentLoaded', () => {
   // --- Lógica de Conversão ---
   const convertModal = document.getElementById('convertModal');
   const cancelConvertButton = document.getElementById('cancelConvert');
-  const confirmConvertButton = document.getElementById('confirmConvert');
+  const convertForm = document.getElementById('convertForm');
   const convertBudgetNameElement = convertModal.querySelector('.convert-budget-name');
   let budgetToConvert = null;
 
@@ -111,7 +111,8 @@ document.addEventListener('DOMContentLoaded', () => {
       name: button.getAttribute('data-budget-name')
     };
 
-    // Atualiza o nome no modal
+    // Atualiza o nome e o destino do formulário no modal
+    convertForm.action = `/budget/convert/${budgetToConvert.id}/`;
     convertBudgetNameElement.textContent = `Orçamento: #${budgetToConvert.name}`;
 
     // Exibe o modal
@@ -126,12 +127,9 @@ document.addEventListener('DOMContentLoaded', () => {
     budgetToConvert = null;
   });
 
-  // Confirmar conversão
-  confirmConvertButton.addEventListener('click', () => {
-    if (!budgetToConvert) return;
-
-    // Redireciona para a view de conversão
-    window.location.href = `/budget/convert/${budgetToConvert.id}/`;
+  // Confirmar conversão: o formulário envia o POST com o token CSRF
+  convertForm.addEventListener('submit', (e) => {
+    if (!budgetToConvert) e.preventDefault();
   });
 
   // Fechar modal de conversão ao clicar fora dele
@@ -1,9 +1,14 @@
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+import json
 from .models import Budget, BudgetItem
+from .services import budgets_with_items, convert_budgets, create_budget
 from customers.models import Customer
+from order.models import Order
 from product.models import Product
 from suppliers.models import Supplier
 
@@ -204,3 +209,210 @@ class BudgetViewTest(TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Cliente Teste', response.content)
+
+    def test_budget_create_view(self):
+        """Testa criação de orçamento pela view"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post('/budget/create/', {
+            'cliente': self.customer.id,
+            'products': json.dumps([{'id': self.product.id, 'quantity': 2}]),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        budget = Budget.objects.latest('id')
+        self.assertEqual(budget.total_amount, Decimal('200.00'))
+        self.assertEqual(budget.items.get().subtotal, Decimal('200.00'))
+        # Orçamento não baixa estoque
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 50)
+
+    def test_budget_create_without_customer(self):
+        """Testa que o formulário sem cliente selecionado volta com erro"""
+        self.client.login(username='testuser', password='testpass123')
+        budgets_before = Budget.objects.count()
+        for value in ('', '999999'):
+            response = self.client.post('/budget/create/', {
+                'cliente': value,
+                'products': json.dumps([{'id': self.product.id, 'quantity': 1}]),
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Selecione um cliente.')
+        self.assertEqual(Budget.objects.count(), budgets_before)
+
+    def test_budget_create_constant_queries(self):
+        """Testa que o número de consultas não cresce com o número de itens"""
+        other = Product.objects.create(
+            description='Outro Produto',
+            price=Decimal('10.00'),
+            qty_stock=5,
+            supplier=self.supplier
+        )
+        with CaptureQueriesContext(connection) as one_line:
+            create_budget(self.customer, [(self.product.id, 1)])
+        with CaptureQueriesContext(connection) as two_lines:
+            create_budget(self.customer, [(self.product.id, 1), (other.id, 3)])
+
+        self.assertEqual(len(one_line), len(two_lines))
+
+
+class BudgetConversionTest(TestCase):
+    """Testes para a conversão de orçamentos em pedidos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer = Customer.objects.create(
+            name='Cliente Teste',
+            email='cliente@test.com'
+        )
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto Teste',
+            price=Decimal('100.00'),
+            qty_stock=5,
+            supplier=self.supplier
+        )
+        self.budget1 = create_budget(self.customer, [(self.product.id, 3)])
+        self.budget2 = create_budget(self.customer, [(self.product.id, 3)])
+
+    def test_convert_budget(self):
+        """Testa conversão de orçamento em pedido"""
+        result = convert_budgets([self.budget1.id])[0]
+
+        order = result['order']
+        self.assertIsNone(result['error'])
+        self.assertEqual(order.total_amount, Decimal('300.00'))
+        self.assertEqual(order.items.get().quantity, 3)
+        self.budget1.refresh_from_db()
+        self.assertEqual(self.budget1.converted_order, order)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 2)
+
+    def test_convert_budget_twice(self):
+        """Testa que um orçamento não é convertido duas vezes"""
+        convert_budgets([self.budget1.id])
+        result = convert_budgets([self.budget1.id])[0]
+
+        self.assertIsNone(result['order'])
+        self.assertIn('já convertido', result['error'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_convert_batch_respects_remaining_stock(self):
+        """Testa que o lote considera o estoque consumido pelos orçamentos anteriores"""
+        results = convert_budgets([self.budget2.id, self.budget1.id, 9999])
+
+        self.assertEqual([r['budget_id'] for r in results], [self.budget1.id, self.budget2.id, 9999])
+        self.assertIsNotNone(results[0]['order'])
+        self.assertIsNone(results[1]['order'])
+        self.assertEqual(results[1]['shortages'][0]['available'], 2)
+        self.assertIsNone(results[2]['order'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 2)
+
+    def test_convert_batch_view(self):
+        """Testa endpoint de conversão em lote"""
+        self.product.qty_stock = 10
+        self.product.save()
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            '/budget/convert/batch/',
+            data=json.dumps({'ids': [self.budget1.id, self.budget2.id]}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        order_ids = [r['order_id'] for r in response.json()['results']]
+        self.assertEqual(Order.objects.filter(id__in=order_ids).count(), 2)
+
+    def test_convert_view(self):
+        """Testa conversão pela view individual"""
+        self.client.login(username='testuser', password='testpass123')
+        # GET não converte: só o formulário (POST com CSRF) cria o pedido
+        response = self.client.get(f'/budget/convert/{self.budget1.id}/')
+        self.assertEqual(response.status_code, 405)
+        self.budget1.refresh_from_db()
+        self.assertIsNone(self.budget1.converted_order_id)
+
+        response = self.client.post(f'/budget/convert/{self.budget1.id}/')
+        self.assertEqual(response.status_code, 302)
+        self.budget1.refresh_from_db()
+        self.assertIsNotNone(self.budget1.converted_order_id)
+
+
+class BudgetListPaginationTest(TestCase):
+    """Testes para a listagem paginada de orçamentos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer = Customer.objects.create(name='Ana', email='ana@test.com')
+        self.other = Customer.objects.create(name='Bruno', email='bruno@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto Teste',
+            price=Decimal('10.00'),
+            qty_stock=50,
+            supplier=self.supplier
+        )
+        self.budget = create_budget(self.customer, [(self.product.id, 1), (self.product.id, 2)])
+        self.other_budget = create_budget(self.other, [(self.product.id, 1)])
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_budget_list_annotations(self):
+        """Testa contagem de itens e situação de conversão"""
+        convert_budgets([self.other_budget.id])
+
+        response = self.client.get('/budget/')
+
+        budgets = {b.id: b for b in response.context['budgets']}
+        self.assertEqual(budgets[self.budget.id].item_count, 2)
+        self.assertIsNone(budgets[self.budget.id].converted_order_id)
+        self.assertIsNotNone(budgets[self.other_budget.id].converted_order_id)
+
+    def test_budget_list_customer_filter(self):
+        """Testa filtro por cliente"""
+        response = self.client.get('/budget/', {'customer': 'bru'})
+
+        self.assertEqual([b.id for b in response.context['budgets']], [self.other_budget.id])
+
+    def test_budget_list_constant_queries(self):
+        """Testa que a listagem não faz consultas por linha"""
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/budget/', {'customer': 'bru'})
+        with CaptureQueriesContext(connection) as many:
+            self.client.get('/budget/')
+
+        self.assertEqual(len(few), len(many))
+
+    def test_budget_item_str_without_queries(self):
+        """Testa que __str__ do item não dispara carregamento preguiçoso"""
+        item = BudgetItem.objects.filter(budget=self.budget).first()
+
+        with self.assertNumQueries(0):
+            text = str(item)
+
+        self.assertIn(f'(Budget #{self.budget.id})', text)
+
+    def test_budget_detail_prefetches_items(self):
+        """Testa que orçamento, itens e produtos vêm em duas consultas"""
+        with self.assertNumQueries(2):
+            budget = budgets_with_items().get(id=self.budget.id)
+            [item.product.description for item in budget.items.all()]
@@ -7,4 +7,6 @@ urlpatterns = [
     path('detail/<int:id>/', views.view_detail, name='budget_detail'),
     path('delete/<int:id>/', views.view_delete, name='delete'),
     path('convert/<int:id>/', views.view_convert_to_order, name='convert_to_order'),
+    path('convert/batch/', views.view_convert_batch, name='convert_batch'),
+    path('export/', views.view_export, name='budget_export'),
 ]
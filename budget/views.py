@@ -1,24 +1,31 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from . import models
+from .services import budgets_with_items, convert_budgets, create_budget, prefetch_budget_items
 from decimal import Decimal
 from django.shortcuts import get_object_or_404
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.conf import settings
 from django.contrib import messages
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 import logging
 
-from product.models import Product
+from product.services import InsufficientStockError, parse_lines
 from customers.models import Customer
+from customers.services import remember_customer
+from config.pagination import date_range_filter, keyset_page, page_query
+from config.exports import export_response
 import json
 from django.contrib.auth.decorators import login_required
+from notifications.services import enqueue_email
+from django.views.decorators.http import require_POST
+from order.services import prefetch_order_items
+from order.views import send_order_email
 
 logger = logging.getLogger(__name__)
 
 def send_budget_email(budget, request):
     """
-    Envia e-mail ao cliente com os dados do orçamento criado.
+    Agenda o envio de e-mail ao cliente com os dados do orçamento criado.
     
     Args:
         budget: Instância do modelo Budget
@@ -26,27 +33,18 @@ def send_budget_email(budget, request):
     """
     try:
         if budget.customer.email:
-            context = {'budget': budget}
-            html_content = render_to_string('emails/budget_email.html', context)
-            text_content = render_to_string('emails/budget_email.txt', context)
-            
-            subject = f'Orçamento #{budget.id} - GestãoApp'
-            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@gestaoapp.com')
-            to_email = [budget.customer.email]
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=to_email
+            prefetch_budget_items([budget])
+            enqueue_email(
+                subject=f'Orçamento #{budget.id} - GestãoApp',
+                to=[budget.customer.email],
+                template_name='emails/budget_email',
+                context={'budget': budget},
             )
-            email.attach_alternative(html_content, "text/html")
-            email.send()
             
-            logger.info(f'E-mail enviado com sucesso')
+            logger.info(f'E-mail de orçamento #{budget.id} adicionado à fila de envio')
             messages.success(
                 request,
-                f'Orçamento criado e e-mail enviado'
+                f'Orçamento criado e e-mail adicionado à fila de envio'
             )
         else:
             messages.warning(
@@ -60,56 +58,70 @@ def send_budget_email(budget, request):
         )
         messages.error(
             request,
-            f'Orçamento #{budget.id} criado, mas houve um erro ao enviar o e-mail: {str(e)}'
+            f'Orçamento #{budget.id} criado, mas houve um erro ao agendar o e-mail: {str(e)}'
         )
 
 @login_required
 def view_index(request):
     search = request.GET.get("search", "").strip()
-    budgets = models.Budget.objects.all()
+    filters = {
+        'date_from': request.GET.get('date_from', '').strip(),
+        'date_to': request.GET.get('date_to', '').strip(),
+        'customer': request.GET.get('customer', '').strip(),
+    }
+    # Contagem de itens por subconsulta correlacionada: é calculada só para
+    # as linhas da página, sem agrupar o histórico inteiro
+    item_count = models.BudgetItem.objects.filter(
+        budget=OuterRef('pk')
+    ).order_by().values('budget').annotate(count=Count('id')).values('count')
+    budgets = models.Budget.objects.select_related('customer').annotate(
+        item_count=Coalesce(Subquery(item_count), 0)
+    )
 
     if search:
-        budgets = budgets.filter(id =search)
+        budgets = budgets.filter(id=search) if search.isdigit() else budgets.none()
+
+    budgets = budgets.filter(**date_range_filter('budget_date', filters['date_from'], filters['date_to']))
+    if filters['customer']:
+        if filters['customer'].isdigit():
+            budgets = budgets.filter(customer_id=filters['customer'])
+        else:
+            budgets = budgets.filter(customer__name__istartswith=filters['customer'])
+
+    cursor = request.GET.get('cursor', '')
+    budgets, next_cursor = keyset_page(budgets, cursor, 'budget_date')
 
     return render(request, 'index.html', {
         'budgets': budgets,
         'search': search,
+        'filters': filters,
+        'next_query': page_query(request, next_cursor) if next_cursor else None,
+        'first_query': page_query(request, None) if cursor else None,
     })
 
 @login_required
 def view_create(request):
-    customers = Customer.objects.all()
-    products = Product.objects.all()
-
     if request.method == 'POST':
-        customer_id = request.POST.get('cliente')
-        customer = Customer.objects.get(id=customer_id)
+        customer_id = request.POST.get('cliente', '')
+        customer = Customer.objects.filter(id=customer_id).first() if customer_id.isdigit() else None
+        if customer is None:
+            messages.error(request, 'Selecione um cliente.')
+            return render(request, 'create.html', {
+                'title': 'Novo Orçamento'
+            })
 
         products_json = request.POST.get('products', '[]')
         products_data = json.loads(products_json)
 
-        budget = models.Budget.objects.create(customer=customer, total_amount=0)
-        total_amount = Decimal('0.00')
-
-        for item in products_data:
-            product_id = item.get('id')
-            quantity = int(item.get('quantity', 1))
-            product = Product.objects.get(id=product_id)
-
-            price_unit = product.price
-            price_total = price_unit * quantity
-
-            models.BudgetItem.objects.create(
-                budget=budget,
-                product=product,
-                quantity=quantity,
-                subtotal=price_total,
-            )
-
-            total_amount += price_total
+        try:
+            budget = create_budget(customer, parse_lines(products_data))
+        except (TypeError, ValueError):
+            messages.error(request, 'Produtos inválidos.')
+            return render(request, 'create.html', {
+                'title': 'Novo Orçamento'
+            })
 
-        budget.total_amount = total_amount
-        budget.save()
+        remember_customer(request.user, customer)
 
         # Envia e-mail ao cliente
         send_budget_email(budget, request)
@@ -117,8 +129,6 @@ def view_create(request):
         return redirect('budget_index')
 
     return render(request, 'create.html', {
-        'products': products,
-        'customers': customers,
         'title': 'Novo Orçamento'
     })
 
@@ -129,59 +139,100 @@ def view_delete(request, id):
     return redirect('budget_index')
 
 @login_required
+@require_POST
 def view_convert_to_order(request, id):
     budget = get_object_or_404(models.Budget, id=id)
-    
-    # 1. Validar estoque
-    for item in budget.items.all():
-        if item.product.qty_stock < item.quantity:
-            messages.error(request, f'Estoque insuficiente para o produto {item.product.description}. Necessário: {item.quantity}, Disponível: {item.product.qty_stock}')
-            return redirect('budget_index')
-
-    # 2. Criar pedido
-    from order.models import Order, OrderItem
-    from order.views import send_order_email
-    
-    order = Order.objects.create(
-        customer=budget.customer,
-        total_amount=budget.total_amount
-    )
-    
-    # 3. Criar itens do pedido e atualizar estoque
-    for item in budget.items.all():
-        OrderItem.objects.create(
-            order=order,
-            product=item.product,
-            quantity=item.quantity,
-            subtotal=item.subtotal
-        )
-        
-        # Atualiza estoque
-        item.product.qty_stock -= item.quantity
-        item.product.save()
-        
-    # 4. Enviar e-mail e notificar
+
+    try:
+        result = convert_budgets([budget.id])[0]
+    except InsufficientStockError:
+        result = {'order': None, 'error': 'Estoque insuficiente', 'shortages': []}
+
+    if result['order'] is None:
+        for shortage in result['shortages']:
+            messages.error(request, f'Estoque insuficiente para o produto {shortage["description"] or shortage["product_id"]}. Necessário: {shortage["requested"]}, Disponível: {shortage["available"]}')
+        if not result['shortages']:
+            messages.error(request, result['error'])
+        return redirect('budget_index')
+
+    order = result['order']
+
+    # Enviar e-mail e notificar
     send_order_email(order, request)
     messages.success(request, f'Orçamento #{budget.id} convertido em Pedido #{order.id} com sucesso!')
-    
+
     return redirect('/order/')
 
 @login_required
-def view_detail(request, id):
-    budget = get_object_or_404(models.Budget, id=id)
-    return render(request, 'budget_detail.html', {
-        'budget': budget
+@require_POST
+def view_convert_batch(request):
+    """
+    Converte vários orçamentos em pedidos de uma só vez.
+
+    Aceita um JSON {"ids": [...]} ou o campo de formulário ids repetido e
+    responde com o resultado de cada orçamento.
+    """
+    try:
+        if request.content_type == 'application/json':
+            budget_ids = json.loads(request.body).get('ids', [])
+        else:
+            budget_ids = request.POST.getlist('ids')
+        budget_ids = [int(budget_id) for budget_id in budget_ids]
+    except (AttributeError, TypeError, ValueError):
+        return JsonResponse({'error': 'Lista de orçamentos inválida'}, status=400)
+
+    if not budget_ids:
+        return JsonResponse({'error': 'Nenhum orçamento informado'}, status=400)
+
+    try:
+        results = convert_budgets(budget_ids)
+    except InsufficientStockError as e:
+        return JsonResponse({'error': 'Estoque insuficiente', 'shortages': e.shortages}, status=409)
+
+    orders = [result['order'] for result in results if result['order'] is not None]
+    prefetch_order_items(orders)
+    for order in orders:
+        send_order_email(order, request)
+
+    return JsonResponse({
+        'results': [
+            {
+                'budget_id': result['budget_id'],
+                'order_id': result['order'].id if result['order'] is not None else None,
+                'error': result['error'],
+                'shortages': result['shortages'],
+            }
+            for result in results
+        ]
     })
-        
-    # 4. Enviar e-mail e notificar
-    send_order_email(order, request)
-    messages.success(request, f'Orçamento #{budget.id} convertido em Pedido #{order.id} com sucesso!')
-    
-    return redirect('/order/')
 
 @login_required
 def view_detail(request, id):
-    budget = get_object_or_404(models.Budget, id=id)
+    budget = get_object_or_404(budgets_with_items(), id=id)
     return render(request, 'budget_detail.html', {
         'budget': budget
-    })
\ No newline at end of file
+    })
+
+@login_required
+def view_export(request):
+    """Exporta orçamentos (ou seus itens, com ?kind=items) em CSV ou NDJSON."""
+    if request.GET.get('kind') == 'items':
+        return export_response(request, models.BudgetItem.objects.all(), [
+            ('budget_id', 'budget_id'),
+            ('budget_date', 'budget__budget_date'),
+            ('customer_id', 'budget__customer_id'),
+            ('customer', 'budget__customer__name'),
+            ('product_id', 'product_id'),
+            ('product', 'product__description'),
+            ('quantity', 'quantity'),
+            ('subtotal', 'subtotal'),
+        ], 'budget-items', date_field='budget__budget_date')
+
+    return export_response(request, models.Budget.objects.all(), [
+        ('id', 'id'),
+        ('budget_date', 'budget_date'),
+        ('customer_id', 'customer_id'),
+        ('customer', 'customer__name'),
+        ('total_amount', 'total_amount'),
+        ('converted_order_id', 'converted_order_id'),
+    ], 'budgets', date_field='budget_date')
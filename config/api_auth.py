@@ -0,0 +1,37 @@
+"""
+Autenticação por token para integrações sem sessão (PDVs, marketplaces).
+
+O token vai no cabeçalho `Authorization: Bearer <token>` e é comparado em
+tempo constante com a lista de tokens da configuração de cada endpoint.
+"""
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+
+
+def has_api_token(request, tokens):
+    """Confere o cabeçalho `Authorization: Bearer <token>` com a lista informada."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return False
+    token = token.strip().encode()
+    return any(hmac.compare_digest(token, allowed.encode()) for allowed in tokens)
+
+
+def token_or_login_required(setting):
+    """
+    Aceita um token listado em settings.<setting> ou, sem ele, exige sessão
+    como login_required. Para endpoints de leitura (GET), sem CSRF.
+    """
+    def decorator(view):
+        session_view = login_required(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if has_api_token(request, getattr(settings, setting)):
+                return view(request, *args, **kwargs)
+            return session_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,151 @@
+"""
+Base local de CEPs em arquivo ordenado e mapeado em memória.
+
+Formato do arquivo (inteiros little-endian):
+
+    cabeçalho   MAGIC (8 bytes) + quantidade de CEPs (uint32)
+    chaves      quantidade x (cep uint32, início do endereço uint32), em ordem de CEP
+    endereços   texto UTF-8 "logradouro\\x1fbairro\\x1fcidade\\x1fUF" de cada CEP, em sequência
+
+A consulta faz busca binária direto nas chaves do arquivo mapeado, sem
+carregá-lo na memória, e lê só o endereço encontrado. O arquivo é gerado
+pelo comando `build_cep_index` e substituído de forma atômica; o mapeamento
+é reaberto quando o arquivo muda e o anterior é fechado.
+"""
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+from config.validators import only_digits
+
+MAGIC = b'CEPIDX1\x00'
+HEADER = struct.Struct('<8sI')
+ENTRY = struct.Struct('<II')
+SEPARATOR = '\x1f'
+FIELDS = ('street', 'neighborhood', 'city', 'state')
+
+_lock = threading.Lock()
+_index = None
+
+
+class CepIndex:
+    """Leitura de um arquivo de índice de CEPs já mapeado em memória."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self.stat = os.fstat(handle.fileno())
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.data.close()
+            raise ValueError(f'{path} não é um índice de CEPs')
+        self.keys_start = HEADER.size
+        self.text_start = self.keys_start + self.count * ENTRY.size
+
+    def _entry(self, position):
+        return ENTRY.unpack_from(self.data, self.keys_start + position * ENTRY.size)
+
+    def lookup(self, cep):
+        """Endereço do CEP (dicionário com cep e FIELDS) ou None."""
+        digits = only_digits(cep)
+        if not digits or len(digits) != 8:
+            return None
+        key = int(digits)
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+        found, start = self._entry(low)
+        if found != key:
+            return None
+
+        end = self._entry(low + 1)[1] if low + 1 < self.count else len(self.data) - self.text_start
+        raw = self.data[self.text_start + start:self.text_start + end].decode('utf-8')
+        return {'cep': digits, **dict(zip(FIELDS, raw.split(SEPARATOR)))}
+
+    def close(self):
+        """Libera o mapeamento do arquivo."""
+        self.data.close()
+
+
+def write_index(records, path):
+    """
+    Grava o arquivo de índice a partir de (cep, logradouro, bairro, cidade, UF).
+
+    CEPs repetidos ficam com o último endereço informado. O arquivo é escrito
+    ao lado do destino e renomeado no final, para que leitores nunca vejam um
+    índice pela metade.
+
+    Returns:
+        Quantidade de CEPs gravados
+    """
+    addresses = {}
+    for cep, *fields in records:
+        digits = only_digits(cep)
+        if digits and len(digits) == 8:
+            addresses[int(digits)] = SEPARATOR.join((field or '').strip() for field in fields).encode('utf-8')
+
+    keys = sorted(addresses)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, len(keys)))
+        offset = 0
+        for key in keys:
+            handle.write(ENTRY.pack(key, offset))
+            offset += len(addresses[key])
+        for key in keys:
+            handle.write(addresses[key])
+    os.replace(temporary, path)
+    return len(keys)
+
+
+def _is_current(index, path, stat):
+    return (
+        index is not None
+        and index.path == path
+        and (index.stat.st_ino, index.stat.st_mtime_ns) == (stat.st_ino, stat.st_mtime_ns)
+    )
+
+
+def get_index():
+    """Índice de settings.CEP_INDEX_PATH, ou None se o arquivo não existir."""
+    global _index
+    path = str(settings.CEP_INDEX_PATH)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if not _is_current(_index, path, stat):
+        with _lock:
+            if not _is_current(_index, path, stat):
+                previous, _index = _index, CepIndex(path)
+                if previous is not None:
+                    previous.close()
+    return _index
+
+
+def lookup_cep(cep):
+    """Endereço do CEP pela base local, ou None (CEP inexistente ou base ausente)."""
+    index = get_index()
+    if index is None:
+        return None
+    try:
+        return index.lookup(cep)
+    except ValueError:
+        if not index.data.closed:
+            raise
+        # Outra thread trocou o índice no meio da consulta: repete no atual
+        return lookup_cep(cep)
@@ -0,0 +1,72 @@
+"""
+Exportações em streaming (CSV ou NDJSON).
+
+As linhas são lidas com queryset.values_list().iterator(), em blocos, e
+escritas na resposta à medida que chegam, de modo que a memória usada não
+depende do tamanho da exportação.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+
+from config.pagination import date_range_filter
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Arquivo falso: write() devolve o texto em vez de guardá-lo."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_rows(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_rows(header, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+def export_response(request, queryset, columns, name, date_field=None):
+    """
+    Responde com a exportação do queryset no formato pedido em ?format=.
+
+    Args:
+        request: Requisição com os parâmetros format, date_from e date_to
+        queryset: Queryset base da exportação
+        columns: Lista de tuplas (cabeçalho, campo para values_list)
+        name: Nome base do arquivo
+        date_field: Campo usado no filtro por período (opcional)
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return HttpResponseBadRequest('Formato inválido, use csv ou ndjson')
+
+    if date_field:
+        queryset = queryset.filter(**date_range_filter(
+            date_field,
+            request.GET.get('date_from', '').strip(),
+            request.GET.get('date_to', '').strip(),
+        ))
+
+    header = [title for title, _ in columns]
+    rows = queryset.order_by('pk').values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE)
+
+    if export_format == 'csv':
+        content, content_type = _csv_rows(header, rows), 'text/csv; charset=utf-8'
+    else:
+        content, content_type = _ndjson_rows(header, rows), 'application/x-ndjson; charset=utf-8'
+
+    filename = f'{name}-{timezone.localdate().isoformat()}.{export_format}'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,125 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+Em vez de OFFSET, cada página continua a partir da última linha da anterior,
+usando um índice composto (data, id); o custo de uma página não cresce com
+o histórico da tabela. Listas de ids já ordenadas (resultados de busca por
+relevância) são paginadas em memória, e só os ids da página vão ao banco.
+"""
+import base64
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(date_value, pk):
+    raw = f'{date_value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retorna (data, id) do cursor, ou None se o cursor for inválido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_raw, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        date_value = parse_datetime(date_raw)
+        if date_value is None:
+            return None
+        return date_value, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor, date_field, page_size=PAGE_SIZE):
+    """
+    Retorna uma página do queryset ordenada do mais recente para o mais antigo.
+
+    Args:
+        queryset: Queryset já filtrado
+        cursor: Cursor recebido da página anterior (ou vazio para a primeira)
+        date_field: Campo de data usado com o id como chave de ordenação
+        page_size: Quantidade de linhas por página
+
+    Returns:
+        Tupla (linhas, cursor da próxima página ou None)
+    """
+    queryset = queryset.order_by(f'-{date_field}', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        date_value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': date_value}) |
+            Q(**{date_field: date_value, 'id__lt': pk})
+        )
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, date_field), last.id)
+
+
+def id_page(ids, page, page_size=PAGE_SIZE):
+    """
+    Página de uma lista de ids já ordenada.
+
+    Args:
+        ids: Ids na ordem de exibição
+        page: Número da página recebido na querystring (texto; 1 se inválido)
+        page_size: Quantidade de ids por página
+
+    Returns:
+        Tupla (ids da página, número da página, há próxima página)
+    """
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    start = (page - 1) * page_size
+    return ids[start:start + page_size], page, len(ids) > start + page_size
+
+
+def page_query(request, cursor, param='cursor'):
+    """Querystring da página com o cursor (ou número) informado, preservando os filtros."""
+    params = request.GET.copy()
+    params.pop(param, None)
+    if cursor:
+        params[param] = cursor
+    return params.urlencode()
+
+
+def date_range_filter(date_field, date_from, date_to):
+    """
+    Converte datas AAAA-MM-DD em um filtro de intervalo sobre um DateTimeField.
+
+    O intervalo é expresso como >= início e < dia seguinte para que o índice
+    da coluna continue sendo usado (sem funções sobre a coluna).
+    """
+    filters = {}
+    start = _parse_date(date_from)
+    end = _parse_date(date_to)
+    if start:
+        filters[f'{date_field}__gte'] = timezone.make_aware(datetime.combine(start, time.min))
+    if end:
+        filters[f'{date_field}__lt'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return filters
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_decimal(value):
+    try:
+        return Decimal(value.replace(',', '.')) if value else None
+    except InvalidOperation:
+        return None
@@ -56,6 +56,9 @@ INSTALLED_APPS = [
     'customers',
     'product',
     'order',
+    'notifications',
+    'search',
+    'reports',
 ]
 
 MIDDLEWARE = [
@@ -168,3 +171,45 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER)
 SERVER_EMAIL = env('SERVER_EMAIL', default=EMAIL_HOST_USER)
+
+# Cache (por padrão em memória do processo; com mais de um worker use um
+# cache compartilhado, ex.: CACHE_URL=redis://localhost:6379/1)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Tempo (segundos) que uma página da API de produtos fica em cache; a chave
+# inclui a versão do catálogo, então alterações invalidam na hora
+PRODUCT_API_CACHE_TIMEOUT = env.int('PRODUCT_API_CACHE_TIMEOUT', default=300)
+
+# Tempo (segundos) que o resumo de um cliente fica em cache; pedidos e
+# orçamentos do cliente invalidam o resumo na hora
+CUSTOMER_SUMMARY_CACHE_TIMEOUT = env.int('CUSTOMER_SUMMARY_CACHE_TIMEOUT', default=3600)
+
+# Tempo máximo (ms) da busca global antes de responder sem resultados
+GLOBAL_SEARCH_TIMEOUT_MS = env.int('GLOBAL_SEARCH_TIMEOUT_MS', default=300)
+
+# Base local de CEPs gerada por `python manage.py build_cep_index arquivo.csv`;
+# sem o arquivo, o preenchimento automático e a checagem de CEP ficam desligados
+CEP_INDEX_PATH = env('CEP_INDEX_PATH', default=str(BASE_DIR / 'data' / 'cep.idx'))
+
+# Fila de e-mails (notifications.EmailOutbox)
+# As views apenas gravam o e-mail na fila; o envio é feito pelo comando
+# `python manage.py send_outbox --loop`, reutilizando uma conexão SMTP por lote
+EMAIL_OUTBOX_RETRY_DELAY = env.int('EMAIL_OUTBOX_RETRY_DELAY', default=60)
+EMAIL_OUTBOX_MAX_DELAY = env.int('EMAIL_OUTBOX_MAX_DELAY', default=3600)
+
+# Tempo (segundos) em que uma chave de idempotência de pedido é lembrada;
+# chaves expiradas são removidas por `python manage.py purge_idempotency_keys`
+ORDER_IDEMPOTENCY_TTL = env.int('ORDER_IDEMPOTENCY_TTL', default=24 * 60 * 60)
+
+# Máximo de pedidos aceitos por chamada em /order/api/bulk/
+ORDER_BULK_MAX_ORDERS = env.int('ORDER_BULK_MAX_ORDERS', default=5000)
+
+# Tokens aceitos em /order/api/bulk/ (cabeçalho `Authorization: Bearer <token>`),
+# usados pelos PDVs e integrações que não têm sessão; separados por vírgula
+ORDER_BULK_API_TOKENS = env.list('ORDER_BULK_API_TOKENS', default=[])
+
+# Tokens aceitos na API de produtos (/product/api/products/), para os PDVs consultarem
+# o catálogo sem sessão; por padrão, os mesmos de ORDER_BULK_API_TOKENS
+CATALOG_API_TOKENS = env.list('CATALOG_API_TOKENS', default=ORDER_BULK_API_TOKENS)
@@ -24,11 +24,14 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
+    path('search/', views.global_search, name='global_search'),
+    path('cep/<str:cep>/', views.cep_lookup, name='cep_lookup'),
     path('admin/', admin.site.urls),
     path('employee/', include('employees.urls')),
     path('order/', include('order.urls')),
     path('budget/', include('budget.urls')),
     path('customers/', include('customers.urls')),
     path('suppliers/', include('suppliers.urls')),
-    path('product/', lambda request: redirect('/customers/'))
+    path('product/', lambda request: redirect('/customers/')),
+    path('product/', include('product.urls')),
 ]
@@ -0,0 +1,153 @@
+"""
+Funções compartilhadas para documentos brasileiros (CPF, CNPJ, telefones e CEP).
+
+Os padrões são compilados uma única vez e os DDDs válidos ficam num
+frozenset. Para importações há versões em lote (`*_batch`) que validam
+listas inteiras de uma vez: os dígitos de todos os valores saem de uma
+única substituição sobre o texto unido e, com numpy instalado, dígitos
+verificadores, tamanhos e DDDs são conferidos de forma vetorizada.
+"""
+import re
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional; as versões em lote caem para Python puro
+    np = None
+
+NON_DIGITS = re.compile(r'[^0-9]')
+
+# Separa os valores no texto unido das versões em lote
+BATCH_SEPARATOR = '\x1f'
+NON_DIGITS_BATCH = re.compile(r'[^0-9\x1f]')
+
+CPF_WEIGHTS = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+CNPJ_WEIGHTS = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+
+# DDDs aceitos em celulares com 11 dígitos
+VALID_DDDS = frozenset({
+    '11', '12', '13', '14', '15', '16', '17', '18', '19', '21', '22', '24', '27', '28',
+    '31', '32', '33', '34', '35', '37', '38', '41', '42', '43', '44', '45', '46', '47',
+    '48', '49', '51', '53', '54', '55', '61', '62', '63', '64', '65', '66', '67', '68',
+    '69', '71', '73', '74', '75', '77', '79', '81', '82', '83', '84', '85', '86', '87',
+    '88', '89', '91', '92', '93', '94', '95', '96', '97', '98', '99',
+})
+
+# Siglas das unidades federativas
+VALID_UFS = frozenset({
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA',
+    'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO',
+})
+
+
+def only_digits(value):
+    """Remove tudo que não for dígito; None e vazio viram None."""
+    if not value:
+        return None
+    return NON_DIGITS.sub('', str(value)) or None
+
+
+def _check_digit(digits, weights):
+    remainder = sum(int(digit) * weight for digit, weight in zip(digits, weights)) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+def _valid_check_digits(digits, size, weights):
+    if len(digits) != size or digits == digits[0] * size:
+        return False
+    first, second = weights
+    return (
+        int(digits[-2]) == _check_digit(digits, first)
+        and int(digits[-1]) == _check_digit(digits, second)
+    )
+
+
+def is_valid_cpf(value):
+    """CPF com 11 dígitos (formatado ou não) e dígitos verificadores corretos."""
+    return _valid_check_digits(only_digits(value) or '', 11, CPF_WEIGHTS)
+
+
+def is_valid_cnpj(value):
+    """CNPJ com 14 dígitos (formatado ou não) e dígitos verificadores corretos."""
+    return _valid_check_digits(only_digits(value) or '', 14, CNPJ_WEIGHTS)
+
+
+def is_valid_mobile(value):
+    """Telefone com 10 ou 11 dígitos; com 11, o DDD precisa existir."""
+    digits = only_digits(value) or ''
+    if len(digits) == 10:
+        return True
+    return len(digits) == 11 and digits[:2] in VALID_DDDS
+
+
+def is_valid_cep(value):
+    """CEP com 8 dígitos (formatado ou não)."""
+    return len(only_digits(value) or '') == 8
+
+
+def _digits_batch(values):
+    """Dígitos de cada valor ('' para vazio), com uma só substituição para a lista inteira."""
+    if not values:
+        return []
+    text = BATCH_SEPARATOR.join(str(value).replace(BATCH_SEPARATOR, '') if value else '' for value in values)
+    return NON_DIGITS_BATCH.sub('', text).split(BATCH_SEPARATOR)
+
+
+def _check_digits_batch(values, size, weights):
+    digits = _digits_batch(values)
+    if np is None:
+        return [_valid_check_digits(item, size, weights) for item in digits]
+
+    result = np.zeros(len(digits), dtype=bool)
+    candidates = [position for position, item in enumerate(digits) if len(item) == size]
+    if not candidates:
+        return result.tolist()
+
+    matrix = (
+        np.frombuffer(''.join(digits[position] for position in candidates).encode('ascii'), dtype=np.uint8)
+        .reshape(len(candidates), size)
+        .astype(np.int32) - ord('0')
+    )
+    first, second = (np.array(weight, dtype=np.int32) for weight in weights)
+    remainder = (matrix[:, :size - 2] @ first) % 11
+    expected_first = np.where(remainder < 2, 0, 11 - remainder)
+    remainder = (matrix[:, :size - 1] @ second) % 11
+    expected_second = np.where(remainder < 2, 0, 11 - remainder)
+
+    valid = (
+        (matrix[:, -2] == expected_first)
+        & (matrix[:, -1] == expected_second)
+        & ~(matrix == matrix[:, :1]).all(axis=1)
+    )
+    result[candidates] = valid
+    return result.tolist()
+
+
+def cpf_batch(values):
+    """Valida uma lista de CPFs de uma vez; devolve uma lista de booleanos."""
+    return _check_digits_batch(values, 11, CPF_WEIGHTS)
+
+
+def cnpj_batch(values):
+    """Valida uma lista de CNPJs de uma vez; devolve uma lista de booleanos."""
+    return _check_digits_batch(values, 14, CNPJ_WEIGHTS)
+
+
+def mobile_batch(values):
+    """Valida uma lista de telefones de uma vez; devolve uma lista de booleanos."""
+    digits = _digits_batch(values)
+    if np is None or not digits:
+        return [len(item) == 10 or (len(item) == 11 and item[:2] in VALID_DDDS) for item in digits]
+
+    array = np.array(digits)
+    lengths = np.char.str_len(array)
+    # Converter para 2 caracteres deixa só o DDD
+    ddds = np.isin(array.astype('U2'), sorted(VALID_DDDS))
+    return ((lengths == 10) | ((lengths == 11) & ddds)).tolist()
+
+
+def cep_batch(values):
+    """Valida uma lista de CEPs de uma vez; devolve uma lista de booleanos."""
+    digits = _digits_batch(values)
+    if np is None or not digits:
+        return [len(item) == 8 for item in digits]
+    return (np.char.str_len(np.array(digits)) == 8).tolist()
@@ -2,11 +2,21 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from config.cep import get_index
 from employees.models import Employee
+from product.models import Product
+from reports.services import sales_overview
+from search.models import SearchDocument
+from search.services import grouped_search
 
 # Home
 def home(request):
-    return render(request, 'home.html')
+    # Números dos últimos 30 dias, lidos das tabelas de totais diários
+    context = {'sales': sales_overview()} if request.user.is_authenticated else {}
+    return render(request, 'home.html', context)
 
 
 def login_view(request):
@@ -51,4 +61,67 @@ def logout_view(request):
     """View para logout de usuários"""
     logout(request)
     messages.success(request, 'Logout realizado com sucesso!')
-    return redirect('login')
\ No newline at end of file
+    return redirect('login')
+
+
+def _search_url(kind, object_id, suppliers):
+    if kind == SearchDocument.KIND_CUSTOMER:
+        return reverse('customers:customer_edit', args=[object_id])
+    if kind == SearchDocument.KIND_SUPPLIER:
+        return f'/suppliers/edit/{object_id}/'
+    if kind == SearchDocument.KIND_PRODUCT:
+        return f'/suppliers/edit/{suppliers[object_id]}/' if object_id in suppliers else None
+    if kind == SearchDocument.KIND_ORDER:
+        return reverse('order_detail', args=[object_id])
+    return reverse('budget_detail', args=[object_id])
+
+
+@login_required
+def global_search(request):
+    """
+    Busca global da barra superior: os melhores resultados de cada cadastro.
+
+    Responde com o que foi encontrado dentro de GLOBAL_SEARCH_TIMEOUT_MS;
+    se o tempo estourar, devolve timed_out=true e os grupos que couberam no prazo.
+    """
+    query = request.GET.get('q', '').strip()[:100]
+    groups, timed_out = grouped_search(query, timeout=settings.GLOBAL_SEARCH_TIMEOUT_MS / 1000)
+
+    # Produto leva à ficha do fornecedor
+    product_ids = [object_id for object_id, _ in groups.get(SearchDocument.KIND_PRODUCT, [])]
+    suppliers = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'supplier_id')) if product_ids else {}
+
+    labels = dict(SearchDocument.KIND_CHOICES)
+    return JsonResponse({
+        'query': query,
+        'timed_out': timed_out,
+        'groups': [
+            {
+                'kind': kind,
+                'label': labels[kind],
+                'results': [
+                    {'id': object_id, 'title': title, 'url': _search_url(kind, object_id, suppliers)}
+                    for object_id, title in groups[kind]
+                ],
+            }
+            for kind, _ in SearchDocument.KIND_CHOICES
+            if groups.get(kind)
+        ],
+    })
+
+
+@login_required
+def cep_lookup(request, cep):
+    """
+    Endereço do CEP pela base local (usado no preenchimento automático dos formulários).
+
+    Responde 404 quando o CEP não está na base e 503 quando a base não foi
+    instalada (comando build_cep_index), caso em que o navegador consulta o ViaCEP.
+    """
+    index = get_index()
+    if index is None:
+        return JsonResponse({'error': 'Base de CEPs não instalada'}, status=503)
+    address = index.lookup(cep)
+    if address is None:
+        raise Http404('CEP não encontrado')
+    return JsonResponse(address)
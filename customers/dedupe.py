@@ -0,0 +1,170 @@
+"""
+Detecção de clientes duplicados.
+
+Comparar todos os pares de clientes é quadrático; em vez disso cada
+cliente é colocado em blocos (mesmo CPF, mesmo celular, mesmo CEP com o
+mesmo primeiro nome fonético, mesmo primeiro e último nome fonéticos) e
+só são comparados os pares que dividem algum bloco. Blocos maiores que
+`max_block` (ex.: um CEP de condomínio com centenas de clientes) são
+ignorados, o que mantém o total de comparações proporcional ao número de
+clientes.
+
+Os pares candidatos recebem uma nota entre 0 e 1 a partir da semelhança
+dos nomes (difflib) e dos dados de contato em comum; CPFs diferentes
+indicam pessoas diferentes e descartam o par.
+"""
+import re
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from search.documents import normalize
+
+from .models import Customer
+
+# Partículas que não ajudam a distinguir nomes
+NAME_PARTICLES = frozenset({'da', 'das', 'de', 'do', 'dos', 'e'})
+
+# Regras aplicadas em ordem sobre cada palavra, já sem acentos
+PHONETIC_RULES = [
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'th'), 't'),
+    (re.compile(r'lh'), 'li'),
+    (re.compile(r'nh'), 'ni'),
+    (re.compile(r'[cs]h'), 'x'),
+    (re.compile(r'qu(?=[ei])'), 'k'),
+    # 'G' marca o g de "gue"/"gui", que não deve virar j na regra seguinte
+    (re.compile(r'gu(?=[ei])'), 'G'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'G'), 'g'),
+    (re.compile(r'[cq]'), 'k'),
+    (re.compile(r'y'), 'i'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'h'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+VOWELS = re.compile(r'[aeiou]')
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MAX_BLOCK = 50
+
+BLOCK_FIELDS = ('id', 'name', 'cpf_digits', 'mobile_digits', 'zip_code')
+SCORE_FIELDS = ('id', 'name', 'cpf_digits', 'mobile_digits', 'zip_code', 'email')
+LOAD_BATCH = 1000
+
+
+def name_tokens(name):
+    """Palavras do nome normalizadas, sem partículas."""
+    return [token for token in re.findall(r'[a-z]+', normalize(name)) if token not in NAME_PARTICLES]
+
+
+def phonetic_word(word):
+    """Chave fonética simplificada para nomes em português ('Thiago' e 'Tiago' -> 'tg')."""
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word[:1] + VOWELS.sub('', word[1:]) if word else ''
+
+
+def block_keys(name, cpf, mobile, zip_code):
+    """Chaves de bloco de um cliente; dois clientes só são comparados se dividirem alguma."""
+    keys = []
+    if cpf:
+        keys.append(f'cpf:{cpf}')
+    if mobile:
+        keys.append(f'mobile:{mobile}')
+    phonetic = [phonetic_word(token) for token in name_tokens(name)]
+    if phonetic:
+        zip_digits = re.sub(r'\D', '', zip_code or '')
+        if zip_digits:
+            keys.append(f'zip:{zip_digits}:{phonetic[0]}')
+        keys.append(f'name:{phonetic[0]}:{phonetic[-1]}')
+    return keys
+
+
+def name_similarity(first, second):
+    """Semelhança entre 0 e 1, tolerante a partículas e à ordem das palavras."""
+    first, second = name_tokens(first), name_tokens(second)
+    if not first or not second:
+        return 0.0
+    best = 0.0
+    for a, b in ((' '.join(first), ' '.join(second)), (' '.join(sorted(first)), ' '.join(sorted(second)))):
+        matcher = SequenceMatcher(None, a, b, autojunk=False)
+        # quick_ratio é um limite superior barato; só calcula ratio se puder melhorar
+        if matcher.quick_ratio() > best:
+            best = max(best, matcher.ratio())
+    return best
+
+
+def score_pair(first, second):
+    """
+    Nota do par de registros (dicionários com SCORE_FIELDS).
+
+    Returns:
+        Tupla (nota, motivos); nota 0 quando os CPFs são diferentes
+    """
+    if first['cpf_digits'] and second['cpf_digits']:
+        if first['cpf_digits'] != second['cpf_digits']:
+            return 0.0, []
+        return 1.0, ['cpf']
+
+    similarity = name_similarity(first['name'], second['name'])
+    score = similarity
+    reasons = [f'nome {similarity:.2f}']
+    if first['mobile_digits'] and first['mobile_digits'] == second['mobile_digits']:
+        score += 0.15
+        reasons.append('celular')
+    if first['email'] and first['email'].lower() == (second['email'] or '').lower():
+        score += 0.1
+        reasons.append('email')
+    if first['zip_code'] and re.sub(r'\D', '', first['zip_code']) == re.sub(r'\D', '', second['zip_code'] or ''):
+        score += 0.05
+        reasons.append('cep')
+    return min(score, 1.0), reasons
+
+
+def candidate_pairs(queryset=None, max_block=DEFAULT_MAX_BLOCK, chunk_size=5000):
+    """Pares (menor id, maior id) que dividem ao menos um bloco com até max_block clientes."""
+    if queryset is None:
+        queryset = Customer.objects.all()
+
+    blocks = {}
+    for customer_id, name, cpf, mobile, zip_code in (
+        queryset.order_by().values_list(*BLOCK_FIELDS).iterator(chunk_size=chunk_size)
+    ):
+        for key in block_keys(name, cpf, mobile, zip_code):
+            blocks.setdefault(key, []).append(customer_id)
+
+    pairs = set()
+    for ids in blocks.values():
+        if 1 < len(ids) <= max_block:
+            pairs.update(combinations(sorted(ids), 2))
+    return pairs
+
+
+def find_duplicates(queryset=None, threshold=DEFAULT_THRESHOLD, max_block=DEFAULT_MAX_BLOCK, chunk_size=5000):
+    """
+    Propostas de fusão, da maior para a menor nota.
+
+    O cliente mais antigo (menor id) é proposto como o que permanece.
+
+    Returns:
+        Lista de dicionários com survivor, duplicate (registros com
+        SCORE_FIELDS), score e reasons
+    """
+    pairs = candidate_pairs(queryset, max_block=max_block, chunk_size=chunk_size)
+    ids = sorted({customer_id for pair in pairs for customer_id in pair})
+
+    records = {}
+    for start in range(0, len(ids), LOAD_BATCH):
+        for record in Customer.objects.filter(id__in=ids[start:start + LOAD_BATCH]).values(*SCORE_FIELDS):
+            records[record['id']] = record
+
+    proposals = []
+    for survivor_id, duplicate_id in pairs:
+        survivor, duplicate = records[survivor_id], records[duplicate_id]
+        score, reasons = score_pair(survivor, duplicate)
+        if score >= threshold:
+            proposals.append({'survivor': survivor, 'duplicate': duplicate, 'score': score, 'reasons': reasons})
+    proposals.sort(key=lambda proposal: (-proposal['score'], proposal['survivor']['id'], proposal['duplicate']['id']))
+    return proposals
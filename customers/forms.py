@@ -1,7 +1,9 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from .models import Customer
-import re
+from .services import cpf_in_use
+from config.cep import get_index
+from config.validators import is_valid_cep, is_valid_cpf, is_valid_mobile, only_digits
 
 class CustomerForm(forms.ModelForm):
     class Meta:
@@ -106,20 +108,19 @@ class CustomerForm(forms.ModelForm):
         """Validate CPF field"""
         cpf = self.cleaned_data.get('cpf')
         if cpf:
-            # Remove non-numeric characters
-            cpf_clean = re.sub(r'\D', '', cpf)
+            cpf_clean = only_digits(cpf) or ''
             
             # Check if it has 11 digits
             if len(cpf_clean) != 11:
                 raise ValidationError('CPF deve ter 11 dígitos')
             
-            # Check if all digits are the same
-            if cpf_clean == cpf_clean[0] * 11:
-                raise ValidationError('CPF inválido')
-            
-            # Validate CPF algorithm
-            if not self._validate_cpf_algorithm(cpf_clean):
+            # Validate CPF check digits (also rejects repeated digits)
+            if not is_valid_cpf(cpf_clean):
                 raise ValidationError('CPF inválido')
+
+            # Check uniqueness regardless of how existing rows were formatted
+            if cpf_in_use(cpf_clean, exclude_id=self.instance.pk):
+                raise ValidationError('Já existe um cliente com este CPF')
             
             return cpf_clean
         return cpf
@@ -141,18 +142,15 @@ class CustomerForm(forms.ModelForm):
         """Validate mobile field"""
         mobile = self.cleaned_data.get('mobile')
         if mobile:
-            # Remove non-numeric characters
-            mobile_clean = re.sub(r'\D', '', mobile)
+            mobile_clean = only_digits(mobile) or ''
             
             # Check if it has 10 or 11 digits
-            if len(mobile_clean) not in [10, 11]:
+            if len(mobile_clean) not in (10, 11):
                 raise ValidationError('Celular inválido')
             
-            # Check if it starts with valid area code for 11 digits
-            if len(mobile_clean) == 11:
-                valid_area_codes = ['11', '12', '13', '14', '15', '16', '17', '18', '19', '21', '22', '24', '27', '28', '31', '32', '33', '34', '35', '37', '38', '41', '42', '43', '44', '45', '46', '47', '48', '49', '51', '53', '54', '55', '61', '62', '63', '64', '65', '66', '67', '68', '69', '71', '73', '74', '75', '77', '79', '81', '82', '83', '84', '85', '86', '87', '88', '89', '91', '92', '93', '94', '95', '96', '97', '98', '99']
-                if not any(mobile_clean.startswith(code) for code in valid_area_codes):
-                    raise ValidationError('DDD inválido')
+            # Check the area code for 11 digits
+            if not is_valid_mobile(mobile_clean):
+                raise ValidationError('DDD inválido')
             
             return mobile_clean
         return mobile
@@ -161,12 +159,16 @@ class CustomerForm(forms.ModelForm):
         """Validate ZIP code field"""
         zip_code = self.cleaned_data.get('zip_code')
         if zip_code:
-            # Remove non-numeric characters
-            zip_code_clean = re.sub(r'\D', '', zip_code)
+            zip_code_clean = only_digits(zip_code) or ''
             
             # Check if it has 8 digits
-            if len(zip_code_clean) != 8:
+            if not is_valid_cep(zip_code_clean):
                 raise ValidationError('CEP inválido')
+
+            # With the local CEP database installed, the CEP must exist in it
+            index = get_index()
+            if index is not None and index.lookup(zip_code_clean) is None:
+                raise ValidationError('CEP não encontrado')
             
             return zip_code_clean
         return zip_code
@@ -180,25 +182,3 @@ class CustomerForm(forms.ModelForm):
             if number > 99999:
                 raise ValidationError('Número muito grande')
         return number
-    
-    def _validate_cpf_algorithm(self, cpf):
-        """Validate CPF using the official algorithm"""
-        def calculate_digit(cpf_digits, weights):
-            sum_result = sum(int(digit) * weight for digit, weight in zip(cpf_digits, weights))
-            remainder = sum_result % 11
-            return 0 if remainder < 2 else 11 - remainder
-        
-        try:
-            # Calculate first digit
-            first_digit = calculate_digit(cpf[:9], range(10, 1, -1))
-            if int(cpf[9]) != first_digit:
-                return False
-            
-            # Calculate second digit
-            second_digit = calculate_digit(cpf[:10], range(11, 1, -1))
-            if int(cpf[10]) != second_digit:
-                return False
-            
-            return True
-        except (ValueError, IndexError):
-            return False
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from config.validators import only_digits
+from customers.models import Customer
+from suppliers.models import Supplier
+
+# Modelo -> {coluna só com dígitos: coluna de origem}
+SHADOW_COLUMNS = [
+    (Customer, {'cpf_digits': 'cpf', 'mobile_digits': 'mobile'}),
+    (Supplier, {'cnpj_digits': 'cnpj', 'mobile_digits': 'mobile', 'phone_digits': 'phone'}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas só com dígitos (CPF, CNPJ e telefones) dos cadastros existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, columns in SHADOW_COLUMNS:
+            fields = ['id', *columns, *columns.values()]
+            updated = 0
+            last_id = 0
+            while True:
+                # Lotes por faixa de id: cada lote é uma busca pela chave primária
+                rows = list(
+                    model.objects.filter(id__gt=last_id).order_by('id').only(*fields)[:batch_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                changed = []
+                for row in rows:
+                    dirty = False
+                    for shadow, source in columns.items():
+                        digits = only_digits(getattr(row, source))
+                        if getattr(row, shadow) != digits:
+                            setattr(row, shadow, digits)
+                            dirty = True
+                    if dirty:
+                        changed.append(row)
+
+                if changed:
+                    with transaction.atomic():
+                        model.objects.bulk_update(changed, list(columns), batch_size=batch_size)
+                    updated += len(changed)
+
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {updated} registro(s) atualizado(s)')
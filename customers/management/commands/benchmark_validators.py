@@ -0,0 +1,52 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from config import validators
+
+
+def _check_digit(digits, weights):
+    remainder = sum(int(digit) * weight for digit, weight in zip(digits, weights)) % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+def _random_cpf(rng, valid):
+    # Os dígitos verificadores são gerados aqui; a validação medida é só a pública
+    base = ''.join(rng.choice('0123456789') for _ in range(9))
+    first = _check_digit(base, validators.CPF_WEIGHTS[0])
+    second = _check_digit(base + str(first), validators.CPF_WEIGHTS[1])
+    digits = f'{base}{first}{second}'
+    if not valid:
+        digits = digits[:-1] + str((second + 1) % 10)
+    return f'{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}'
+
+
+class Command(BaseCommand):
+    help = 'Mede o custo por registro da validação de CPF (um a um e em lote)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        rng = random.Random(options['seed'])
+        values = [_random_cpf(rng, valid=rng.random() < 0.9) for _ in range(count)]
+
+        timings = []
+        start = time.perf_counter()
+        scalar = [validators.is_valid_cpf(value) for value in values]
+        timings.append(('um a um (is_valid_cpf)', time.perf_counter() - start))
+
+        start = time.perf_counter()
+        batch = validators.cpf_batch(values)
+        engine = 'numpy' if validators.np is not None else 'python'
+        timings.append((f'em lote (cpf_batch, {engine})', time.perf_counter() - start))
+
+        if scalar != batch:
+            self.stderr.write('Resultados divergentes entre as duas versões!')
+
+        self.stdout.write(f'{count} CPFs, {sum(scalar)} válidos')
+        for label, elapsed in timings:
+            self.stdout.write(f'{label}: {elapsed * 1e6 / count:.2f} µs/registro ({elapsed:.3f}s no total)')
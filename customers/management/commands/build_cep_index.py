@@ -0,0 +1,37 @@
+import csv
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.cep import FIELDS, write_index
+
+COLUMNS = ('cep', *FIELDS)
+
+
+class Command(BaseCommand):
+    help = 'Gera a base local de CEPs a partir de um CSV (cep, street, neighborhood, city, state)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo CSV com cabeçalho')
+        parser.add_argument('--output', help='Arquivo de índice (padrão: CEP_INDEX_PATH)')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        output = options['output'] or str(settings.CEP_INDEX_PATH)
+        try:
+            source = open(options['path'], encoding=options['encoding'], newline='')
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir o arquivo: {e}')
+
+        with source:
+            reader = csv.DictReader(source, delimiter=options['delimiter'])
+            missing = [column for column in COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise CommandError(f"Colunas ausentes no CSV: {', '.join(missing)}")
+            total = write_index(
+                (tuple(row[column] for column in COLUMNS) for row in reader),
+                output,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{total} CEP(s) gravado(s) em {output}'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from customers.models import CustomerSegment
+from customers.rfm import compute_segments
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a segmentação RFM (recência, frequência e valor) dos clientes a partir dos pedidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = compute_segments(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        labels = dict(CustomerSegment.SEGMENT_CHOICES)
+        for segment, count in counts.items():
+            self.stdout.write(f'{labels[segment]}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(counts.values())} cliente(s) segmentado(s) em {elapsed:.1f}s'
+        ))
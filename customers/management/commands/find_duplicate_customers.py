@@ -0,0 +1,39 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from customers.dedupe import DEFAULT_MAX_BLOCK, DEFAULT_THRESHOLD, find_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Gera propostas de fusão de clientes duplicados (CSV para revisão e merge_customers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Arquivo CSV de saída (padrão: saída padrão)')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Nota mínima (0 a 1)')
+        parser.add_argument('--max-block', type=int, default=DEFAULT_MAX_BLOCK,
+                            help='Blocos com mais clientes que isso são ignorados')
+
+    def handle(self, *args, **options):
+        proposals = find_duplicates(threshold=options['threshold'], max_block=options['max_block'])
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else self.stdout
+        try:
+            writer = csv.writer(output)
+            writer.writerow(['survivor_id', 'duplicate_id', 'score', 'reasons', 'survivor_name', 'duplicate_name'])
+            for proposal in proposals:
+                writer.writerow([
+                    proposal['survivor']['id'],
+                    proposal['duplicate']['id'],
+                    f"{proposal['score']:.3f}",
+                    ', '.join(proposal['reasons']),
+                    proposal['survivor']['name'],
+                    proposal['duplicate']['name'],
+                ])
+        finally:
+            if options['output']:
+                output.close()
+
+        (self.stderr if not options['output'] else self.stdout).write(
+            self.style.SUCCESS(f'{len(proposals)} proposta(s) de fusão')
+        )
@@ -0,0 +1,72 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.services import IMPORT_FIELDS, import_customers_bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa clientes de um arquivo CSV com cabeçalho '
+        f'({", ".join(IMPORT_FIELDS)}), em lotes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo CSV com os clientes')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Linhas validadas e gravadas por vez')
+        parser.add_argument('--delimiter', default=',', help='Separador de colunas do CSV')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificação do arquivo')
+        parser.add_argument('--errors', help='Arquivo CSV para gravar as linhas recusadas e o motivo')
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['path'], newline='', encoding=options['encoding'])
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir o arquivo: {e}')
+
+        reader = csv.DictReader(source, delimiter=options['delimiter'])
+        missing = {'name'} - set(reader.fieldnames or [])
+        if missing:
+            source.close()
+            raise CommandError('O arquivo precisa ter ao menos a coluna name')
+
+        report_file = open(options['errors'], 'w', newline='', encoding='utf-8') if options['errors'] else None
+        report = csv.writer(report_file) if report_file else None
+        if report:
+            report.writerow(['line', 'status', 'errors', *IMPORT_FIELDS])
+
+        totals = {'created': 0, 'duplicate': 0, 'error': 0}
+        seen_cpfs, seen_emails = set(), set()
+        try:
+            batch = []
+            # A linha 1 é o cabeçalho
+            for line_number, row in enumerate(reader, start=2):
+                batch.append((line_number, row))
+                if len(batch) >= options['batch_size']:
+                    self._process(batch, seen_cpfs, seen_emails, report, totals)
+                    batch = []
+            if batch:
+                self._process(batch, seen_cpfs, seen_emails, report, totals)
+        finally:
+            source.close()
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['created']} cliente(s) importado(s), {totals['duplicate']} duplicado(s), "
+            f"{totals['error']} com erro"
+        ))
+
+    def _process(self, batch, seen_cpfs, seen_emails, report, totals):
+        results = import_customers_bulk([row for _, row in batch], seen_cpfs, seen_emails)
+        for (line_number, row), result in zip(batch, results):
+            totals[result['status']] += 1
+            if result['status'] == 'created':
+                continue
+            if report:
+                report.writerow([
+                    line_number, result['status'], '; '.join(result['errors']),
+                    *[row.get(field) or '' for field in IMPORT_FIELDS],
+                ])
+            else:
+                self.stderr.write(f"Linha {line_number}: {'; '.join(result['errors'])}")
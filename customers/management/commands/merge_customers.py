@@ -0,0 +1,62 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.models import Customer
+from customers.services import merge_customers
+
+
+class Command(BaseCommand):
+    help = 'Funde clientes duplicados: informe os ids ou um CSV gerado por find_duplicate_customers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Id do cliente mantido seguido dos duplicados')
+        parser.add_argument('--proposals', help='CSV com colunas survivor_id e duplicate_id')
+        parser.add_argument('--min-score', type=float, default=0.0, help='Ignora propostas com nota menor')
+
+    def handle(self, *args, **options):
+        if options['proposals']:
+            pairs = self._read_proposals(options['proposals'], options['min_score'])
+        elif len(options['ids']) >= 2:
+            survivor_id, *duplicate_ids = options['ids']
+            pairs = [(survivor_id, duplicate_id) for duplicate_id in duplicate_ids]
+        else:
+            raise CommandError('Informe o cliente mantido e ao menos um duplicado, ou --proposals')
+
+        # Propostas encadeadas (A-B, B-C) convergem para quem já absorveu o outro
+        merged_into = {}
+
+        def resolve(customer_id):
+            while customer_id in merged_into:
+                customer_id = merged_into[customer_id]
+            return customer_id
+
+        totals = {'orders': 0, 'budgets': 0, 'customers': 0}
+        for survivor_id, duplicate_id in pairs:
+            survivor_id, duplicate_id = resolve(survivor_id), resolve(duplicate_id)
+            if survivor_id == duplicate_id:
+                continue
+            customers = Customer.objects.in_bulk([survivor_id, duplicate_id])
+            if len(customers) != 2:
+                self.stderr.write(f'Cliente #{survivor_id} ou #{duplicate_id} não encontrado')
+                continue
+            result = merge_customers(customers[survivor_id], [customers[duplicate_id]])
+            merged_into[duplicate_id] = survivor_id
+            for key in totals:
+                totals[key] += result[key]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['customers']} cliente(s) fundido(s); {totals['orders']} pedido(s) e "
+            f"{totals['budgets']} orçamento(s) transferido(s)"
+        ))
+
+    def _read_proposals(self, path, min_score):
+        try:
+            with open(path, encoding='utf-8', newline='') as handle:
+                return [
+                    (int(row['survivor_id']), int(row['duplicate_id']))
+                    for row in csv.DictReader(handle)
+                    if float(row.get('score') or 1) >= min_score
+                ]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f'Arquivo de propostas inválido: {e}')
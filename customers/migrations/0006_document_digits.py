@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_customer_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='cpf_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='mobile_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_document_digits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSegment',
+            fields=[
+                ('customer', models.OneToOneField(db_column='customer_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='segment', serialize=False, to='customers.customer')),
+                ('recency_days', models.PositiveIntegerField()),
+                ('frequency', models.PositiveIntegerField()),
+                ('monetary', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('r_score', models.PositiveSmallIntegerField()),
+                ('f_score', models.PositiveSmallIntegerField()),
+                ('m_score', models.PositiveSmallIntegerField()),
+                ('segment', models.CharField(choices=[('champions', 'Campeões'), ('loyal', 'Fiéis'), ('new', 'Novos'), ('promising', 'Promissores'), ('needs_attention', 'Precisam de atenção'), ('at_risk', 'Em risco'), ('hibernating', 'Hibernando')], db_index=True, max_length=20)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Segmento do cliente',
+                'verbose_name_plural': 'Segmentos dos clientes',
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+from search.documents import normalize
+
+BATCH_SIZE = 2000
+
+
+def lookup_key(value, max_length):
+    return normalize(value).strip()[:max_length] or None
+
+
+def fill_lookup_keys(apps, schema_editor):
+    Customer = apps.get_model('customers', 'Customer')
+    batch = []
+    for customer in Customer.objects.only('id', 'name', 'email').iterator(chunk_size=BATCH_SIZE):
+        customer.name_key = lookup_key(customer.name, 100)
+        customer.email_key = lookup_key(customer.email, 200)
+        batch.append(customer)
+        if len(batch) >= BATCH_SIZE:
+            Customer.objects.bulk_update(batch, ['name_key', 'email_key'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['name_key', 'email_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_customer_segment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name_key', 'id'], name='customer_name_key_idx'),
+        ),
+        migrations.RunPython(fill_lookup_keys, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
 from django.db import models
+
+from config.validators import is_valid_cep, is_valid_cpf, is_valid_mobile, only_digits
+from search.documents import normalize
 from django.core.exceptions import ValidationError
-import re
 
 # Create your models here.
 
+def lookup_key(value, max_length):
+    """Minúsculas e sem acentos, para buscas por prefixo com faixa no índice."""
+    return normalize(value).strip()[:max_length] or None
+
+
 class Customer(models.Model):
     name = models.CharField(max_length=100, verbose_name="Nome")
     cpf = models.CharField(max_length=14, verbose_name="CPF", blank=True, null=True, unique=True)
@@ -15,6 +22,14 @@ class Customer(models.Model):
     city = models.CharField(max_length=100, verbose_name="Cidade", blank=True, null=True)
     state = models.CharField(max_length=2, verbose_name="Estado", blank=True, null=True)
     number = models.IntegerField(verbose_name="Número", blank=True, null=True)
+
+    # Cópias só com dígitos, indexadas, para buscas exatas por documento/telefone
+    cpf_digits = models.CharField(max_length=14, blank=True, null=True, editable=False, db_index=True)
+    mobile_digits = models.CharField(max_length=15, blank=True, null=True, editable=False, db_index=True)
+
+    # Nome e e-mail normalizados (lookup_key), para a busca por prefixo do campo de seleção
+    name_key = models.CharField(max_length=100, blank=True, null=True, editable=False)
+    email_key = models.CharField(max_length=200, blank=True, null=True, editable=False, db_index=True)
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Data de Atualização")
@@ -23,10 +38,24 @@ class Customer(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='customer_name_id_idx'),
+            models.Index(fields=['name_key', 'id'], name='customer_name_key_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.cpf_digits = only_digits(self.cpf)
+        self.mobile_digits = only_digits(self.mobile)
+        self.name_key = lookup_key(self.name, 100)
+        self.email_key = lookup_key(self.email, 200)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'cpf_digits', 'mobile_digits', 'name_key', 'email_key'}
+        super().save(*args, **kwargs)
+
     def clean(self):
         super().clean()
         # Validate name
@@ -34,75 +63,57 @@ class Customer(models.Model):
             raise ValidationError({'name': 'Nome deve ter pelo menos 2 caracteres'})
         # Validate CPF if provided
         if self.cpf:
-            if not self._validate_cpf(self.cpf):
+            if not is_valid_cpf(self.cpf):
                 raise ValidationError({'cpf': 'Formato de CPF inválido'})
         # Validate mobile if provided
         if self.mobile:
-            if not self._validate_mobile(self.mobile):
+            if not is_valid_mobile(self.mobile):
                 raise ValidationError({'mobile': 'Formato de celular inválido'})
         # Validate ZIP code if provided
         if self.zip_code:
-            if not self._validate_zip_code(self.zip_code):
+            if not is_valid_cep(self.zip_code):
                 raise ValidationError({'zip_code': 'Formato de CEP inválido'})
-    
-    def _validate_cpf(self, cpf):
-        """Validate Brazilian CPF format"""
-        # Remove non-numeric characters
-        cpf = re.sub(r'\D', '', cpf)
-        
-        # Check if it has 11 digits
-        if len(cpf) != 11:
-            return False
-        
-        # Check if all digits are the same
-        if cpf == cpf[0] * 11:
-            return False
-        
-        # Validate CPF algorithm
-        def calculate_digit(cpf_digits, weights):
-            sum_result = sum(int(digit) * weight for digit, weight in zip(cpf_digits, weights))
-            remainder = sum_result % 11
-            return 0 if remainder < 2 else 11 - remainder
-        
-        try:
-            # Calculate first digit
-            first_digit = calculate_digit(cpf[:9], range(10, 1, -1))
-            if int(cpf[9]) != first_digit:
-                return False
-            
-            # Calculate second digit
-            second_digit = calculate_digit(cpf[:10], range(11, 1, -1))
-            if int(cpf[10]) != second_digit:
-                return False
-            
-            return True
-        except (ValueError, IndexError):
-            return False
-    
-    def _validate_mobile(self, mobile):
-        """Validate Brazilian mobile format"""
-        # Remove non-numeric characters
-        mobile = re.sub(r'\D', '', mobile)
-        
-        # Check if it has 10 or 11 digits
-        if len(mobile) not in [10, 11]:
-            return False
-        
-        # Check if it starts with valid area code
-        if len(mobile) == 11:
-            valid_area_codes = ['11', '12', '13', '14', '15', '16', '17', '18', '19', '21', '22', '24', '27', '28', '31', '32', '33', '34', '35', '37', '38', '41', '42', '43', '44', '45', '46', '47', '48', '49', '51', '53', '54', '55', '61', '62', '63', '64', '65', '66', '67', '68', '69', '71', '73', '74', '75', '77', '79', '81', '82', '83', '84', '85', '86', '87', '88', '89', '91', '92', '93', '94', '95', '96', '97', '98', '99']
-            if not any(mobile.startswith(code) for code in valid_area_codes):
-                return False
-        
-        return True
-    
-    def _validate_zip_code(self, zip_code):
-        """Validate Brazilian ZIP code format"""
-        # Remove non-numeric characters
-        zip_code = re.sub(r'\D', '', zip_code)
-        
-        # Check if it has 8 digits
-        if len(zip_code) != 8:
-            return False
-        
-        return True
+
+
+
+class CustomerSegment(models.Model):
+    """Notas RFM (recência, frequência e valor) de cada cliente, geradas pelo comando compute_rfm."""
+    CHAMPIONS = 'champions'
+    LOYAL = 'loyal'
+    NEW = 'new'
+    PROMISING = 'promising'
+    NEEDS_ATTENTION = 'needs_attention'
+    AT_RISK = 'at_risk'
+    HIBERNATING = 'hibernating'
+    SEGMENT_CHOICES = [
+        (CHAMPIONS, 'Campeões'),
+        (LOYAL, 'Fiéis'),
+        (NEW, 'Novos'),
+        (PROMISING, 'Promissores'),
+        (NEEDS_ATTENTION, 'Precisam de atenção'),
+        (AT_RISK, 'Em risco'),
+        (HIBERNATING, 'Hibernando'),
+    ]
+
+    customer = models.OneToOneField(
+        Customer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='segment',
+        db_column='customer_id'
+    )
+    recency_days = models.PositiveIntegerField()
+    frequency = models.PositiveIntegerField()
+    monetary = models.DecimalField(max_digits=12, decimal_places=2)
+    r_score = models.PositiveSmallIntegerField()
+    f_score = models.PositiveSmallIntegerField()
+    m_score = models.PositiveSmallIntegerField()
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES, db_index=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Segmento do cliente"
+        verbose_name_plural = "Segmentos dos clientes"
+
+    def __str__(self):
+        return f"{self.customer_id}: {self.get_segment_display()} (R{self.r_score} F{self.f_score} M{self.m_score})"
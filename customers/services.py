@@ -0,0 +1,392 @@
+"""
+Serviços de clientes: busca para os campos de seleção, consultas por
+documento, importação em lote, fusão de cadastros duplicados e resumo
+de compras de cada cliente.
+
+A busca usa apenas prefixos (nome, e-mail ou dígitos do CPF), que podem
+ser resolvidos pelos índices, e cada funcionário tem no cache a lista dos
+clientes usados por último, devolvida sem consultar o banco quando o campo
+de busca está vazio.
+"""
+import re
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from config.validators import VALID_UFS, cep_batch, cpf_batch, mobile_batch, only_digits
+from search.models import SearchDocument
+from search.services import index_objects
+
+from budget.models import Budget
+from order.models import Order
+
+from .models import Customer, lookup_key
+
+LOOKUP_PAGE_SIZE = 20
+RECENT_LIMIT = 10
+RECENT_TIMEOUT = 30 * 24 * 60 * 60
+CUSTOMERS_VERSION_KEY = 'customers:version'
+SUMMARY_KEY = 'customers:summary:{}'
+
+LOOKUP_FIELDS = ('id', 'name', 'cpf', 'email')
+
+# Campos que o cliente mantido herda dos duplicados quando estão vazios nele
+MERGE_FIELDS = (
+    'cpf', 'email', 'mobile', 'zip_code', 'address', 'number', 'neighborhood', 'city', 'state',
+)
+
+
+def customers_version():
+    version = cache.get(CUSTOMERS_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(CUSTOMERS_VERSION_KEY, version, timeout=None):
+            version = cache.get(CUSTOMERS_VERSION_KEY, version)
+    return version
+
+
+def bump_customers_version():
+    """Descarta as listas de recentes (um cliente foi alterado ou excluído)."""
+    cache.set(CUSTOMERS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _recent_key(user):
+    return f'customers:recent:{customers_version()}:{user.pk}'
+
+
+def recent_customers(user):
+    """Clientes usados por último pelo funcionário (mais recente primeiro)."""
+    return cache.get(_recent_key(user), [])
+
+
+def remember_customer(user, customer):
+    """Coloca o cliente no topo da lista de recentes do funcionário."""
+    key = _recent_key(user)
+    entry = {field: getattr(customer, field) for field in LOOKUP_FIELDS}
+    recent = [row for row in cache.get(key, []) if row['id'] != customer.id]
+    cache.set(key, [entry] + recent[:RECENT_LIMIT - 1], RECENT_TIMEOUT)
+
+
+def find_customer_by_cpf(cpf):
+    """Cliente com o CPF informado (formatado ou não), pela coluna indexada."""
+    digits = only_digits(cpf)
+    if not digits:
+        return None
+    return Customer.objects.filter(cpf_digits=digits).first()
+
+
+def cpf_in_use(cpf, exclude_id=None):
+    """Indica se o CPF já pertence a outro cliente, independente da formatação."""
+    digits = only_digits(cpf)
+    if not digits:
+        return False
+    customers = Customer.objects.filter(cpf_digits=digits)
+    if exclude_id is not None:
+        customers = customers.exclude(id=exclude_id)
+    return customers.exists()
+
+
+def _prefix(field, prefix):
+    """Filtro de prefixo como faixa [prefixo, próximo prefixo), resolvido pelo índice B-tree."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def search_customers(query, page=1, page_size=LOOKUP_PAGE_SIZE):
+    """
+    Busca clientes por prefixo do nome, do e-mail ou dos dígitos do CPF/celular.
+
+    Os prefixos são comparados com as colunas normalizadas (name_key,
+    email_key e as colunas só com dígitos) como faixas, e não com LIKE,
+    para que a busca use os índices em qualquer banco.
+
+    Returns:
+        Tupla (lista de dicionários com id, name, cpf e email, há próxima página)
+    """
+    query = query.strip()
+    customers = Customer.objects.order_by('name_key', 'id')
+    digits = re.sub(r'[\s.\-/()]', '', query)
+    key = lookup_key(query, 200)
+
+    if digits.isdigit():
+        # Número completo vira busca exata; parcial, prefixo nas colunas só com dígitos
+        if len(digits) >= 10:
+            customers = customers.filter(Q(cpf_digits=digits) | Q(mobile_digits=digits))
+        else:
+            customers = customers.filter(_prefix('cpf_digits', digits) | _prefix('mobile_digits', digits))
+    elif '@' in query:
+        customers = customers.filter(_prefix('email_key', key))
+    elif key:
+        customers = customers.filter(_prefix('name_key', key) | _prefix('email_key', key))
+
+    offset = (page - 1) * page_size
+    rows = list(customers.values(*LOOKUP_FIELDS)[offset:offset + page_size + 1])
+    return rows[:page_size], len(rows) > page_size
+
+
+IMPORT_FIELDS = ('name', 'cpf', 'email', 'mobile', 'zip_code', 'address', 'number', 'neighborhood', 'city', 'state')
+IMPORT_MAX_LENGTHS = {'name': 100, 'email': 200, 'address': 255, 'neighborhood': 100, 'city': 100}
+
+
+def _import_errors(row, cpf, cpf_ok, mobile, mobile_ok, zip_code, zip_ok):
+    errors = []
+    name = row['name']
+    if len(name) < 2:
+        errors.append('Nome deve ter pelo menos 2 caracteres')
+    for field, max_length in IMPORT_MAX_LENGTHS.items():
+        if len(row[field]) > max_length:
+            errors.append(f'{field} muito longo (máximo {max_length})')
+    if cpf and not cpf_ok:
+        errors.append('CPF inválido')
+    if mobile and not mobile_ok:
+        errors.append('Celular inválido')
+    if zip_code and not zip_ok:
+        errors.append('CEP inválido')
+    if row['email']:
+        try:
+            validate_email(row['email'])
+        except ValidationError:
+            errors.append('E-mail inválido')
+    if row['state'] and row['state'] not in VALID_UFS:
+        errors.append('Estado inválido')
+    if row['number'] and not (row['number'].isdigit() and 1 <= int(row['number']) <= 99999):
+        errors.append('Número inválido')
+    return errors
+
+
+def import_customers_bulk(rows, seen_cpfs=None, seen_emails=None):
+    """
+    Valida e grava um lote de clientes vindos de importação.
+
+    CPF, celular e CEP são validados de uma vez para o lote inteiro; as
+    duplicidades são detectadas por conjuntos (no próprio arquivo, via
+    seen_cpfs/seen_emails compartilhados entre lotes, e no banco com uma
+    consulta IN por lote) e os aceitos são gravados com bulk_create.
+
+    Args:
+        rows: Lista de dicionários com as chaves de IMPORT_FIELDS (texto)
+        seen_cpfs: Conjunto de CPFs (int) já vistos em lotes anteriores
+        seen_emails: Conjunto de e-mails já vistos, normalizados com lookup_key
+
+    Returns:
+        Lista, na ordem de entrada, de dicionários com index, status
+        ('created', 'duplicate' ou 'error'), customer_id e errors
+    """
+    seen_cpfs = set() if seen_cpfs is None else seen_cpfs
+    seen_emails = set() if seen_emails is None else seen_emails
+    rows = [{field: (row.get(field) or '').strip() for field in IMPORT_FIELDS} for row in rows]
+    for row in rows:
+        row['state'] = row['state'].upper()
+
+    cpfs = [only_digits(row['cpf']) for row in rows]
+    mobiles = [only_digits(row['mobile']) for row in rows]
+    zip_codes = [only_digits(row['zip_code']) for row in rows]
+    cpf_ok = cpf_batch(cpfs)
+    mobile_ok = mobile_batch(mobiles)
+    zip_ok = cep_batch(zip_codes)
+
+    existing_cpfs = set(
+        Customer.objects.filter(cpf_digits__in={cpf for cpf in cpfs if cpf}).values_list('cpf_digits', flat=True)
+    )
+    # E-mails comparados pela mesma chave do índice email_key (minúsculas, sem
+    # acentos), tanto no arquivo quanto no banco
+    email_keys = [lookup_key(row['email'], 200) for row in rows]
+    existing_emails = set(
+        Customer.objects.filter(email_key__in={key for key in email_keys if key}).values_list('email_key', flat=True)
+    )
+
+    results = []
+    accepted = []
+    for index, row in enumerate(rows):
+        result = {'index': index, 'status': 'error', 'customer_id': None, 'errors': []}
+        results.append(result)
+
+        errors = _import_errors(
+            row, cpfs[index], cpf_ok[index], mobiles[index], mobile_ok[index], zip_codes[index], zip_ok[index],
+        )
+        if errors:
+            result['errors'] = errors
+            continue
+
+        cpf = cpfs[index]
+        email = email_keys[index]
+        if cpf and (cpf in existing_cpfs or int(cpf) in seen_cpfs):
+            result.update(status='duplicate', errors=['CPF já cadastrado'])
+            continue
+        if email and (email in existing_emails or email in seen_emails):
+            result.update(status='duplicate', errors=['E-mail já cadastrado'])
+            continue
+        if cpf:
+            seen_cpfs.add(int(cpf))
+        if email:
+            seen_emails.add(email)
+
+        accepted.append((result, Customer(
+            name=row['name'],
+            cpf=cpf,
+            cpf_digits=cpf,
+            email=row['email'] or None,
+            mobile=mobiles[index],
+            mobile_digits=mobiles[index],
+            name_key=lookup_key(row['name'], 100),
+            email_key=email_keys[index],
+            zip_code=zip_codes[index],
+            address=row['address'] or None,
+            number=int(row['number']) if row['number'] else None,
+            neighborhood=row['neighborhood'] or None,
+            city=row['city'] or None,
+            state=row['state'] or None,
+        )))
+
+    if accepted:
+        try:
+            with transaction.atomic():
+                customers = Customer.objects.bulk_create([customer for _, customer in accepted], batch_size=1000)
+                index_objects(SearchDocument.KIND_CUSTOMER, customers)
+        except IntegrityError:
+            # Concorrência com outro cadastro: grava um a um para isolar o conflito
+            for result, customer in accepted:
+                customer.pk = None
+                customer._state.adding = True
+                try:
+                    with transaction.atomic():
+                        customer.save()
+                except IntegrityError:
+                    result.update(status='duplicate', errors=['CPF ou e-mail já cadastrado'])
+                    customer.pk = None
+
+        for result, customer in accepted:
+            if customer.pk is not None:
+                result.update(status='created', customer_id=customer.pk)
+
+    return results
+
+
+def merge_customers(survivor, duplicates):
+    """
+    Funde clientes duplicados no cliente mantido.
+
+    Pedidos e orçamentos são transferidos com um UPDATE por tabela, os
+    campos vazios do cliente mantido são preenchidos com os dos duplicados
+    (na ordem recebida) e os duplicados são excluídos. Os pedidos e
+    orçamentos transferidos são reindexados na busca com o cliente mantido.
+
+    Args:
+        survivor: Cliente que permanece
+        duplicates: Clientes a absorver
+
+    Returns:
+        Dicionário com as quantidades de pedidos, orçamentos e clientes afetados
+    """
+    duplicate_ids = [customer.pk for customer in duplicates if customer.pk != survivor.pk]
+    if not duplicate_ids:
+        return {'orders': 0, 'budgets': 0, 'customers': 0}
+
+    with transaction.atomic():
+        survivor = Customer.objects.select_for_update().get(pk=survivor.pk)
+        duplicates = Customer.objects.select_for_update().in_bulk(duplicate_ids)
+        if len(duplicates) != len(duplicate_ids):
+            raise Customer.DoesNotExist('Cliente duplicado não encontrado')
+
+        orders = Order.objects.filter(customer_id__in=duplicate_ids).update(customer=survivor)
+        budgets = Budget.objects.filter(customer_id__in=duplicate_ids).update(customer=survivor)
+        invalidate_customer_summaries([survivor.pk, *duplicate_ids])
+
+        for customer_id in duplicate_ids:
+            for field in MERGE_FIELDS:
+                if getattr(survivor, field) in (None, '') and getattr(duplicates[customer_id], field) not in (None, ''):
+                    setattr(survivor, field, getattr(duplicates[customer_id], field))
+
+        # CPF e e-mail são únicos: os duplicados saem antes de o mantido herdá-los
+        Customer.objects.filter(pk__in=duplicate_ids).delete()
+        survivor.save()
+
+        # O UPDATE não dispara sinais: os documentos ainda têm o nome do duplicado
+        index_objects(SearchDocument.KIND_ORDER, Order.objects.filter(customer=survivor).select_related('customer'))
+        index_objects(SearchDocument.KIND_BUDGET, Budget.objects.filter(customer=survivor).select_related('customer'))
+
+    return {'orders': orders, 'budgets': budgets, 'customers': len(duplicate_ids)}
+
+
+CENTS = Decimal('0.01')
+
+
+def _money(value):
+    return str((value or Decimal(0)).quantize(CENTS))
+
+
+def _date(value):
+    return value.isoformat() if value is not None else None
+
+
+def summarize_customer(customer_id):
+    """
+    Resumo do cliente: pedidos, orçamentos, faturamento e última compra.
+
+    São três consultas (cadastro, agregado de pedidos e agregado de
+    orçamentos), servidas pelos índices por cliente; o resultado fica no
+    cache até um pedido ou orçamento do cliente mudar.
+
+    Returns:
+        Dicionário serializável em JSON, ou None se o cliente não existir
+    """
+    key = SUMMARY_KEY.format(customer_id)
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    customer = (
+        Customer.objects.filter(pk=customer_id)
+        .values('id', 'name', 'cpf', 'email', 'mobile', 'city', 'state', 'created_at')
+        .first()
+    )
+    if customer is None:
+        return None
+
+    orders = Order.objects.filter(customer_id=customer_id).aggregate(
+        count=Count('id'),
+        revenue=Sum('total_amount'),
+        first=Min('order_date'),
+        last=Max('order_date'),
+    )
+    budgets = Budget.objects.filter(customer_id=customer_id).aggregate(
+        count=Count('id'),
+        amount=Sum('total_amount'),
+        converted=Count('id', filter=Q(converted_order__isnull=False)),
+        last=Max('budget_date'),
+    )
+
+    summary = {
+        'customer': {**customer, 'created_at': _date(customer['created_at'])},
+        'orders': {
+            'count': orders['count'],
+            'revenue': _money(orders['revenue']),
+            'average_ticket': _money(
+                orders['revenue'] / orders['count'] if orders['count'] else None
+            ),
+            'first_purchase': _date(orders['first']),
+            'last_purchase': _date(orders['last']),
+        },
+        'budgets': {
+            'count': budgets['count'],
+            'amount': _money(budgets['amount']),
+            'converted': budgets['converted'],
+            'open': budgets['count'] - budgets['converted'],
+            'last_budget': _date(budgets['last']),
+        },
+    }
+    cache.set(key, summary, settings.CUSTOMER_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_customer_summaries(customer_ids):
+    """Descarta os resumos dos clientes após a confirmação da transação corrente."""
+    keys = [SUMMARY_KEY.format(customer_id) for customer_id in set(customer_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
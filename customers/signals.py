@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Customer
+from .services import bump_customers_version, invalidate_customer_summaries
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_recent_customers(sender, instance, created=False, **kwargs):
+    """Evita que a lista de recentes mostre nome desatualizado ou cliente excluído."""
+    if created:
+        return
+    bump_customers_version()
+    invalidate_customer_summaries([instance.pk])
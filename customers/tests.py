@@ -1,8 +1,30 @@
-from django.test import TestCase, Client
+import csv
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .models import Customer
+from config import cep, validators
+from config.cep import lookup_cep
+from search.models import SearchDocument
+from search.services import search_ids
+from budget.models import Budget
+from order.models import Order
+from . import rfm
+from .dedupe import find_duplicates, phonetic_word
+from .models import Customer, CustomerSegment
 from .forms import CustomerForm
+from .services import cpf_in_use, find_customer_by_cpf, merge_customers, remember_customer, search_customers
 
 Employee = get_user_model()
 
@@ -242,3 +264,429 @@ class CustomerViewTest(TestCase):
         
         # Verifica se foi excluído
         self.assertFalse(Customer.objects.filter(id=customer_id).exists())
+
+
+class CustomerLookupTest(TestCase):
+    """Testes para a busca de clientes usada nas telas de cadastro"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        cache.clear()
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.ana = Customer.objects.create(name='Ana Souza', cpf='52998224725', email='ana@test.com')
+        self.bruno = Customer.objects.create(name='Bruno Lima', cpf='111.444.777-35', email='bruno@test.com')
+        self.carla = Customer.objects.create(name='Carla Ana', email='carla@test.com')
+
+    def lookup(self, **params):
+        response = self.client.get(reverse('customers:customer_lookup'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefix_search_by_name_email_and_cpf(self):
+        """Testa a busca por prefixo de nome, e-mail e dígitos do CPF"""
+        ids = lambda data: [row['id'] for row in data['results']]
+        self.assertEqual(ids(self.lookup(q='ana')), [self.ana.id])
+        self.assertEqual(ids(self.lookup(q='carla@')), [self.carla.id])
+        self.assertEqual(ids(self.lookup(q='529.982')), [self.ana.id])
+        self.assertEqual(ids(self.lookup(q='1114447')), [self.bruno.id])
+        # Sem distinção de maiúsculas e acentos
+        self.assertEqual(ids(self.lookup(q='ÁNA s')), [self.ana.id])
+        self.assertEqual(ids(self.lookup(q='BRUNO@')), [self.bruno.id])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta do SQLite')
+    def test_prefix_search_uses_indexes(self):
+        """Testa que as buscas por prefixo são resolvidas pelos índices, sem varrer a tabela"""
+        for query in ('Jo', '123', 'a@b'):
+            with CaptureQueriesContext(connection) as queries:
+                search_customers(query)
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + queries.captured_queries[-1]['sql'])
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            self.assertNotIn('SCAN', plan, query)
+            self.assertIn('SEARCH customers_customer USING INDEX', plan)
+
+    def test_pagination(self):
+        """Testa a paginação dos resultados"""
+        for i in range(25):
+            Customer.objects.create(name=f'Cliente {i:02d}')
+        first = self.lookup(q='cliente')
+        self.assertEqual(len(first['results']), 20)
+        self.assertTrue(first['has_next'])
+        second = self.lookup(q='cliente', page=2)
+        self.assertEqual(len(second['results']), 5)
+        self.assertFalse(second['has_next'])
+        self.assertEqual(self.client.get(reverse('customers:customer_lookup'), {'page': 'x'}).status_code, 400)
+
+    def test_recent_customers_come_from_cache(self):
+        """Testa que os clientes recentes são devolvidos sem consultar clientes no banco"""
+        remember_customer(self.user, self.bruno)
+        remember_customer(self.user, self.ana)
+        remember_customer(self.user, self.bruno)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.lookup()
+        self.assertTrue(data['recent'])
+        self.assertEqual([row['id'] for row in data['results']], [self.bruno.id, self.ana.id])
+        self.assertFalse(any('customers_customer' in q['sql'] for q in queries.captured_queries))
+
+        self.bruno.name = 'Bruno Lima Filho'
+        self.bruno.save()
+        self.assertFalse(self.lookup()['recent'])
+
+
+class CustomerDocumentDigitsTest(TestCase):
+    """Testes para as colunas só com dígitos de CPF e celular"""
+
+    def test_lookup_ignores_formatting(self):
+        """Testa a busca e a checagem de unicidade independentes da formatação"""
+        customer = Customer.objects.create(name='Cliente Teste', cpf='529.982.247-25', mobile='(11) 98765-4321')
+        self.assertEqual(customer.cpf_digits, '52998224725')
+        self.assertEqual(customer.mobile_digits, '11987654321')
+        self.assertEqual(find_customer_by_cpf('52998224725'), customer)
+        self.assertTrue(cpf_in_use('52998224725'))
+        self.assertFalse(cpf_in_use('52998224725', exclude_id=customer.id))
+
+        form = CustomerForm(data={'name': 'Outro Cliente', 'cpf': '52998224725'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('cpf', form.errors)
+
+
+class ValidatorsTest(TestCase):
+    """Testes para o módulo compartilhado de validadores"""
+
+    def test_single_values(self):
+        """Testa CPF, CNPJ, celular e CEP individualmente"""
+        self.assertTrue(validators.is_valid_cpf('529.982.247-25'))
+        self.assertFalse(validators.is_valid_cpf('529.982.247-26'))
+        self.assertFalse(validators.is_valid_cpf('111.111.111-11'))
+        self.assertTrue(validators.is_valid_cnpj('11.222.333/0001-81'))
+        self.assertFalse(validators.is_valid_cnpj('11.222.333/0001-82'))
+        self.assertTrue(validators.is_valid_mobile('(11) 98765-4321'))
+        self.assertFalse(validators.is_valid_mobile('(20) 98765-4321'))
+        self.assertTrue(validators.is_valid_cep('01310-100'))
+        self.assertFalse(validators.is_valid_cep('0131-100'))
+
+    def test_batch_matches_single(self):
+        """Testa que o lote (com e sem numpy) concorda com a validação individual"""
+        cpfs = ['529.982.247-25', '52998224726', '111.111.111-11', '', None, '123', '111.444.777-35']
+        cnpjs = ['11.222.333/0001-81', '11222333000182', '00000000000000', None]
+        expected_cpfs = [validators.is_valid_cpf(value) for value in cpfs]
+        expected_cnpjs = [validators.is_valid_cnpj(value) for value in cnpjs]
+        mobiles = ['(11) 98765-4321', '1133334444', '(20) 98765-4321', '987654321', '', None, '119876543210']
+        ceps = ['01310-100', '01310100', '0131010', '013101000', '', None]
+        expected_mobiles = [validators.is_valid_mobile(value) for value in mobiles]
+        expected_ceps = [validators.is_valid_cep(value) for value in ceps]
+
+        for patched in (False, True):
+            with patch.object(validators, 'np', None if patched else validators.np):
+                self.assertEqual(validators.cpf_batch(cpfs), expected_cpfs)
+                self.assertEqual(validators.cnpj_batch(cnpjs), expected_cnpjs)
+                self.assertEqual(validators.mobile_batch(mobiles), expected_mobiles)
+                self.assertEqual(validators.cep_batch(ceps), expected_ceps)
+                self.assertEqual(validators.mobile_batch([]), [])
+
+
+class CustomerImportTest(TestCase):
+    """Testes para a importação de clientes em lote"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        # Maiúsculas no cadastro: o arquivo traz o mesmo e-mail em minúsculas
+        Customer.objects.create(name='Cliente Existente', cpf='52998224725', email='Existente@Test.com')
+
+    def write_csv(self, rows):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8')
+        with handle:
+            writer = csv.writer(handle)
+            writer.writerow(['name', 'cpf', 'email', 'mobile', 'zip_code', 'state', 'number'])
+            writer.writerows(rows)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_import_with_duplicates_and_errors(self):
+        """Testa gravação em lote, duplicidades no arquivo e no banco e o relatório de erros"""
+        path = self.write_csv([
+            ['Ana Souza', '111.444.777-35', 'ana@test.com', '(11) 98765-4321', '01310-100', 'sp', '10'],
+            ['Ana Repetida', '11144477735', 'outra@test.com', '', '', '', ''],
+            ['Bruno Lima', '529.982.247-25', 'bruno@test.com', '', '', '', ''],
+            ['Carla Dias', '', 'existente@test.com', '', '', '', ''],
+            ['X', '12345678900', 'invalido', '123', '1', 'ZZ', 'abc'],
+            ['Daniel Alves', '', '', '', '', 'RJ', ''],
+        ])
+        errors_path = path + '.errors.csv'
+        self.addCleanup(lambda: os.path.exists(errors_path) and os.remove(errors_path))
+
+        out = StringIO()
+        call_command('import_customers', path, batch_size=2, errors=errors_path, stdout=out)
+        self.assertIn('2 cliente(s) importado(s), 3 duplicado(s), 1 com erro', out.getvalue())
+
+        ana = Customer.objects.get(name='Ana Souza')
+        self.assertEqual(ana.cpf_digits, '11144477735')
+        self.assertEqual(ana.mobile, '11987654321')
+        self.assertEqual(ana.state, 'SP')
+        self.assertTrue(Customer.objects.filter(name='Daniel Alves').exists())
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'ana souza'), [ana.id])
+
+        with open(errors_path, encoding='utf-8') as handle:
+            report = list(csv.DictReader(handle))
+        self.assertEqual([row['line'] for row in report], ['3', '4', '5', '6'])
+        self.assertEqual(report[3]['status'], 'error')
+        self.assertIn('CPF inválido', report[3]['errors'])
+
+
+class CepIndexTest(TestCase):
+    """Testes para a base local de CEPs"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index_path = os.path.join(directory.name, 'cep.idx')
+
+        source = os.path.join(directory.name, 'ceps.csv')
+        with open(source, 'w', encoding='utf-8', newline='') as handle:
+            writer = csv.writer(handle, delimiter=';')
+            writer.writerow(['cep', 'street', 'neighborhood', 'city', 'state'])
+            writer.writerow(['01310-100', 'Avenida Paulista', 'Bela Vista', 'São Paulo', 'SP'])
+            writer.writerow(['20040-002', 'Rua da Assembleia', 'Centro', 'Rio de Janeiro', 'RJ'])
+            writer.writerow(['99999', 'Inválido', '', '', ''])
+            writer.writerow(['01001000', 'Praça da Sé', 'Sé', 'São Paulo', 'SP'])
+
+        out = StringIO()
+        call_command('build_cep_index', source, output=self.index_path, delimiter=';', stdout=out)
+        self.assertIn('3 CEP(s) gravado(s)', out.getvalue())
+
+        settings_override = override_settings(CEP_INDEX_PATH=self.index_path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User = get_user_model()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_lookup(self):
+        """Testa busca binária no índice, inclusive primeiro e último CEP"""
+        self.assertEqual(lookup_cep('01310-100'), {
+            'cep': '01310100', 'street': 'Avenida Paulista', 'neighborhood': 'Bela Vista',
+            'city': 'São Paulo', 'state': 'SP',
+        })
+        self.assertEqual(lookup_cep('01001000')['street'], 'Praça da Sé')
+        self.assertEqual(lookup_cep('20040002')['state'], 'RJ')
+        self.assertIsNone(lookup_cep('00000000'))
+        self.assertIsNone(lookup_cep('99999999'))
+        self.assertIsNone(lookup_cep('123'))
+
+    def test_rebuild_closes_previous_index(self):
+        """Testa que o índice é reaberto quando o arquivo muda e o mapeamento anterior é fechado"""
+        self.assertEqual(lookup_cep('01310100')['street'], 'Avenida Paulista')
+        previous = cep.get_index()
+
+        cep.write_index([('01310-100', 'Av. Paulista', 'Bela Vista', 'São Paulo', 'SP')], self.index_path)
+        self.assertEqual(lookup_cep('01310100')['street'], 'Av. Paulista')
+        self.assertIsNot(cep.get_index(), previous)
+        self.assertTrue(previous.data.closed)
+        self.assertIsNone(lookup_cep('01001000'))
+
+    def test_missing_index(self):
+        """Testa que sem o arquivo a busca devolve None e o formulário não exige o CEP na base"""
+        with override_settings(CEP_INDEX_PATH=self.index_path + '.ausente'):
+            self.assertIsNone(lookup_cep('01310100'))
+            form = CustomerForm(data={'name': 'Cliente', 'zip_code': '70000-000'})
+            self.assertTrue(form.is_valid(), form.errors)
+            # 503 distingue base ausente de CEP inexistente: o navegador cai para o ViaCEP
+            self.assertEqual(self.client.get(reverse('cep_lookup', args=['01310100'])).status_code, 503)
+
+    def test_endpoint(self):
+        """Testa o endpoint usado pelo preenchimento automático"""
+        response = self.client.get(reverse('cep_lookup', args=['01310-100']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['city'], 'São Paulo')
+        self.assertEqual(self.client.get(reverse('cep_lookup', args=['70000000'])).status_code, 404)
+
+    def test_form_rejects_unknown_cep(self):
+        """Testa que o formulário recusa CEP inexistente na base local"""
+        form = CustomerForm(data={'name': 'Cliente', 'zip_code': '70000-000'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('CEP não encontrado', form.errors['zip_code'])
+        form = CustomerForm(data={'name': 'Cliente', 'zip_code': '01310-100'})
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+class CustomerDedupeTest(TestCase):
+    """Testes para a detecção e fusão de clientes duplicados"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.joao = Customer.objects.create(name='João da Silva', mobile='11987654321', zip_code='01310100')
+        self.joao_copy = Customer.objects.create(
+            name='Joao Silva', cpf='52998224725', email='joao.silva@test.com', mobile='(11) 98765-4321',
+        )
+        self.thiago = Customer.objects.create(name='Thiago Souza', zip_code='20040-002')
+        self.tiago = Customer.objects.create(name='Tiago Sousa', zip_code='20040002')
+        # Mesmo nome, CPFs diferentes: pessoas diferentes
+        Customer.objects.create(name='Maria Lima', cpf='11144477735')
+        Customer.objects.create(name='Maria Lima', cpf='39053344705')
+
+    def test_phonetic_key(self):
+        """Testa que grafias diferentes do mesmo nome geram a mesma chave"""
+        self.assertEqual(phonetic_word('thiago'), phonetic_word('tiago'))
+        self.assertEqual(phonetic_word('souza'), phonetic_word('sousa'))
+        self.assertEqual(phonetic_word('phelipe'), phonetic_word('felipe'))
+        self.assertNotEqual(phonetic_word('ana'), phonetic_word('maria'))
+
+    def test_find_duplicates(self):
+        """Testa as propostas geradas a partir dos blocos"""
+        proposals = find_duplicates()
+        pairs = {(p['survivor']['id'], p['duplicate']['id']) for p in proposals}
+        self.assertEqual(pairs, {(self.joao.id, self.joao_copy.id), (self.thiago.id, self.tiago.id)})
+
+        # Blocos grandes demais são ignorados
+        self.assertEqual(find_duplicates(max_block=1), [])
+
+    def test_merge_customers(self):
+        """Testa a transferência de pedidos e orçamentos e o preenchimento de campos vazios"""
+        Order.objects.create(customer=self.joao_copy, total_amount=10)
+        Order.objects.create(customer=self.joao_copy, total_amount=20)
+        budget = Budget.objects.create(customer=self.joao_copy, total_amount=30)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = merge_customers(self.joao, [self.joao_copy])
+
+        self.assertEqual(result, {'orders': 2, 'budgets': 1, 'customers': 1})
+        self.assertFalse(Customer.objects.filter(id=self.joao_copy.id).exists())
+        self.assertEqual(Order.objects.filter(customer=self.joao).count(), 2)
+
+        self.joao.refresh_from_db()
+        self.assertEqual(self.joao.cpf, '52998224725')
+        self.assertEqual(self.joao.email, 'joao.silva@test.com')
+        self.assertEqual(self.joao.zip_code, '01310100')
+        self.assertEqual(self.joao.cpf_digits, '52998224725')
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, '52998224725'), [self.joao.id])
+        self.assertEqual(search_ids(SearchDocument.KIND_BUDGET, str(budget.id)), [budget.id])
+        self.assertEqual(search_ids(SearchDocument.KIND_BUDGET, 'joao da silva'), [budget.id])
+
+    def test_commands(self):
+        """Testa o CSV de propostas e a fusão a partir dele"""
+        Order.objects.create(customer=self.tiago, total_amount=10)
+        proposals_path = os.path.join(tempfile.mkdtemp(), 'propostas.csv')
+        self.addCleanup(os.remove, proposals_path)
+        call_command('find_duplicate_customers', output=proposals_path, stdout=StringIO())
+
+        out = StringIO()
+        call_command('merge_customers', proposals=proposals_path, stdout=out)
+        self.assertIn('2 cliente(s) fundido(s); 1 pedido(s)', out.getvalue())
+        self.assertEqual(Order.objects.get().customer_id, self.thiago.id)
+        self.assertEqual(Customer.objects.count(), 4)
+
+
+class CustomerSummaryTest(TestCase):
+    """Testes para o resumo do cliente"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+        self.customer = Customer.objects.create(name='Cliente Resumo')
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, total_amount='100.00')
+            Order.objects.create(customer=self.customer, total_amount='50.50')
+            Budget.objects.create(customer=self.customer, total_amount='30.00')
+        self.url = reverse('customers:customer_summary', args=[self.customer.id])
+
+    def test_summary(self):
+        """Testa os totais de pedidos e orçamentos"""
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['customer']['name'], 'Cliente Resumo')
+        self.assertEqual(data['orders']['count'], 2)
+        self.assertEqual(data['orders']['revenue'], '150.50')
+        self.assertEqual(data['orders']['average_ticket'], '75.25')
+        self.assertIsNotNone(data['orders']['last_purchase'])
+        self.assertEqual(data['budgets']['count'], 1)
+        self.assertEqual(data['budgets']['open'], 1)
+
+        empty = Customer.objects.create(name='Sem Compras')
+        data = self.client.get(reverse('customers:customer_summary', args=[empty.id])).json()
+        self.assertEqual(data['orders'], {
+            'count': 0, 'revenue': '0.00', 'average_ticket': '0.00', 'first_purchase': None, 'last_purchase': None,
+        })
+        self.assertEqual(self.client.get(reverse('customers:customer_summary', args=[999999])).status_code, 404)
+
+    def test_cached_until_orders_change(self):
+        """Testa que o resumo vem do cache e é invalidado por novos pedidos"""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse([q for q in queries.captured_queries if 'order_order' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, total_amount='49.50')
+        self.assertEqual(self.client.get(self.url).json()['orders']['revenue'], '200.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Budget.objects.filter(customer=self.customer).get().delete()
+        self.assertEqual(self.client.get(self.url).json()['budgets']['count'], 0)
+
+
+class CustomerRfmTest(TestCase):
+    """Testes para a segmentação RFM"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        now = timezone.now()
+        self.customers = []
+        # Cliente i: último pedido há 30*i dias, 5-i pedidos de 100*(5-i)
+        for i in range(5):
+            customer = Customer.objects.create(name=f'Cliente {i}')
+            self.customers.append(customer)
+            for _ in range(5 - i):
+                Order.objects.create(customer=customer, total_amount=100 * (5 - i), order_date=now - timedelta(days=30 * i))
+        Customer.objects.create(name='Sem Pedidos')
+
+    def test_scores_with_and_without_numpy(self):
+        """Testa que as faixas são iguais com numpy e em Python puro, com empates na faixa de baixo"""
+        values = [1, 1, 1, 1, 2, 3, 10, 1, 5, 7]
+        with patch.object(rfm, 'np', None):
+            fallback = rfm._scores(values)
+        self.assertEqual(rfm._scores(values), fallback)
+        self.assertEqual(fallback[:4], [1, 1, 1, 1])
+        self.assertEqual(fallback[6], 5)
+        with patch.object(rfm, 'np', None):
+            self.assertEqual(rfm._scores([3]), [1])
+
+    def test_compute_segments(self):
+        """Testa a gravação dos segmentos e o filtro da listagem"""
+        out = StringIO()
+        call_command('compute_rfm', stdout=out)
+        self.assertIn('5 cliente(s) segmentado(s)', out.getvalue())
+
+        best = CustomerSegment.objects.get(customer=self.customers[0])
+        self.assertEqual((best.r_score, best.f_score, best.m_score), (5, 5, 5))
+        self.assertEqual(best.segment, CustomerSegment.CHAMPIONS)
+        self.assertEqual(best.frequency, 5)
+        worst = CustomerSegment.objects.get(customer=self.customers[4])
+        self.assertEqual(worst.recency_days, 120)
+        self.assertEqual(worst.segment, CustomerSegment.HIBERNATING)
+        self.assertEqual(CustomerSegment.objects.count(), 5)
+
+        # Recalcular substitui a tabela inteira
+        call_command('compute_rfm', stdout=StringIO())
+        self.assertEqual(CustomerSegment.objects.count(), 5)
+
+        User = get_user_model()
+        User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('customers:customer_list'), {'segment': CustomerSegment.CHAMPIONS})
+        self.assertEqual(
+            [c.id for c in response.context['customers']], [self.customers[0].id, self.customers[1].id]
+        )
@@ -8,4 +8,7 @@ urlpatterns = [
     path('create/', views.customer_create, name='customer_create'),
     path('edit/<int:id>/', views.customer_edit, name='customer_edit'),
     path('delete/<int:id>/', views.customer_delete, name='customer_delete'),
+    path('lookup/', views.customer_lookup, name='customer_lookup'),
+    path('<int:id>/summary/', views.customer_summary, name='customer_summary'),
+    path('export/', views.customer_export, name='customer_export'),
 ]
@@ -1,30 +1,63 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import DatabaseError, IntegrityError
+from django.http import Http404, JsonResponse
 
-from .models import Customer
+from .models import Customer, CustomerSegment
 from .forms import CustomerForm
+from .services import recent_customers, search_customers, summarize_customer
 from django.contrib.auth.decorators import login_required
+from config.exports import export_response
+from search.models import SearchDocument
+from search.services import rank_by, search_ids
+from config.pagination import id_page, page_query
+from config.validators import only_digits
+import logging
+
+logger = logging.getLogger(__name__)
 
 @login_required
 def customer_list(request):
-    """Lista todos os clientes"""
+    """Lista todos os clientes; com busca, pagina os resultados por relevância"""
     try:
         customers = Customer.objects.all()
-        
-        # Filtro por pesquisa
         search = request.GET.get('search', '')
+        segment = request.GET.get('segment', '')
+        page, has_next = 1, False
+
+        # Filtro por pesquisa
         if search:
-            customers = customers.filter(name__icontains=search)
+            digits = only_digits(search)
+            if digits and len(digits) == 11 and not search.strip(' .-0123456789'):
+                # CPF completo: busca exata pela coluna indexada
+                customers = customers.filter(cpf_digits=digits)
+            else:
+                # Todos os ids que combinam (busca textual e trechos do meio das
+                # palavras), mas só os da página são ordenados no banco
+                ids = search_ids(SearchDocument.KIND_CUSTOMER, search, limit=None, substrings=True)
+                if segment:
+                    members = set(CustomerSegment.objects.filter(segment=segment).values_list('customer_id', flat=True))
+                    ids = [customer_id for customer_id in ids if customer_id in members]
+                ids, page, has_next = id_page(ids, request.GET.get('page'))
+                customers = rank_by(customers, ids)
+
+        # Filtro por segmento RFM (comando compute_rfm)
+        if segment:
+            customers = customers.filter(segment__segment=segment)
         
         context = {
             'customers': customers,
-            'search': search
+            'search': search,
+            'segment': segment,
+            'segments': CustomerSegment.SEGMENT_CHOICES,
+            'next_query': page_query(request, str(page + 1), 'page') if has_next else None,
+            'first_query': page_query(request, None, 'page') if page > 1 else None,
         }
         return render(request, 'customers/customer_list.html', context)
         
-    except Exception as e:
+    except DatabaseError:
+        logger.exception('Erro ao carregar lista de clientes')
         messages.error(request, 'Erro ao carregar lista de clientes')
         return render(request, 'customers/customer_list.html', {'customers': []})
 
@@ -111,3 +144,53 @@ def customer_delete(request, id):
         messages.error(request, 'Erro ao excluir cliente')
     
     return redirect('customers:customer_list')
+
+@login_required
+def customer_export(request):
+    """Exporta os clientes em CSV ou NDJSON"""
+    return export_response(request, Customer.objects.all(), [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('cpf', 'cpf'),
+        ('email', 'email'),
+        ('mobile', 'mobile'),
+        ('zip_code', 'zip_code'),
+        ('address', 'address'),
+        ('number', 'number'),
+        ('neighborhood', 'neighborhood'),
+        ('city', 'city'),
+        ('state', 'state'),
+        ('created_at', 'created_at'),
+    ], 'customers', date_field='created_at')
+
+
+@login_required
+def customer_lookup(request):
+    """
+    Busca de clientes em JSON para os campos de seleção.
+
+    Sem texto de busca, devolve os clientes usados por último pelo
+    funcionário (direto do cache); se não houver, a primeira página.
+    """
+    query = request.GET.get('q', '').strip()[:100]
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return JsonResponse({'error': 'page deve ser um número'}, status=400)
+
+    if not query and page == 1:
+        recent = recent_customers(request.user)
+        if recent:
+            return JsonResponse({'results': recent, 'page': 1, 'has_next': False, 'recent': True})
+
+    results, has_next = search_customers(query, page=page)
+    return JsonResponse({'results': results, 'page': page, 'has_next': has_next, 'recent': False})
+
+
+@login_required
+def customer_summary(request, id):
+    """Resumo do cliente em JSON: pedidos, orçamentos, faturamento e última compra"""
+    summary = summarize_customer(id)
+    if summary is None:
+        raise Http404('Cliente não encontrado')
+    return JsonResponse(summary)
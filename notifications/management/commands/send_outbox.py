@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.services import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails pendentes da fila (EmailOutbox) em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='E-mails por conexão SMTP')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Tentativas antes de marcar como falho')
+        parser.add_argument('--loop', action='store_true', help='Continua aguardando novos e-mails')
+        parser.add_argument('--interval', type=float, default=5, help='Segundos de espera quando a fila está vazia')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_pending(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+            )
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_sent} e-mail(s) enviado(s), {total_failed} falha(s)'
+        ))
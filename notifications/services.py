@@ -0,0 +1,122 @@
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Tempo em que um lote fica reservado para um worker antes de poder ser
+# retomado por outro (caso o primeiro morra no meio do envio)
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_email(subject, to, template_name, context, from_email=None):
+    """
+    Renderiza o e-mail e grava na fila de envio, sem falar com o servidor SMTP.
+
+    Args:
+        subject: Assunto do e-mail
+        to: Lista de destinatários
+        template_name: Caminho do template sem extensão; são usados os
+            arquivos .html e .txt correspondentes
+        context: Contexto para renderização dos templates
+        from_email: Remetente (padrão: DEFAULT_FROM_EMAIL)
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', None) or 'noreply@gestaoapp.com',
+        to=','.join(to),
+        body=render_to_string(f'{template_name}.txt', context),
+        html_body=render_to_string(f'{template_name}.html', context),
+    )
+
+
+def retry_delay(attempts):
+    """Intervalo exponencial entre tentativas, limitado a EMAIL_OUTBOX_MAX_DELAY."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    maximum = getattr(settings, 'EMAIL_OUTBOX_MAX_DELAY', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), maximum))
+
+
+def claim_batch(batch_size):
+    """
+    Reserva um lote de e-mails pendentes para este worker.
+
+    Os registros são adiados por CLAIM_TIMEOUT dentro de uma transação curta,
+    de modo que workers concorrentes não peguem os mesmos e-mails e o envio
+    SMTP aconteça fora da transação.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(id__in=[email.id for email in batch]).update(
+                next_attempt_at=now + CLAIM_TIMEOUT
+            )
+    return batch
+
+
+def deliver_pending(batch_size=50, max_attempts=5, connection=None):
+    """
+    Envia um lote de e-mails pendentes usando uma única conexão SMTP.
+
+    Falhas são reagendadas com backoff exponencial até max_attempts, quando
+    o e-mail é marcado como falho.
+
+    Returns:
+        Tupla (enviados, falhas) do lote processado
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f'Erro ao conectar ao servidor de e-mail: {str(e)}', exc_info=True)
+        for email in batch:
+            _register_failure(email, e, max_attempts)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                try:
+                    connection.send_messages([email.to_message(connection)])
+                except Exception as e:
+                    logger.error(f'Erro ao enviar e-mail #{email.id}: {str(e)}', exc_info=True)
+                    _register_failure(email, e, max_attempts)
+                    failed += 1
+                else:
+                    email.status = EmailOutbox.STATUS_SENT
+                    email.sent_at = timezone.now()
+                    email.attempts += 1
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return sent, failed
+
+
+def _register_failure(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = EmailOutbox.STATUS_FAILED
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
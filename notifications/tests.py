@@ -0,0 +1,96 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from customers.models import Customer
+from order.models import Order
+from .models import EmailOutbox
+from .services import deliver_pending, enqueue_email
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Backend que simula um servidor SMTP recusando as mensagens"""
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('Servidor indisponível')
+
+
+class EmailOutboxTest(TestCase):
+    """Testes para a fila de e-mails"""
+
+    def enqueue(self):
+        return EmailOutbox.objects.create(
+            subject='Assunto',
+            from_email='noreply@test.com',
+            to='cliente@test.com',
+            body='Texto',
+            html_body='<p>Texto</p>',
+        )
+
+    def test_enqueue_does_not_send(self):
+        """Testa que enfileirar não envia o e-mail na hora"""
+        customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+        order = Order.objects.create(customer=customer, total_amount=Decimal('10.00'))
+
+        enqueue_email(
+            subject=f'Pedido #{order.id}',
+            to=[customer.email],
+            template_name='emails/order_email',
+            context={'order': order},
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(email.to, 'cliente@test.com')
+        self.assertIn(f'PEDIDO #{order.id}', email.body)
+
+    def test_deliver_pending(self):
+        """Testa envio do lote pendente"""
+        self.enqueue()
+        self.enqueue()
+
+        sent, failed = deliver_pending()
+
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(EmailOutbox.objects.exclude(status=EmailOutbox.STATUS_SENT).exists())
+
+    @override_settings(EMAIL_BACKEND='notifications.tests.FailingEmailBackend')
+    def test_deliver_failure_retries_with_backoff(self):
+        """Testa reagendamento com backoff quando o envio falha"""
+        email = self.enqueue()
+
+        with self.assertLogs('notifications.services', level='ERROR'):
+            sent, failed = deliver_pending(max_attempts=2)
+
+        email.refresh_from_db()
+        self.assertEqual((sent, failed), (0, 1))
+        self.assertEqual(email.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('indisponível', email.last_error)
+
+        # Não é retentado antes do prazo
+        self.assertEqual(deliver_pending(max_attempts=2), (0, 0))
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs('notifications.services', level='ERROR'):
+            deliver_pending(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailOutbox.STATUS_FAILED)
+
+    def test_send_outbox_command(self):
+        """Testa o comando que esvazia a fila"""
+        for _ in range(3):
+            self.enqueue()
+
+        call_command('send_outbox', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
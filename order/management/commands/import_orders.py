@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from order.services import create_orders_bulk
+from product.services import InsufficientStockError
+
+
+class Command(BaseCommand):
+    help = 'Importa pedidos de um arquivo NDJSON (um pedido JSON por linha)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo NDJSON com os pedidos')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Pedidos por transação')
+        parser.add_argument('--results', help='Arquivo NDJSON para gravar o resultado de cada linha')
+
+    def handle(self, *args, **options):
+        try:
+            source = open(options['path'], encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Não foi possível abrir o arquivo: {e}')
+
+        output = open(options['results'], 'w', encoding='utf-8') if options['results'] else None
+        totals = {'created': 0, 'duplicate': 0, 'error': 0}
+        try:
+            batch = []
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    batch.append((line_number, json.loads(line)))
+                except ValueError:
+                    self._write(output, totals, {
+                        'line': line_number, 'status': 'error', 'order_id': None, 'errors': ['JSON inválido'],
+                    })
+                    continue
+                if len(batch) >= options['batch_size']:
+                    self._process(batch, output, totals)
+                    batch = []
+            if batch:
+                self._process(batch, output, totals)
+        finally:
+            source.close()
+            if output:
+                output.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['created']} pedido(s) criado(s), {totals['duplicate']} duplicado(s), "
+            f"{totals['error']} com erro"
+        ))
+
+    def _process(self, batch, output, totals):
+        try:
+            results = create_orders_bulk([payload for _, payload in batch])
+        except InsufficientStockError as e:
+            # O lote inteiro é desfeito; os lotes anteriores já foram gravados
+            shortages = '; '.join(
+                f"{shortage['description'] or '#' + str(shortage['product_id'])}: "
+                f"pedido {shortage['requested']}, disponível {shortage['available']}"
+                for shortage in e.shortages
+            )
+            raise CommandError(
+                f'Estoque insuficiente no lote das linhas {batch[0][0]} a {batch[-1][0]} '
+                f'(nenhum pedido do lote foi gravado): {shortages}'
+            )
+        for (line_number, _), result in zip(batch, results):
+            result = dict(result)
+            del result['index']
+            self._write(output, totals, {'line': line_number, **result})
+
+    def _write(self, output, totals, result):
+        totals[result['status']] += 1
+        if output:
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+        elif result['status'] == 'error':
+            self.stderr.write(f"Linha {result['line']}: {'; '.join(result['errors'])}")
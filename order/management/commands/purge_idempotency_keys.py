@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from order.services import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Remove as chaves de idempotência de pedidos expiradas (ORDER_IDEMPOTENCY_TTL)'
+
+    def handle(self, *args, **options):
+        deleted = purge_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chave(s) removida(s)'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0002_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderIdempotencyKey',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, db_column='order_id', null=True, on_delete=django.db.models.deletion.CASCADE, to='order.order')),
+            ],
+            options={
+                'verbose_name': 'OrderIdempotencyKey',
+                'verbose_name_plural': 'OrderIdempotencyKeys',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:19
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_customer_state(apps, schema_editor):
+    # Pedidos antigos recebem o estado atual do cliente, o mesmo que os
+    # totais diários usavam até aqui
+    Order = apps.get_model('order', 'Order')
+    Customer = apps.get_model('customers', 'Customer')
+    state = Customer.objects.filter(pk=OuterRef('customer_id')).values('state')[:1]
+    Order.objects.update(customer_state=Coalesce(Subquery(state), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0003_order_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='customer_state',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.RunPython(fill_customer_state, migrations.RunPython.noop),
+    ]
@@ -14,15 +14,28 @@ class Order(models.Model):
     )
     order_date = models.DateTimeField(default=timezone.now)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Estado do cliente na data da venda; os totais diários por estado usam
+    # este valor, que não muda se o cliente trocar de endereço ou for fundido
+    customer_state = models.CharField(max_length=2, blank=True, default='')
 
     class Meta:
         verbose_name = "Order"
         verbose_name_plural = "Orders"
         ordering = ['order_date']
+        indexes = [
+            models.Index(fields=['order_date', 'id'], name='order_date_id_idx'),
+            models.Index(fields=['customer', 'order_date', 'id'], name='order_customer_date_idx'),
+            models.Index(fields=['total_amount'], name='order_total_amount_idx'),
+        ]
 
 
     def __str__(self):
         return f"Order #{self.id} - Customer: {self.customer}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.customer_state:
+            self.customer_state = self.customer.state or ''
+        super().save(*args, **kwargs)
     
 class OrderItem(models.Model):
         id = models.AutoField(primary_key=True)
@@ -46,4 +59,29 @@ class OrderItem(models.Model):
             ordering = ['id']
 
         def __str__(self):
-            return f"{self.quantity}x {self.product.description} (Order #{self.order.id})"
\ No newline at end of file
+            # Usa apenas o que já está carregado para não disparar consultas
+            if OrderItem.product.is_cached(self):
+                product = self.product.description
+            else:
+                product = f"Product #{self.product_id}"
+            return f"{self.quantity}x {product} (Order #{self.order_id})"
+
+
+class OrderIdempotencyKey(models.Model):
+    """Chave enviada pelo cliente para que reenvios não dupliquem o pedido."""
+    key = models.CharField(max_length=64, primary_key=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        db_column='order_id',
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "OrderIdempotencyKey"
+        verbose_name_plural = "OrderIdempotencyKeys"
+
+    def __str__(self):
+        return f"{self.key} (Order #{self.order_id})"
@@ -0,0 +1,335 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from customers.models import Customer
+from customers.services import invalidate_customer_summaries
+from product.models import Product, StockMovement
+from product.services import (
+    aggregate_lines, allocate_stock, decrement_stock, discard_checkpoints_since, price_lines,
+    record_movements, reserve_stock,
+)
+from reports.services import add_orders
+from search.models import SearchDocument
+from search.services import index_objects
+from .models import Order, OrderIdempotencyKey, OrderItem
+
+
+def items_prefetch():
+    return Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+
+
+def orders_with_items(queryset=None):
+    """
+    Pedidos com cliente, itens e produtos carregados em duas consultas.
+
+    Usado pela tela de detalhe, pelos e-mails e pelas exportações para que
+    percorrer order.items.all e item.product não gere consultas por item.
+    """
+    if queryset is None:
+        queryset = Order.objects.all()
+    return queryset.select_related('customer').prefetch_related(items_prefetch())
+
+
+def prefetch_order_items(orders):
+    """Carrega itens e produtos de pedidos já em memória com uma única consulta."""
+    prefetch_related_objects(orders, items_prefetch())
+    return orders
+
+
+def create_order(customer, lines):
+    """
+    Cria um pedido com todos os seus itens em número constante de consultas.
+
+    O estoque é reservado e os produtos precificados a partir de uma única
+    busca; o cabeçalho já é gravado com o total final e os itens são
+    inseridos com bulk_create.
+
+    Args:
+        customer: Instância de Customer
+        lines: Lista de tuplas (product_id, quantity)
+
+    Raises:
+        InsufficientStockError: Se algum produto não tiver estoque suficiente
+    """
+    with transaction.atomic():
+        products = reserve_stock(lines)
+        priced, total = price_lines(lines, products)
+
+        order = Order.objects.create(customer=customer, total_amount=total, customer_state=customer.state or '')
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, subtotal=subtotal)
+            for product, quantity, subtotal in priced
+        ])
+        record_movements(
+            {product_id: -quantity for product_id, quantity in aggregate_lines(lines).items()},
+            StockMovement.KIND_SALE,
+            f'order:{order.id}',
+        )
+        add_orders([order])
+    return order
+
+
+def idempotency_cutoff():
+    """Instante antes do qual as chaves de idempotência estão expiradas."""
+    ttl = getattr(settings, 'ORDER_IDEMPOTENCY_TTL', 24 * 60 * 60)
+    return timezone.now() - timedelta(seconds=ttl)
+
+
+def find_idempotent_order(key):
+    """Pedido já criado com a chave informada, se ela ainda não expirou."""
+    claim = (
+        OrderIdempotencyKey.objects.select_related('order__customer')
+        .filter(key=key, created_at__gte=idempotency_cutoff(), order__isnull=False)
+        .first()
+    )
+    return claim.order if claim is not None else None
+
+
+def create_order_once(customer, lines, idempotency_key):
+    """
+    Cria o pedido apenas uma vez por chave de idempotência.
+
+    A chave é gravada na mesma transação do pedido, antes da reserva de
+    estoque: um reenvio concorrente esbarra na chave primária e recebe o
+    pedido original, e uma falha (ex.: falta de estoque) libera a chave.
+
+    Returns:
+        Tupla (order, created)
+
+    Raises:
+        InsufficientStockError: Se algum produto não tiver estoque suficiente
+    """
+    existing = find_idempotent_order(idempotency_key)
+    if existing is not None:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            OrderIdempotencyKey.objects.filter(
+                key=idempotency_key, created_at__lt=idempotency_cutoff()
+            ).delete()
+            OrderIdempotencyKey.objects.create(key=idempotency_key)
+            order = create_order(customer, lines)
+            OrderIdempotencyKey.objects.filter(key=idempotency_key).update(order=order)
+    except IntegrityError:
+        existing = find_idempotent_order(idempotency_key)
+        if existing is None:
+            raise
+        return existing, False
+    return order, True
+
+
+def purge_idempotency_keys():
+    """Remove as chaves expiradas. Retorna a quantidade removida."""
+    deleted, _ = OrderIdempotencyKey.objects.filter(created_at__lt=idempotency_cutoff()).delete()
+    return deleted
+
+
+def parse_order_payload(payload):
+    """
+    Valida a estrutura de um pedido recebido pela API de ingestão.
+
+    Formato: {"customer": id, "items": [{"product": id, "quantity": n}],
+    "idempotency_key": "...", "order_date": "AAAA-MM-DDTHH:MM:SS"} (os dois
+    últimos opcionais).
+
+    Returns:
+        Tupla (dados normalizados, lista de erros)
+    """
+    if not isinstance(payload, dict):
+        return None, ['Pedido deve ser um objeto JSON']
+
+    errors = []
+    try:
+        customer_id = int(payload.get('customer'))
+    except (TypeError, ValueError):
+        customer_id = None
+        errors.append('Cliente inválido')
+
+    items = payload.get('items')
+    lines = []
+    if not isinstance(items, list) or not items:
+        errors.append('Pedido sem itens')
+    else:
+        try:
+            lines = [(int(item['product']), int(item['quantity'])) for item in items]
+        except (KeyError, TypeError, ValueError):
+            errors.append('Itens inválidos')
+        if any(quantity <= 0 for _, quantity in lines):
+            errors.append('Quantidade inválida')
+
+    order_date = None
+    if payload.get('order_date'):
+        try:
+            order_date = parse_datetime(str(payload['order_date']))
+        except ValueError:
+            order_date = None
+        if order_date is None:
+            errors.append('Data do pedido inválida')
+        elif timezone.is_naive(order_date):
+            order_date = timezone.make_aware(order_date)
+
+    key = str(payload.get('idempotency_key') or '').strip()[:64] or None
+
+    return {
+        'customer_id': customer_id,
+        'lines': lines,
+        'order_date': order_date,
+        'idempotency_key': key,
+    }, errors
+
+
+def create_orders_bulk(payloads):
+    """
+    Cria milhares de pedidos de uma vez, com número constante de consultas.
+
+    Clientes e produtos são carregados com uma consulta cada; cada pedido é
+    validado contra o estoque que sobra dos anteriores e os aceitos são
+    gravados com bulk_create, com uma única baixa de estoque condicional.
+    Pedidos com idempotency_key já processada são devolvidos como duplicados.
+
+    Args:
+        payloads: Lista de dicionários no formato de parse_order_payload
+
+    Returns:
+        Lista de resultados, na ordem recebida, com index, status
+        ('created', 'duplicate' ou 'error'), order_id e errors
+    """
+    try:
+        return _create_orders_bulk(payloads)
+    except IntegrityError:
+        # Outra requisição gravou uma das chaves ao mesmo tempo; na nova
+        # tentativa esses pedidos são reconhecidos como duplicados
+        return _create_orders_bulk(payloads)
+
+
+def _create_orders_bulk(payloads):
+    results = []
+    pending = []
+    for index, payload in enumerate(payloads):
+        data, errors = parse_order_payload(payload)
+        result = {'index': index, 'status': 'error', 'order_id': None, 'errors': errors}
+        results.append(result)
+        if not errors:
+            pending.append((result, data))
+
+    keys = {data['idempotency_key'] for _, data in pending if data['idempotency_key']}
+    known_keys = dict(
+        OrderIdempotencyKey.objects.filter(
+            key__in=keys, created_at__gte=idempotency_cutoff(), order__isnull=False
+        ).values_list('key', 'order_id')
+    ) if keys else {}
+
+    customers = Customer.objects.in_bulk({data['customer_id'] for _, data in pending})
+
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(
+            {product_id for _, data in pending for product_id, _ in data['lines']}
+        )
+
+        accepted = []
+        seen_keys = {}
+        total_demand = {}
+        for result, data in pending:
+            key = data['idempotency_key']
+            if key in known_keys:
+                result.update(status='duplicate', order_id=known_keys[key])
+                continue
+            if key in seen_keys:
+                seen_keys[key].append(result)
+                continue
+
+            customer = customers.get(data['customer_id'])
+            if customer is None:
+                result['errors'].append(f"Cliente #{data['customer_id']} não encontrado")
+                continue
+
+            missing = [product_id for product_id, _ in data['lines'] if product_id not in products]
+            if missing:
+                result['errors'].extend(f'Produto #{product_id} não encontrado' for product_id in missing)
+                continue
+
+            demand = aggregate_lines(data['lines'])
+            shortages = allocate_stock(demand, products)
+            if shortages:
+                result['errors'].extend(
+                    f"Estoque insuficiente para o produto #{s['product_id']}. "
+                    f"Necessário: {s['requested']}, Disponível: {s['available']}"
+                    for s in shortages
+                )
+                continue
+
+            for product_id, quantity in demand.items():
+                total_demand[product_id] = total_demand.get(product_id, 0) + quantity
+            priced, total = price_lines(data['lines'], products)
+            accepted.append((result, data, customer, priced, total, demand))
+            if key:
+                seen_keys[key] = []
+
+        if not accepted:
+            return results
+
+        decrement_stock(total_demand)
+
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    total_amount=total,
+                    customer_state=customer.state or '',
+                    **({'order_date': data['order_date']} if data['order_date'] else {}),
+                )
+                for _, data, customer, _, total, _ in accepted
+            ],
+            batch_size=500,
+        )
+        index_objects(SearchDocument.KIND_ORDER, orders)
+        invalidate_customer_summaries(order.customer_id for order in orders)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product=product, quantity=quantity, subtotal=subtotal)
+                for (_, _, _, priced, _, _), order in zip(accepted, orders)
+                for product, quantity, subtotal in priced
+            ],
+            batch_size=1000,
+        )
+        add_orders(orders)
+        # Vendas reenviadas com a data original entram no razão nessa data
+        StockMovement.objects.bulk_create(
+            [
+                StockMovement(
+                    product_id=product_id,
+                    kind=StockMovement.KIND_SALE,
+                    quantity=-quantity,
+                    reference=f'order:{order.id}',
+                    effective_at=order.order_date,
+                )
+                for (_, _, _, _, _, demand), order in zip(accepted, orders)
+                for product_id, quantity in demand.items()
+            ],
+            batch_size=1000,
+        )
+        backdated = [data['order_date'] for _, data, _, _, _, _ in accepted if data['order_date']]
+        if backdated:
+            discard_checkpoints_since(min(backdated))
+
+        claims = []
+        for (result, data, _, _, _, _), order in zip(accepted, orders):
+            result.update(status='created', order_id=order.id)
+            key = data['idempotency_key']
+            if key:
+                claims.append(OrderIdempotencyKey(key=key, order=order))
+                for duplicate in seen_keys[key]:
+                    duplicate.update(status='duplicate', order_id=order.id)
+        if claims:
+            OrderIdempotencyKey.objects.filter(
+                key__in=[claim.key for claim in claims], created_at__lt=idempotency_cutoff()
+            ).delete()
+            OrderIdempotencyKey.objects.bulk_create(claims, batch_size=1000)
+
+    return results
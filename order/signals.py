@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from customers.services import invalidate_customer_summaries
+
+from .models import Order
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_customer_summary(sender, instance, raw=False, **kwargs):
+    """Descarta o resumo do cliente quando um pedido dele muda."""
+    if not raw:
+        invalidate_customer_summaries([instance.customer_id])
@@ -1,10 +1,29 @@
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from datetime import datetime, timedelta
+from io import StringIO
+import os
+import tempfile
 from decimal import Decimal
-from .models import Order, OrderItem
+import json
+from unittest.mock import patch
+from .models import Order, OrderIdempotencyKey, OrderItem
+from .services import (
+    create_order, create_order_once, create_orders_bulk, orders_with_items, purge_idempotency_keys,
+)
+from config.pagination import keyset_page
 from customers.models import Customer
-from product.models import Product
+from notifications.models import EmailOutbox
+from product.models import Product, StockCheckpoint, StockMovement
+from product.services import (
+    InsufficientStockError, compact_stock_balances, create_stock_checkpoint, current_stock, stock_at, stock_drift,
+)
 from suppliers.models import Supplier
 
 Employee = get_user_model()
@@ -220,3 +239,529 @@ class OrderViewTest(TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Cliente Teste', response.content)
+
+    def test_order_create_reserves_stock(self):
+        """Testa que a criação de pedido baixa o estoque"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post('/order/create/', {
+            'cliente': self.customer.id,
+            'products': json.dumps([{'id': self.product.id, 'quantity': 3}]),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 47)
+        order = Order.objects.latest('id')
+        self.assertEqual(order.total_amount, Decimal('300.00'))
+        self.assertEqual(order.items.count(), 1)
+
+    def test_order_create_insufficient_stock(self):
+        """Testa que pedido sem estoque não é criado"""
+        self.client.login(username='testuser', password='testpass123')
+        orders_before = Order.objects.count()
+        response = self.client.post('/order/create/', {
+            'cliente': self.customer.id,
+            'products': json.dumps([{'id': self.product.id, 'quantity': 51}]),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), orders_before)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 50)
+
+    def test_order_create_without_customer(self):
+        """Testa que o formulário sem cliente selecionado volta com erro"""
+        self.client.login(username='testuser', password='testpass123')
+        orders_before = Order.objects.count()
+        for value in ('', 'abc', '999999'):
+            response = self.client.post('/order/create/', {
+                'cliente': value,
+                'products': json.dumps([{'id': self.product.id, 'quantity': 1}]),
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Selecione um cliente.')
+        self.assertEqual(Order.objects.count(), orders_before)
+
+    def test_order_create_enqueues_email(self):
+        """Testa que a criação de pedido apenas enfileira o e-mail"""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post('/order/create/', {
+            'cliente': self.customer.id,
+            'products': json.dumps([{'id': self.product.id, 'quantity': 1}]),
+        })
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.get().to, 'cliente@test.com')
+
+
+class OrderServiceTest(TestCase):
+    """Testes para os serviços de pedido"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.customer = Customer.objects.create(
+            name='Cliente Teste',
+            email='cliente@test.com'
+        )
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.products = [
+            Product.objects.create(
+                description=f'Produto {i}',
+                price=Decimal('10.00') * i,
+                qty_stock=100,
+                supplier=self.supplier
+            )
+            for i in range(1, 6)
+        ]
+
+    def test_create_order_totals(self):
+        """Testa total e itens do pedido criado"""
+        order = create_order(self.customer, [
+            (self.products[0].id, 2),
+            (self.products[1].id, 1),
+        ])
+
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal('40.00'))
+        self.assertEqual(
+            list(order.items.values_list('quantity', 'subtotal')),
+            [(2, Decimal('20.00')), (1, Decimal('20.00'))]
+        )
+
+    def test_create_order_constant_queries(self):
+        """Testa que o número de consultas não cresce com o número de itens"""
+        with CaptureQueriesContext(connection) as one_line:
+            create_order(self.customer, [(self.products[0].id, 1)])
+        with CaptureQueriesContext(connection) as many_lines:
+            create_order(self.customer, [(p.id, 1) for p in self.products])
+
+        self.assertEqual(len(one_line), len(many_lines))
+
+
+class OrderListPaginationTest(TestCase):
+    """Testes para a listagem paginada de pedidos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer1 = Customer.objects.create(name='Ana', email='ana@test.com')
+        self.customer2 = Customer.objects.create(name='Bruno', email='bruno@test.com')
+        base = timezone.make_aware(datetime(2024, 1, 10, 12, 0))
+        self.orders = [
+            Order.objects.create(
+                customer=self.customer1 if i % 2 == 0 else self.customer2,
+                order_date=base + timedelta(days=i // 2),
+                total_amount=Decimal('10.00') * (i + 1),
+            )
+            for i in range(5)
+        ]
+
+    def test_keyset_page_walks_all_orders(self):
+        """Testa que os cursores percorrem todos os pedidos sem repetir"""
+        seen = []
+        cursor = ''
+        while True:
+            rows, cursor = keyset_page(Order.objects.all(), cursor, 'order_date', page_size=2)
+            seen.extend(order.id for order in rows)
+            if not cursor:
+                break
+
+        expected = [o.id for o in sorted(self.orders, key=lambda o: (o.order_date, o.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_order_list_filters(self):
+        """Testa filtros por data, cliente e valor"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/order/', {
+            'date_from': '2024-01-11',
+            'date_to': '2024-01-11',
+            'customer': 'Ana',
+        })
+        self.assertEqual([o.id for o in response.context['orders']], [self.orders[2].id])
+
+        response = self.client.get('/order/', {'min_total': '30', 'max_total': '40'})
+        self.assertEqual(
+            sorted(o.id for o in response.context['orders']),
+            [self.orders[2].id, self.orders[3].id]
+        )
+
+    def test_order_list_without_n_plus_one(self):
+        """Testa que o nome do cliente é carregado na mesma consulta"""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get('/order/')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/order/', {'max_total': '10'})
+        with CaptureQueriesContext(connection) as many:
+            self.client.get('/order/')
+
+        self.assertEqual(len(few), len(many))
+
+
+class OrderDetailLoadingTest(TestCase):
+    """Testes para o carregamento de pedidos com itens"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.products = [
+            Product.objects.create(
+                description=f'Produto {i}', price=Decimal('5.00'), qty_stock=10, supplier=self.supplier
+            )
+            for i in range(4)
+        ]
+        self.small = create_order(self.customer, [(self.products[0].id, 1)])
+        self.large = create_order(self.customer, [(p.id, 1) for p in self.products])
+
+    def test_orders_with_items_two_queries(self):
+        """Testa que pedido, itens e produtos vêm em duas consultas"""
+        with self.assertNumQueries(2):
+            order = orders_with_items().get(id=self.large.id)
+            descriptions = [item.product.description for item in order.items.all()]
+
+        self.assertEqual(len(descriptions), 4)
+
+    def test_order_detail_constant_queries(self):
+        """Testa que a tela de detalhe não faz consultas por item"""
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(f'/order/detail/{self.small.id}/')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(f'/order/detail/{self.large.id}/')
+
+        self.assertContains(response, 'Produto 3')
+        self.assertEqual(len(small), len(large))
+
+    def test_order_item_str_without_queries(self):
+        """Testa que __str__ do item não dispara carregamento preguiçoso"""
+        item = OrderItem.objects.filter(order=self.small).first()
+
+        with self.assertNumQueries(0):
+            text = str(item)
+
+        self.assertEqual(text, f'1x Product #{self.products[0].id} (Order #{self.small.id})')
+        item = orders_with_items().get(id=self.small.id).items.all()[0]
+        self.assertEqual(str(item), f'1x Produto 0 (Order #{self.small.id})')
+
+
+class OrderIdempotencyTest(TestCase):
+    """Testes para a criação idempotente de pedidos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto Teste', price=Decimal('10.00'), qty_stock=10, supplier=self.supplier
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def post(self, key, quantity=2, **extra):
+        return self.client.post('/order/create/', {
+            'cliente': self.customer.id,
+            'products': json.dumps([{'id': self.product.id, 'quantity': quantity}]),
+            'idempotency_key': key,
+        }, **extra)
+
+    def test_double_submit_creates_one_order(self):
+        """Testa que reenviar o formulário não duplica pedido nem baixa de estoque"""
+        self.post('abc123')
+        response = self.post('abc123')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 8)
+
+    def test_header_key(self):
+        """Testa chave enviada no cabeçalho Idempotency-Key"""
+        self.post('', HTTP_IDEMPOTENCY_KEY='header-key')
+        self.post('', HTTP_IDEMPOTENCY_KEY='header-key')
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertTrue(OrderIdempotencyKey.objects.filter(key='header-key').exists())
+
+    def test_failed_attempt_releases_key(self):
+        """Testa que uma tentativa sem estoque não consome a chave"""
+        self.post('retry', quantity=11)
+        self.assertFalse(OrderIdempotencyKey.objects.exists())
+
+        self.post('retry', quantity=1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_is_reused(self):
+        """Testa que chaves expiradas não bloqueiam novos pedidos e são removidas"""
+        order, created = create_order_once(self.customer, [(self.product.id, 1)], 'old')
+        OrderIdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        again, created_again = create_order_once(self.customer, [(self.product.id, 1)], 'old')
+
+        self.assertTrue(created_again)
+        self.assertNotEqual(order.id, again.id)
+        OrderIdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_idempotency_keys(), 1)
+
+
+class OrderBulkIngestionTest(TestCase):
+    """Testes para a ingestão de pedidos em lote"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto Teste', price=Decimal('10.00'), qty_stock=5, supplier=self.supplier
+        )
+
+    def order(self, quantity, **extra):
+        return {
+            'customer': self.customer.id,
+            'items': [{'product': self.product.id, 'quantity': quantity}],
+            **extra,
+        }
+
+    def test_bulk_results_per_order(self):
+        """Testa resultado individual de cada pedido do lote"""
+        results = create_orders_bulk([
+            self.order(2, idempotency_key='a', order_date='2024-03-01T10:00:00'),
+            self.order(2, idempotency_key='a'),
+            self.order(4),
+            {'customer': 9999, 'items': [{'product': self.product.id, 'quantity': 1}]},
+            {'customer': self.customer.id, 'items': []},
+            self.order(3),
+        ])
+
+        self.assertEqual(
+            [r['status'] for r in results],
+            ['created', 'duplicate', 'error', 'error', 'error', 'created']
+        )
+        self.assertEqual(results[1]['order_id'], results[0]['order_id'])
+        first = Order.objects.get(id=results[0]['order_id'])
+        self.assertEqual(first.total_amount, Decimal('20.00'))
+        self.assertEqual(first.order_date.date().isoformat(), '2024-03-01')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 0)
+
+    def test_bulk_known_key_is_duplicate(self):
+        """Testa que chaves já processadas não geram novo pedido"""
+        create_orders_bulk([self.order(1, idempotency_key='k1')])
+        results = create_orders_bulk([self.order(1, idempotency_key='k1')])
+
+        self.assertEqual(results[0]['status'], 'duplicate')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_bulk_constant_queries(self):
+        """Testa que o número de consultas não cresce com o número de pedidos"""
+        with CaptureQueriesContext(connection) as one:
+            create_orders_bulk([self.order(1)])
+        with CaptureQueriesContext(connection) as many:
+            create_orders_bulk([self.order(1) for _ in range(3)])
+
+        self.assertEqual(len(one), len(many))
+
+    def test_bulk_endpoint(self):
+        """Testa o endpoint JSON de ingestão"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            '/order/api/bulk/',
+            data=json.dumps({'orders': [self.order(1), self.order(1)]}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+
+    @override_settings(ORDER_BULK_API_TOKENS=['pdv-secreto'])
+    def test_bulk_endpoint_token_auth(self):
+        """Testa o acesso de terminais por token, sem sessão nem CSRF"""
+        client = Client(enforce_csrf_checks=True)
+        body = json.dumps({'orders': [self.order(1)]})
+
+        response = client.post('/order/api/bulk/', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        response = client.post(
+            '/order/api/bulk/', data=body, content_type='application/json', HTTP_AUTHORIZATION='Bearer errado'
+        )
+        self.assertEqual(response.status_code, 401)
+
+        response = client.post(
+            '/order/api/bulk/', data=body, content_type='application/json', HTTP_AUTHORIZATION='Bearer pdv-secreto'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+
+        # Com sessão e sem token o CSRF continua valendo
+        client.login(username='testuser', password='testpass123')
+        response = client.post('/order/api/bulk/', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_backdated_orders_keep_ledger_date(self):
+        """Testa que vendas reenviadas entram no razão na data original e invalidam checkpoints posteriores"""
+        sold_at = timezone.now() - timedelta(days=10)
+        StockMovement.objects.filter(product=self.product).update(effective_at=sold_at - timedelta(days=30))
+        create_stock_checkpoint(sold_at - timedelta(days=1))
+        later = create_stock_checkpoint(sold_at + timedelta(days=1))
+
+        results = create_orders_bulk([self.order(2, order_date=sold_at.isoformat())])
+        self.assertEqual(results[0]['status'], 'created')
+
+        movement = StockMovement.objects.get(reference=f"order:{results[0]['order_id']}")
+        self.assertEqual(movement.effective_at, sold_at)
+        self.assertGreater(movement.created_at, sold_at)
+        self.assertFalse(StockCheckpoint.objects.filter(id=later.id).exists())
+        self.assertEqual(StockCheckpoint.objects.count(), 1)
+        self.assertEqual(stock_at(sold_at - timedelta(hours=1))[self.product.id], 5)
+        self.assertEqual(stock_at(sold_at + timedelta(hours=1))[self.product.id], 3)
+
+    def test_backdated_orders_and_compaction(self):
+        """Testa que a venda retroativa só entra na compactação depois do prazo, como qualquer lançamento novo"""
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(compact_stock_balances(), 1)
+
+        sold_at = timezone.now() - timedelta(days=10)
+        results = create_orders_bulk([self.order(2, order_date=sold_at.isoformat())])
+        self.assertEqual(results[0]['status'], 'created')
+
+        # Gravado agora: a marca d'água não passa por cima de transações ainda abertas
+        self.assertEqual(compact_stock_balances(), 0)
+        self.assertEqual(stock_drift(), [])
+
+        StockMovement.objects.filter(kind=StockMovement.KIND_SALE).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(compact_stock_balances(), 1)
+        self.assertEqual(stock_drift(), [])
+        self.assertEqual(current_stock([self.product.id]), {self.product.id: 3})
+
+    def test_import_orders_command(self):
+        """Testa importação de arquivo NDJSON"""
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'orders.ndjson')
+            results = os.path.join(directory, 'results.ndjson')
+            with open(source, 'w') as f:
+                f.write(json.dumps(self.order(1)) + '\n')
+                f.write('{invalido\n')
+                f.write(json.dumps(self.order(1)) + '\n')
+
+            call_command('import_orders', source, batch_size=1, results=results, stdout=StringIO())
+
+            with open(results) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual([(r['line'], r['status']) for r in lines], [(1, 'created'), (2, 'error'), (3, 'created')])
+
+    def test_import_orders_command_shortage(self):
+        """Testa que estoque consumido por outra transação encerra o comando com mensagem, sem traceback"""
+        shortage = {'product_id': self.product.id, 'description': 'Produto', 'requested': 2, 'available': 1}
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'orders.ndjson')
+            with open(source, 'w') as f:
+                f.write(json.dumps(self.order(2)) + '\n')
+
+            with patch('order.management.commands.import_orders.create_orders_bulk',
+                       side_effect=InsufficientStockError([shortage])):
+                with self.assertRaisesMessage(
+                    CommandError, 'Estoque insuficiente no lote das linhas 1 a 1 (nenhum pedido do lote foi gravado): '
+                    'Produto: pedido 2, disponível 1'
+                ):
+                    call_command('import_orders', source, stdout=StringIO())
+
+
+class OrderExportTest(TestCase):
+    """Testes para a exportação de pedidos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+        supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto Teste', price=Decimal('10.00'), qty_stock=50, supplier=supplier
+        )
+        now = timezone.now()
+        self.old = Order.objects.create(customer=self.customer, total_amount=Decimal('10.00'))
+        Order.objects.filter(id=self.old.id).update(order_date=now - timedelta(days=30))
+        self.recent = Order.objects.create(customer=self.customer, total_amount=Decimal('20.00'))
+        OrderItem.objects.create(order=self.recent, product=self.product, quantity=2, subtotal=Decimal('20.00'))
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_orders(self):
+        """Testa o CSV com cabeçalho e uma linha por pedido"""
+        response = self.client.get(reverse('order_export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lines = self.read(response).splitlines()
+        self.assertEqual(lines[0], 'id,order_date,customer_id,customer,total_amount')
+        self.assertEqual(len(lines), 3)
+
+    def test_date_filter_and_items_ndjson(self):
+        """Testa o filtro por período e a exportação de itens em NDJSON"""
+        date_from = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('order_export'), {
+            'kind': 'items', 'format': 'ndjson', 'date_from': date_from,
+        })
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['order_id'], self.recent.id)
+        self.assertEqual(rows[0]['product'], 'Produto Teste')
+        self.assertEqual(rows[0]['subtotal'], '20.00')
+
+        response = self.client.get(reverse('order_export'), {'date_from': date_from})
+        self.assertEqual(len(self.read(response).splitlines()), 2)
+
+    def test_invalid_format(self):
+        """Testa que formatos desconhecidos são rejeitados"""
+        response = self.client.get(reverse('order_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
@@ -6,4 +6,6 @@ urlpatterns = [
     path('create/', views.view_create),
     path('detail/<int:id>/', views.view_detail, name='order_detail'),
     path('delete/<int:id>/', views.view_delete, name='delete'),
+    path('api/bulk/', views.view_bulk_create, name='order_bulk_create'),
+    path('export/', views.view_export, name='order_export'),
 ]
\ No newline at end of file
@@ -1,42 +1,34 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from . import models
+from .services import (
+    create_order, create_order_once, create_orders_bulk, orders_with_items, prefetch_order_items,
+)
 from decimal import Decimal
 from django.shortcuts import get_object_or_404
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.conf import settings
-from django.contrib import messages
-import logging
-
-from django.shortcuts import render, redirect
-from django.http import HttpResponse
-from . import models
-from decimal import Decimal
-from django.shortcuts import get_object_or_404
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.conf import settings
 from django.contrib import messages
 import logging
 
-from product.models import Product
-from customers.models import Customer
-import json
-from django.contrib.auth.decorators import login_required
-
-logger = logging.getLogger(__name__)
-
-from product.models import Product
+from product.services import InsufficientStockError, parse_lines
 from customers.models import Customer
+from customers.services import remember_customer
+from config.pagination import date_range_filter, keyset_page, page_query, parse_decimal
+from config.exports import export_response
+from config.api_auth import has_api_token
 import json
+import uuid
 from django.contrib.auth.decorators import login_required
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.conf import settings
+from notifications.services import enqueue_email
 
 logger = logging.getLogger(__name__)
 
 def send_order_email(order, request):
     """
-    Envia e-mail ao cliente com os dados do pedido criado.
+    Agenda o envio de e-mail ao cliente com os dados do pedido criado.
     
     Args:
         order: Instância do modelo Order
@@ -44,27 +36,18 @@ def send_order_email(order, request):
     """
     try:
         if order.customer.email:
-            context = {'order': order}
-            html_content = render_to_string('emails/order_email.html', context)
-            text_content = render_to_string('emails/order_email.txt', context)
-            
-            subject = f'Pedido #{order.id} - GestãoApp'
-            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@gestaoapp.com')
-            to_email = [order.customer.email]
-            
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=from_email,
-                to=to_email
+            prefetch_order_items([order])
+            enqueue_email(
+                subject=f'Pedido #{order.id} - GestãoApp',
+                to=[order.customer.email],
+                template_name='emails/order_email',
+                context={'order': order},
             )
-            email.attach_alternative(html_content, "text/html")
-            email.send()
             
-            logger.info(f'E-mail de pedido enviado com sucesso')
+            logger.info(f'E-mail de pedido #{order.id} adicionado à fila de envio')
             messages.success(
                 request,
-                f'Pedido criado e e-mail enviado'
+                f'Pedido criado e e-mail adicionado à fila de envio'
             )
         else:
             messages.warning(
@@ -78,30 +61,59 @@ def send_order_email(order, request):
         )
         messages.error(
             request,
-            f'Pedido #{order.id} criado, mas houve um erro ao enviar o e-mail: {str(e)}'
+            f'Pedido #{order.id} criado, mas houve um erro ao agendar o e-mail: {str(e)}'
         )
 
 @login_required
 def view_index(request):
     search = request.GET.get("search", "").strip()
-    orders = models.Order.objects.all()
+    filters = {
+        'date_from': request.GET.get('date_from', '').strip(),
+        'date_to': request.GET.get('date_to', '').strip(),
+        'customer': request.GET.get('customer', '').strip(),
+        'min_total': request.GET.get('min_total', '').strip(),
+        'max_total': request.GET.get('max_total', '').strip(),
+    }
+    orders = models.Order.objects.select_related('customer')
 
     if search:
-        orders = orders.filter(id =search)
+        orders = orders.filter(id=search) if search.isdigit() else orders.none()
+
+    orders = orders.filter(**date_range_filter('order_date', filters['date_from'], filters['date_to']))
+    if filters['customer']:
+        if filters['customer'].isdigit():
+            orders = orders.filter(customer_id=filters['customer'])
+        else:
+            orders = orders.filter(customer__name__istartswith=filters['customer'])
+    min_total = parse_decimal(filters['min_total'])
+    if min_total is not None:
+        orders = orders.filter(total_amount__gte=min_total)
+    max_total = parse_decimal(filters['max_total'])
+    if max_total is not None:
+        orders = orders.filter(total_amount__lte=max_total)
+
+    cursor = request.GET.get('cursor', '')
+    orders, next_cursor = keyset_page(orders, cursor, 'order_date')
 
     return render(request, 'order.html', {
         'orders': orders,
         'search': search,
+        'filters': filters,
+        'next_query': page_query(request, next_cursor) if next_cursor else None,
+        'first_query': page_query(request, None) if cursor else None,
     })
 
 @login_required
 def view_create(request):
-    customers = Customer.objects.all()
-    products = Product.objects.all()
-
     if request.method == 'POST':
-        customer_id = request.POST.get('cliente')
-        customer = Customer.objects.get(id=customer_id)
+        customer_id = request.POST.get('cliente', '')
+        customer = Customer.objects.filter(id=customer_id).first() if customer_id.isdigit() else None
+        if customer is None:
+            messages.error(request, 'Selecione um cliente.')
+            return render(request, 'create_order.html', {
+                'title': 'Novo pedido',
+                'idempotency_key': uuid.uuid4().hex,
+            })
 
         products_json = request.POST.get('products', '[]')
 
@@ -110,50 +122,42 @@ def view_create(request):
         if not products_data:
             messages.error(request, 'Nenhum produto selecionado.')
             return render(request, 'create_order.html', {
-                'products': products,
-                'customers': customers,
-                'title': 'Novo pedido'
+                'title': 'Novo pedido',
+                'idempotency_key': uuid.uuid4().hex,
             })
 
-        for item in products_data:
-            product_id = item.get('id')
-            quantity = int(item.get('quantity', 1))
-            product = Product.objects.get(id=product_id)
-            
-            if product.qty_stock < quantity:
-                messages.error(request, f'Estoque insuficiente para o produto {product.description}. Disponível: {product.qty_stock}')
-                return render(request, 'create_order.html', {
-                    'products': products,
-                    'customers': customers,
-                    'title': 'Novo pedido'
-                })
-
-        order = models.Order.objects.create(customer=customer, total_amount=0)
-        total_amount = Decimal('0.00')
-
-        for item in products_data:
-            product_id = item.get('id')
-            quantity = int(item.get('quantity', 1))
-            product = Product.objects.get(id=product_id)
-
-            # Decrement stock
-            product.qty_stock -= quantity
-            product.save()
-
-            price_unit = product.price
-            price_total = price_unit * quantity
-
-            models.OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                subtotal=price_total,
-            )
+        try:
+            lines = parse_lines(products_data)
+        except (TypeError, ValueError):
+            messages.error(request, 'Produtos inválidos.')
+            return render(request, 'create_order.html', {
+                'title': 'Novo pedido',
+                'idempotency_key': uuid.uuid4().hex,
+            })
+
+        # Chave de idempotência: cabeçalho (clientes de API) ou campo oculto do formulário
+        idempotency_key = (
+            request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key', '')
+        ).strip()[:64]
+
+        try:
+            if idempotency_key:
+                order, created = create_order_once(customer, lines, idempotency_key)
+            else:
+                order, created = create_order(customer, lines), True
+        except InsufficientStockError as e:
+            for shortage in e.shortages:
+                messages.error(request, f'Estoque insuficiente para o produto {shortage["description"] or shortage["product_id"]}. Disponível: {shortage["available"]}')
+            return render(request, 'create_order.html', {
+                'title': 'Novo pedido',
+                'idempotency_key': uuid.uuid4().hex,
+            })
 
-            total_amount += price_total
+        if not created:
+            messages.info(request, f'Pedido #{order.id} já havia sido registrado.')
+            return redirect('/order/')
 
-        order.total_amount = total_amount
-        order.save()
+        remember_customer(request.user, customer)
 
         # Envia e-mail ao cliente
         send_order_email(order, request)
@@ -161,9 +165,8 @@ def view_create(request):
         return redirect('/order/')
 
     return render(request, 'create_order.html', {
-        'products': products,
-        'customers': customers,
-        'title': 'Novo pedido'
+        'title': 'Novo pedido',
+        'idempotency_key': uuid.uuid4().hex,
     })
 
 @login_required
@@ -174,7 +177,72 @@ def view_delete(request, id):
 
 @login_required
 def view_detail(request, id):
-    order = get_object_or_404(models.Order, id=id)
+    order = get_object_or_404(orders_with_items(), id=id)
     return render(request, 'order_detail.html', {
         'order': order
-    })
\ No newline at end of file
+    })
+
+@csrf_exempt
+@require_POST
+def view_bulk_create(request):
+    """
+    Ingestão de pedidos em lote (PDV, marketplaces).
+
+    Recebe {"orders": [...]} no formato de services.parse_order_payload e
+    responde com o resultado de cada pedido, na mesma ordem.
+
+    Terminais e integrações se autenticam com um token de
+    ORDER_BULK_API_TOKENS no cabeçalho Authorization (sem sessão nem CSRF);
+    usuários logados continuam podendo chamar o endpoint, com CSRF.
+    """
+    if not has_api_token(request, settings.ORDER_BULK_API_TOKENS):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticação necessária'}, status=401)
+        rejected = CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+        if rejected is not None:
+            return rejected
+
+    try:
+        payloads = json.loads(request.body).get('orders')
+    except (AttributeError, ValueError):
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    if not isinstance(payloads, list) or not payloads:
+        return JsonResponse({'error': 'Nenhum pedido informado'}, status=400)
+
+    limit = getattr(settings, 'ORDER_BULK_MAX_ORDERS', 5000)
+    if len(payloads) > limit:
+        return JsonResponse({'error': f'Máximo de {limit} pedidos por requisição'}, status=400)
+
+    try:
+        results = create_orders_bulk(payloads)
+    except InsufficientStockError as e:
+        return JsonResponse({'error': 'Estoque insuficiente', 'shortages': e.shortages}, status=409)
+
+    return JsonResponse({
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'results': results,
+    })
+
+@login_required
+def view_export(request):
+    """Exporta pedidos (ou seus itens, com ?kind=items) em CSV ou NDJSON."""
+    if request.GET.get('kind') == 'items':
+        return export_response(request, models.OrderItem.objects.all(), [
+            ('order_id', 'order_id'),
+            ('order_date', 'order__order_date'),
+            ('customer_id', 'order__customer_id'),
+            ('customer', 'order__customer__name'),
+            ('product_id', 'product_id'),
+            ('product', 'product__description'),
+            ('quantity', 'quantity'),
+            ('subtotal', 'subtotal'),
+        ], 'order-items', date_field='order__order_date')
+
+    return export_response(request, models.Order.objects.all(), [
+        ('id', 'id'),
+        ('order_date', 'order_date'),
+        ('customer_id', 'customer_id'),
+        ('customer', 'customer__name'),
+        ('total_amount', 'total_amount'),
+    ], 'orders', date_field='order_date')
@@ -0,0 +1,44 @@
+"""
+Versão do catálogo de produtos.
+
+A versão é um carimbo de tempo (em microssegundos) guardado no cache e
+renovado sempre que um produto, seu estoque ou seu fornecedor muda. As
+respostas da API de produtos usam a versão como ETag/Last-Modified e como
+parte da chave de cache das páginas já serializadas.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = 'product:catalog-version'
+
+
+def _now_version():
+    return time.time_ns() // 1000
+
+
+def catalog_version():
+    """Versão atual do catálogo (inicializada na primeira leitura)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _now_version()
+        if not cache.add(CATALOG_VERSION_KEY, version, timeout=None):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Renova a versão do catálogo após a confirmação da transação corrente."""
+    transaction.on_commit(
+        lambda: cache.set(CATALOG_VERSION_KEY, _now_version(), timeout=None)
+    )
+
+
+def catalog_etag(version):
+    return f'"catalog-{version}"'
+
+
+def catalog_last_modified(version):
+    return datetime.fromtimestamp(version / 1_000_000, tz=dt_timezone.utc)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from product.services import compact_stock_balances, stock_drift
+
+
+class Command(BaseCommand):
+    help = 'Compacta o razão de estoque (StockMovement) nos saldos por produto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Lista produtos cujo qty_stock diverge do saldo do razão'
+        )
+
+    def handle(self, *args, **options):
+        changed = compact_stock_balances()
+        self.stdout.write(self.style.SUCCESS(f'{changed} saldo(s) atualizado(s)'))
+
+        if options['verify']:
+            drift = stock_drift()
+            for product_id, qty_stock, ledger in drift:
+                self.stdout.write(self.style.WARNING(
+                    f'Produto #{product_id}: qty_stock={qty_stock}, razão={ledger}'
+                ))
+            if not drift:
+                self.stdout.write(self.style.SUCCESS('Razão consistente com o estoque'))
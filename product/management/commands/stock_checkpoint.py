@@ -0,0 +1,38 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from product.services import create_stock_checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Grava um checkpoint do estoque de todos os produtos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Fecha o estoque ao final do dia informado (AAAA-MM-DD); padrão: agora'
+        )
+
+    def handle(self, *args, **options):
+        taken_at = None
+        if options['date']:
+            try:
+                day = parse_date(options['date'])
+            except ValueError:  # formato certo, data impossível (ex.: 2026-02-30)
+                day = None
+            if day is None:
+                raise CommandError(f"Data inválida: {options['date']} (use AAAA-MM-DD)")
+            taken_at = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)) - timedelta(microseconds=1)
+
+        try:
+            checkpoint = create_stock_checkpoint(taken_at)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Checkpoint #{checkpoint.id} gravado em {checkpoint.taken_at} '
+            f'com {checkpoint.lines.count()} produto(s)'
+        ))
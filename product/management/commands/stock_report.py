@@ -0,0 +1,34 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from product.models import Product
+from product.services import stock_at
+
+
+class Command(BaseCommand):
+    help = 'Exporta em CSV o estoque de cada produto ao final de uma data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('date', help='Data do fechamento (AAAA-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            day = parse_date(options['date'])
+        except ValueError:  # formato certo, data impossível (ex.: 2026-02-30)
+            day = None
+        if day is None:
+            raise CommandError(f"Data inválida: {options['date']} (use AAAA-MM-DD)")
+        when = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)) - timedelta(microseconds=1)
+
+        try:
+            quantities = stock_at(when)
+        except ValueError as e:
+            raise CommandError(str(e))
+        writer = csv.writer(self.stdout)
+        writer.writerow(['product_id', 'description', 'quantity'])
+        for product_id, description in Product.objects.order_by('id').values_list('id', 'description').iterator(chunk_size=2000):
+            writer.writerow([product_id, description, quantities.get(product_id, 0)])
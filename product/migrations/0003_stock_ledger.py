@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_alter_product_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('product', models.OneToOneField(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_balance', serialize=False, to='product.product')),
+                ('quantity', models.IntegerField(default=0)),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'StockBalance',
+                'verbose_name_plural': 'StockBalances',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('sale', 'Venda'), ('budget_conversion', 'Conversão de orçamento'), ('adjustment', 'Ajuste'), ('receipt', 'Recebimento')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('reference', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='product.product')),
+            ],
+            options={
+                'verbose_name': 'StockMovement',
+                'verbose_name_plural': 'StockMovements',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='movement_product_date_idx')],
+            },
+        ),
+    ]
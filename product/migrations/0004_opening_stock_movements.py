@@ -0,0 +1,39 @@
+# Lança o saldo inicial de cada produto no razão de estoque
+# (datado da execução da migração; stock_at recusa datas anteriores a ela)
+
+from django.db import migrations
+
+
+def criar_saldo_inicial(apps, schema_editor):
+    """Cria um lançamento de ajuste com o qty_stock atual de cada produto."""
+    Product = apps.get_model('product', 'Product')
+    StockMovement = apps.get_model('product', 'StockMovement')
+
+    batch = []
+    for product_id, qty_stock in Product.objects.values_list('id', 'qty_stock').iterator(chunk_size=2000):
+        batch.append(StockMovement(
+            product_id=product_id,
+            kind='adjustment',
+            quantity=qty_stock,
+            reference='saldo inicial',
+        ))
+        if len(batch) >= 2000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+def remover_saldo_inicial(apps, schema_editor):
+    StockMovement = apps.get_model('product', 'StockMovement')
+    StockMovement.objects.filter(reference='saldo inicial').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_saldo_inicial, remover_saldo_inicial),
+    ]
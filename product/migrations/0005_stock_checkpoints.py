@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_opening_stock_movements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('taken_at', models.DateTimeField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'StockCheckpoint',
+                'verbose_name_plural': 'StockCheckpoints',
+                'ordering': ['taken_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockCheckpointLine',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'StockCheckpointLine',
+                'verbose_name_plural': 'StockCheckpointLines',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at'], name='movement_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockcheckpointline',
+            name='checkpoint',
+            field=models.ForeignKey(db_column='checkpoint_id', on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='product.stockcheckpoint'),
+        ),
+        migrations.AddField(
+            model_name='stockcheckpointline',
+            name='product',
+            field=models.ForeignKey(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, to='product.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcheckpointline',
+            constraint=models.UniqueConstraint(fields=('checkpoint', 'product'), name='checkpoint_product_unique'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:41
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Até aqui created_at fazia as vezes de data do fato
+    StockMovement = apps.get_model('product', 'StockMovement')
+    StockMovement.objects.update(effective_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockmovement',
+            name='movement_product_date_idx',
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='effective_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'effective_at'], name='movement_product_effective_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['effective_at'], name='movement_effective_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from suppliers.models import Supplier as Fornecedor
 
 # Create your models here.
@@ -19,4 +20,122 @@ class Product(models.Model):
         ordering = ['description']
 
     def __str__(self):
-        return self.description
\ No newline at end of file
+        return self.description
+
+
+class StockMovement(models.Model):
+    """
+    Lançamento do razão de estoque (somente inserção).
+
+    quantity é positiva para entradas e negativa para saídas; o saldo de um
+    produto em qualquer data é a soma dos lançamentos com effective_at até
+    ela. created_at é sempre o momento da gravação (a compactação depende
+    disso); effective_at é a data do fato, que pode ser retroativa, como
+    numa venda offline reenviada com a data original.
+    """
+    KIND_SALE = 'sale'
+    KIND_BUDGET_CONVERSION = 'budget_conversion'
+    KIND_ADJUSTMENT = 'adjustment'
+    KIND_RECEIPT = 'receipt'
+    KIND_CHOICES = [
+        (KIND_SALE, 'Venda'),
+        (KIND_BUDGET_CONVERSION, 'Conversão de orçamento'),
+        (KIND_ADJUSTMENT, 'Ajuste'),
+        (KIND_RECEIPT, 'Recebimento'),
+    ]
+    # Referência do saldo com que o produto entrou no razão
+    REFERENCE_OPENING = 'saldo inicial'
+
+    id = models.BigAutoField(primary_key=True)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_column='product_id',
+        related_name='movements'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    reference = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    effective_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "StockMovement"
+        verbose_name_plural = "StockMovements"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['product', 'effective_at'], name='movement_product_effective_idx'),
+            models.Index(fields=['effective_at'], name='movement_effective_idx'),
+            models.Index(fields=['created_at'], name='movement_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity:+d} {self.kind} (Product #{self.product_id})"
+
+
+class StockBalance(models.Model):
+    """
+    Saldo compactado do razão até last_movement_id.
+
+    Todas as linhas compartilham o mesmo last_movement_id após cada
+    compactação; o saldo atual é quantity mais os lançamentos posteriores.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='product_id',
+        related_name='stock_balance'
+    )
+    quantity = models.IntegerField(default=0)
+    last_movement_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "StockBalance"
+        verbose_name_plural = "StockBalances"
+
+    def __str__(self):
+        return f"Product #{self.product_id}: {self.quantity}"
+
+
+class StockCheckpoint(models.Model):
+    """Fotografia do estoque de todos os produtos em um instante."""
+    id = models.AutoField(primary_key=True)
+    taken_at = models.DateTimeField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "StockCheckpoint"
+        verbose_name_plural = "StockCheckpoints"
+        ordering = ['taken_at']
+
+    def __str__(self):
+        return f"Checkpoint #{self.id} - {self.taken_at}"
+
+
+class StockCheckpointLine(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    checkpoint = models.ForeignKey(
+        StockCheckpoint,
+        on_delete=models.CASCADE,
+        db_column='checkpoint_id',
+        related_name='lines'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_column='product_id'
+    )
+    quantity = models.IntegerField()
+
+    class Meta:
+        verbose_name = "StockCheckpointLine"
+        verbose_name_plural = "StockCheckpointLines"
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['checkpoint', 'product'], name='checkpoint_product_unique'),
+        ]
+
+    def __str__(self):
+        return f"Product #{self.product_id}: {self.quantity} (Checkpoint #{self.checkpoint_id})"
@@ -0,0 +1,140 @@
+"""
+Índice em memória para a busca de produtos por descrição (typeahead).
+
+O índice guarda apenas (descrição normalizada, id) em listas ordenadas: a
+busca por prefixo usa bisect, tanto na descrição inteira quanto em cada
+palavra, e só então cai para uma varredura por substring. Os resultados de
+cada consulta ficam num cache LRU limitado, e os dados voláteis (preço e
+estoque) são sempre lidos do banco para os ids encontrados.
+
+O índice é reconstruído quando a versão de busca muda, o que acontece ao
+salvar ou excluir um produto (baixas de estoque não mexem na descrição).
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Product
+
+SEARCH_VERSION_KEY = 'product:search-version'
+MAX_HITS = 200
+CACHE_SIZE = 1024
+
+_lock = threading.Lock()
+_index = None
+
+
+def normalize(text):
+    """Minúsculas e sem acentos, para comparar 'Café' com 'cafe'."""
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def index_version():
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(SEARCH_VERSION_KEY, version, timeout=None):
+            version = cache.get(SEARCH_VERSION_KEY, version)
+    return version
+
+
+def bump_index_version():
+    """Marca o índice como desatualizado após a confirmação da transação."""
+    transaction.on_commit(
+        lambda: cache.set(SEARCH_VERSION_KEY, time.time_ns(), timeout=None)
+    )
+
+
+def _prefix_range(keys, prefix):
+    start = bisect_left(keys, (prefix,))
+    for position in range(start, len(keys)):
+        key, product_id = keys[position]
+        if not key.startswith(prefix):
+            break
+        yield product_id
+
+
+class ProductIndex:
+    """Listas ordenadas de descrições e palavras normalizadas."""
+
+    def __init__(self, rows):
+        self.descriptions = sorted((normalize(description), product_id) for product_id, description in rows)
+        self.words = sorted({
+            (word, product_id)
+            for description, product_id in self.descriptions
+            for word in description.split()
+        })
+
+    def search(self, query, limit=MAX_HITS):
+        """
+        Ids cuja descrição combina com a consulta, do melhor para o pior:
+        começa com a consulta, alguma palavra começa com ela, ou a contém.
+        """
+        query = normalize(query).strip()
+        if not query:
+            return []
+
+        hits = {}
+        for product_id in _prefix_range(self.descriptions, query):
+            hits.setdefault(product_id, None)
+            if len(hits) >= limit:
+                return list(hits)
+        if ' ' not in query:
+            for product_id in _prefix_range(self.words, query):
+                hits.setdefault(product_id, None)
+                if len(hits) >= limit:
+                    return list(hits)
+        for description, product_id in self.descriptions:
+            if query in description:
+                hits.setdefault(product_id, None)
+                if len(hits) >= limit:
+                    break
+        return list(hits)
+
+
+def get_index():
+    """Índice da versão atual, reconstruído (uma vez por processo) se preciso."""
+    global _index
+    version = index_version()
+    if _index is None or _index[0] != version:
+        with _lock:
+            if _index is None or _index[0] != version:
+                _index = (version, ProductIndex(Product.objects.values_list('id', 'description').iterator()))
+    return _index[1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _search_ids(version, query):
+    return tuple(get_index().search(query))
+
+
+def search_products(query, limit=20, in_stock=False):
+    """
+    Busca produtos pela descrição.
+
+    Args:
+        query: Texto digitado; vazio devolve os primeiros produtos em ordem alfabética
+        limit: Quantidade máxima de resultados
+        in_stock: Se verdadeiro, ignora produtos sem estoque
+
+    Returns:
+        Lista de dicionários com id, description, price e qty_stock
+    """
+    products = Product.objects.all()
+    if in_stock:
+        products = products.filter(qty_stock__gt=0)
+    fields = ('id', 'description', 'price', 'qty_stock')
+
+    query = normalize(query).strip()
+    if not query:
+        return list(products.order_by('description', 'id').values(*fields)[:limit])
+
+    ids = _search_ids(index_version(), query)
+    rows = {row['id']: row for row in products.filter(id__in=ids).values(*fields)}
+    return [rows[product_id] for product_id in ids if product_id in rows][:limit]
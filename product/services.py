@@ -0,0 +1,378 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Max, Q, Sum, Value, When
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Product, StockBalance, StockCheckpoint, StockCheckpointLine, StockMovement
+
+
+class InsufficientStockError(Exception):
+    """Levantada quando um ou mais itens não possuem estoque suficiente."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(
+            ', '.join(f"produto #{s['product_id']}" for s in shortages)
+        )
+
+
+def parse_lines(items):
+    """
+    Converte os itens enviados pelo formulário em linhas (product_id, quantity).
+
+    Args:
+        items: Lista de dicionários no formato {'id': ..., 'quantity': ...}
+
+    Raises:
+        ValueError: Se algum item tiver produto ou quantidade inválidos
+    """
+    lines = []
+    for item in items:
+        product_id = int(item.get('id'))
+        quantity = int(item.get('quantity', 1))
+        if quantity <= 0:
+            raise ValueError(f'Quantidade inválida para o produto #{product_id}')
+        lines.append((product_id, quantity))
+    return lines
+
+
+def aggregate_lines(lines):
+    """Soma as quantidades de linhas repetidas do mesmo produto."""
+    demand = {}
+    for product_id, quantity in lines:
+        demand[product_id] = demand.get(product_id, 0) + quantity
+    return demand
+
+
+def load_products(lines):
+    """Busca com uma única consulta todos os produtos referenciados pelas linhas."""
+    return Product.objects.in_bulk({product_id for product_id, _ in lines})
+
+
+def price_lines(lines, products):
+    """
+    Calcula o subtotal de cada linha e o total do documento.
+
+    Args:
+        lines: Iterável de tuplas (product_id, quantity)
+        products: Dicionário {product_id: Product} já carregado
+
+    Returns:
+        Tupla (linhas precificadas, total), em que cada linha precificada é
+        (product, quantity, subtotal)
+
+    Raises:
+        ValueError: Se alguma linha referenciar um produto inexistente
+    """
+    priced = []
+    total = Decimal('0.00')
+    for product_id, quantity in lines:
+        product = products.get(product_id)
+        if product is None:
+            raise ValueError(f'Produto #{product_id} não encontrado')
+        subtotal = product.price * quantity
+        priced.append((product, quantity, subtotal))
+        total += subtotal
+    return priced, total
+
+
+def find_shortages(demand, products):
+    """
+    Compara a demanda com o estoque dos produtos carregados.
+
+    Returns:
+        Lista de dicionários com product_id, description, requested e available
+        para cada produto sem estoque suficiente (ou inexistente).
+    """
+    shortages = []
+    for product_id, quantity in demand.items():
+        product = products.get(product_id)
+        available = product.qty_stock if product is not None else 0
+        if available < quantity:
+            shortages.append({
+                'product_id': product_id,
+                'description': product.description if product is not None else None,
+                'requested': quantity,
+                'available': available,
+            })
+    return shortages
+
+
+def allocate_stock(demand, products):
+    """
+    Reserva em memória a demanda contra produtos já bloqueados.
+
+    Usado pelos fluxos em lote para validar vários documentos, um após o
+    outro, contra o saldo que sobra dos anteriores antes de um único UPDATE.
+
+    Returns:
+        Lista de faltas; se vazia, o estoque em memória já foi abatido
+    """
+    shortages = find_shortages(demand, products)
+    if not shortages:
+        for product_id, quantity in demand.items():
+            products[product_id].qty_stock -= quantity
+    return shortages
+
+
+def decrement_stock(demand):
+    """
+    Baixa o estoque de todos os produtos com um único UPDATE condicional.
+
+    Cada linha só é atualizada se ainda houver estoque suficiente; se alguma
+    não for atualizada, a operação é desfeita com InsufficientStockError.
+    """
+    if not demand:
+        return
+    condition = Q()
+    whens = []
+    for product_id, quantity in demand.items():
+        condition |= Q(id=product_id, qty_stock__gte=quantity)
+        whens.append(When(id=product_id, then=F('qty_stock') - Value(quantity)))
+
+    with transaction.atomic():
+        updated = Product.objects.filter(condition).update(
+            qty_stock=Case(*whens, default=F('qty_stock'))
+        )
+        if updated != len(demand):
+            products = Product.objects.in_bulk(list(demand))
+            raise InsufficientStockError(find_shortages(demand, products))
+        bump_catalog_version()
+
+
+def reserve_stock(lines):
+    """
+    Valida e baixa o estoque de todas as linhas de um pedido em uma transação.
+
+    Os produtos são buscados (e bloqueados, nos bancos que suportam) com uma
+    única consulta id__in, e a baixa é feita por UPDATE condicional, de modo
+    que pedidos concorrentes não vendem além do estoque disponível.
+
+    Args:
+        lines: Iterável de tuplas (product_id, quantity)
+
+    Returns:
+        Dicionário {product_id: Product} com o estoque já atualizado
+
+    Raises:
+        InsufficientStockError: Com o relatório de faltas por produto
+    """
+    demand = aggregate_lines(lines)
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(list(demand))
+        shortages = find_shortages(demand, products)
+        if shortages:
+            raise InsufficientStockError(shortages)
+
+        decrement_stock(demand)
+
+    for product_id, quantity in demand.items():
+        products[product_id].qty_stock -= quantity
+    return products
+
+
+def record_movements(deltas, kind, reference=''):
+    """
+    Registra lançamentos no razão de estoque com um único INSERT.
+
+    Args:
+        deltas: Dicionário {product_id: quantidade}, negativa para saídas
+        kind: Tipo do lançamento (StockMovement.KIND_*)
+        reference: Documento de origem, por exemplo 'order:12'
+    """
+    return StockMovement.objects.bulk_create([
+        StockMovement(product_id=product_id, kind=kind, quantity=quantity, reference=reference)
+        for product_id, quantity in deltas.items()
+        if quantity
+    ])
+
+
+def adjust_stock(product_id, quantity, kind=StockMovement.KIND_ADJUSTMENT, reference=''):
+    """
+    Ajusta o estoque de um produto (entrada ou saída) mantendo o razão.
+
+    Saídas só são aplicadas se houver saldo suficiente.
+
+    Raises:
+        InsufficientStockError: Se a saída deixaria o estoque negativo
+    """
+    with transaction.atomic():
+        if quantity < 0:
+            decrement_stock({product_id: -quantity})
+        else:
+            Product.objects.filter(id=product_id).update(qty_stock=F('qty_stock') + quantity)
+            bump_catalog_version()
+        record_movements({product_id: quantity}, kind, reference)
+
+
+def _movement_totals(movements):
+    return dict(
+        movements.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+
+
+def current_stock(product_ids):
+    """
+    Saldo atual pelo razão: saldo compactado mais os lançamentos posteriores.
+
+    Returns:
+        Dicionário {product_id: quantidade}
+    """
+    product_ids = list(product_ids)
+    balances = dict(
+        StockBalance.objects.filter(product_id__in=product_ids).values_list('product_id', 'quantity')
+    )
+    watermark = StockBalance.objects.aggregate(last=Max('last_movement_id'))['last'] or 0
+    deltas = _movement_totals(StockMovement.objects.filter(product_id__in=product_ids, id__gt=watermark))
+    return {
+        product_id: balances.get(product_id, 0) + deltas.get(product_id, 0)
+        for product_id in product_ids
+    }
+
+
+def ledger_start():
+    """
+    Primeiro saldo inicial do razão, ou None se não houver lançamentos.
+
+    Os produtos que já existiam entraram no razão com o estoque do momento
+    da migração; antes dessa data o saldo deles é desconhecido, não zero.
+    """
+    return (
+        StockMovement.objects.filter(reference=StockMovement.REFERENCE_OPENING)
+        .order_by('effective_at').values_list('effective_at', flat=True).first()
+    )
+
+
+def stock_at(when, product_ids=None):
+    """
+    Saldo de estoque na data informada.
+
+    Parte do checkpoint mais próximo anterior à data e soma apenas os
+    lançamentos entre o checkpoint e ela, sem percorrer todo o histórico.
+
+    Returns:
+        Dicionário {product_id: quantidade} (produtos com saldo zero ficam de fora)
+
+    Raises:
+        ValueError: Se a data for anterior ao início do razão (ledger_start)
+    """
+    start = ledger_start()
+    if start is not None and when < start:
+        raise ValueError(
+            f'O razão de estoque começa em {timezone.localtime(start):%d/%m/%Y %H:%M}; '
+            f'não há saldo conhecido antes disso'
+        )
+    checkpoint = StockCheckpoint.objects.filter(taken_at__lte=when).order_by('-taken_at').first()
+    movements = StockMovement.objects.filter(effective_at__lte=when)
+    lines = StockCheckpointLine.objects.none()
+    if checkpoint is not None:
+        movements = movements.filter(effective_at__gt=checkpoint.taken_at)
+        lines = checkpoint.lines.all()
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        movements = movements.filter(product_id__in=product_ids)
+        lines = lines.filter(product_id__in=product_ids)
+
+    quantities = dict(lines.values_list('product_id', 'quantity'))
+    for product_id, total in _movement_totals(movements).items():
+        quantities[product_id] = quantities.get(product_id, 0) + total
+    return {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+
+
+def create_stock_checkpoint(taken_at=None, settle=timedelta(minutes=1)):
+    """
+    Grava o saldo de todos os produtos no instante informado.
+
+    O saldo é calculado a partir do checkpoint anterior mais os lançamentos
+    do intervalo. O instante não pode ser mais recente que `settle` atrás,
+    para que transações em andamento não fiquem fora da fotografia.
+
+    Raises:
+        ValueError: Se o instante for recente demais ou anterior ao início do razão
+    """
+    latest = timezone.now() - settle
+    taken_at = taken_at or latest
+    if taken_at > latest:
+        raise ValueError('O checkpoint precisa ser anterior aos lançamentos em andamento')
+
+    quantities = stock_at(taken_at)
+    with transaction.atomic():
+        checkpoint, _ = StockCheckpoint.objects.update_or_create(taken_at=taken_at)
+        checkpoint.lines.all().delete()
+        StockCheckpointLine.objects.bulk_create(
+            [
+                StockCheckpointLine(checkpoint=checkpoint, product_id=product_id, quantity=quantity)
+                for product_id, quantity in quantities.items()
+            ],
+            batch_size=1000,
+        )
+    return checkpoint
+
+
+def discard_checkpoints_since(when):
+    """
+    Remove os checkpoints tirados a partir de `when`.
+
+    Usado quando entram lançamentos retroativos (ex.: vendas offline
+    reenviadas com a data original): esses checkpoints não os incluem e
+    dariam saldo errado. stock_at passa a partir do checkpoint anterior, e o
+    comando stock_checkpoint pode gravá-los de novo.
+    """
+    return StockCheckpoint.objects.filter(taken_at__gte=when).delete()[0]
+
+
+def compact_stock_balances(settle=timedelta(minutes=1)):
+    """
+    Incorpora ao saldo compactado os lançamentos feitos desde a última compactação.
+
+    Só entram lançamentos gravados há mais de `settle` (created_at, nunca
+    retroativo), para não pular ids de transações concorrentes que ainda não
+    foram confirmadas.
+
+    Returns:
+        Quantidade de produtos cujo saldo mudou
+    """
+    with transaction.atomic():
+        previous = StockBalance.objects.aggregate(last=Max('last_movement_id'))['last'] or 0
+        watermark = StockMovement.objects.filter(
+            created_at__lte=timezone.now() - settle
+        ).aggregate(last=Max('id'))['last'] or 0
+        if watermark <= previous:
+            return 0
+
+        deltas = _movement_totals(StockMovement.objects.filter(id__gt=previous, id__lte=watermark))
+        balances = StockBalance.objects.select_for_update().in_bulk(list(deltas))
+        new_balances = []
+        for product_id, total in deltas.items():
+            balance = balances.get(product_id)
+            if balance is None:
+                new_balances.append(StockBalance(product_id=product_id, quantity=total))
+            else:
+                balance.quantity += total
+
+        StockBalance.objects.bulk_update(balances.values(), ['quantity'], batch_size=1000)
+        StockBalance.objects.bulk_create(new_balances, batch_size=1000)
+        StockBalance.objects.update(last_movement_id=watermark)
+    return len(deltas)
+
+
+def stock_drift(product_ids=None):
+    """
+    Compara o saldo do razão com Product.qty_stock.
+
+    Returns:
+        Lista de tuplas (product_id, qty_stock, saldo do razão) divergentes
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    qty_stock = dict(products.values_list('id', 'qty_stock'))
+    ledger = current_stock(qty_stock)
+    return [
+        (product_id, quantity, ledger[product_id])
+        for product_id, quantity in qty_stock.items()
+        if quantity != ledger[product_id]
+    ]
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from suppliers.models import Supplier
+
+from .catalog import bump_catalog_version
+from .models import Product, StockMovement
+from .search import bump_index_version
+
+
+@receiver(post_save, sender=Product)
+def record_opening_stock(sender, instance, created, raw=False, **kwargs):
+    """Lança no razão o estoque com que um produto foi cadastrado."""
+    if created and not raw and instance.qty_stock:
+        StockMovement.objects.create(
+            product=instance,
+            kind=StockMovement.KIND_ADJUSTMENT,
+            quantity=instance.qty_stock,
+            reference=StockMovement.REFERENCE_OPENING,
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def invalidate_catalog(sender, **kwargs):
+    """Invalida as respostas em cache da API de produtos."""
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_search_index(sender, **kwargs):
+    """Faz o índice de busca ser reconstruído na próxima consulta."""
+    bump_index_version()
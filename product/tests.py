@@ -1,8 +1,22 @@
-from django.test import TestCase, Client
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import Product
+from .models import Product, StockBalance, StockMovement
+from .services import (
+    InsufficientStockError, adjust_stock, compact_stock_balances, create_stock_checkpoint, current_stock,
+    decrement_stock, reserve_stock, stock_at, stock_drift,
+)
 from suppliers.models import Supplier
+from customers.models import Customer
+from order.services import create_order
 
 Employee = get_user_model()
 
@@ -127,3 +141,379 @@ Employee = get_user_model()
         
 #         self.assertEqual(response.status_code, 200)
 #         self.assertIn(b'Produto Teste', response.content)
+
+
+class StockReservationTest(TestCase):
+    """Testes para a reserva de estoque"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product1 = Product.objects.create(
+            description='Produto 1', price=10, qty_stock=5, supplier=self.supplier
+        )
+        self.product2 = Product.objects.create(
+            description='Produto 2', price=20, qty_stock=2, supplier=self.supplier
+        )
+
+    def test_reserve_stock_decrements_all_lines(self):
+        """Testa baixa de estoque de todas as linhas"""
+        products = reserve_stock([(self.product1.id, 3), (self.product2.id, 2)])
+
+        self.product1.refresh_from_db()
+        self.product2.refresh_from_db()
+        self.assertEqual(self.product1.qty_stock, 2)
+        self.assertEqual(self.product2.qty_stock, 0)
+        self.assertEqual(products[self.product1.id].qty_stock, 2)
+
+    def test_reserve_stock_aggregates_repeated_products(self):
+        """Testa que linhas repetidas do mesmo produto são somadas"""
+        with self.assertRaises(InsufficientStockError) as ctx:
+            reserve_stock([(self.product2.id, 1), (self.product2.id, 2)])
+
+        self.assertEqual(ctx.exception.shortages[0]['requested'], 3)
+        self.product2.refresh_from_db()
+        self.assertEqual(self.product2.qty_stock, 2)
+
+    def test_reserve_stock_shortage_keeps_stock(self):
+        """Testa que uma falta não baixa o estoque de nenhuma linha"""
+        with self.assertRaises(InsufficientStockError) as ctx:
+            reserve_stock([(self.product1.id, 1), (self.product2.id, 3), (9999, 1)])
+
+        shortages = {s['product_id']: s for s in ctx.exception.shortages}
+        self.assertEqual(set(shortages), {self.product2.id, 9999})
+        self.assertEqual(shortages[self.product2.id]['available'], 2)
+        self.product1.refresh_from_db()
+        self.assertEqual(self.product1.qty_stock, 5)
+
+    def test_reserve_stock_query_count(self):
+        """Testa que o número de consultas não cresce com o número de linhas"""
+        with CaptureQueriesContext(connection) as one_line:
+            reserve_stock([(self.product1.id, 1)])
+        with CaptureQueriesContext(connection) as two_lines:
+            reserve_stock([(self.product1.id, 1), (self.product2.id, 1)])
+
+        self.assertEqual(len(one_line), len(two_lines))
+
+    def test_decrement_stock_conditional(self):
+        """Testa que o UPDATE condicional não deixa o estoque negativo"""
+        Product.objects.filter(id=self.product2.id).update(qty_stock=0)
+
+        with self.assertRaises(InsufficientStockError):
+            decrement_stock({self.product1.id: 1, self.product2.id: 1})
+
+        self.product2.refresh_from_db()
+        self.assertEqual(self.product2.qty_stock, 0)
+
+
+class StockLedgerTest(TestCase):
+    """Testes para o razão de estoque"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto 1', price=10, qty_stock=10, supplier=self.supplier
+        )
+        self.customer = Customer.objects.create(name='Cliente Teste', email='cliente@test.com')
+
+    def test_opening_movement_on_create(self):
+        """Testa lançamento do saldo inicial no cadastro"""
+        movement = StockMovement.objects.get(product=self.product)
+
+        self.assertEqual(movement.quantity, 10)
+        self.assertEqual(movement.kind, StockMovement.KIND_ADJUSTMENT)
+
+    def test_order_records_sale_movements(self):
+        """Testa que a venda é lançada no razão"""
+        order = create_order(self.customer, [(self.product.id, 2), (self.product.id, 1)])
+
+        movement = StockMovement.objects.get(kind=StockMovement.KIND_SALE)
+        self.assertEqual(movement.quantity, -3)
+        self.assertEqual(movement.reference, f'order:{order.id}')
+        self.assertEqual(current_stock([self.product.id]), {self.product.id: 7})
+        self.assertEqual(stock_drift(), [])
+
+    def test_compaction_keeps_current_stock(self):
+        """Testa que a compactação não altera o saldo atual"""
+        create_order(self.customer, [(self.product.id, 4)])
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(compact_stock_balances(), 1)
+        adjust_stock(self.product.id, 5, StockMovement.KIND_RECEIPT, 'nf:123')
+
+        balance = StockBalance.objects.get(product=self.product)
+        self.assertEqual(balance.quantity, 6)
+        self.assertEqual(current_stock([self.product.id]), {self.product.id: 11})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.qty_stock, 11)
+
+    def test_adjust_stock_rejects_negative(self):
+        """Testa que ajustes de saída respeitam o saldo"""
+        with self.assertRaises(InsufficientStockError):
+            adjust_stock(self.product.id, -11)
+
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_stock_at(self):
+        """Testa saldo em uma data passada"""
+        StockMovement.objects.update(effective_at=timezone.now() - timedelta(days=2))
+        create_order(self.customer, [(self.product.id, 4)])
+
+        self.assertEqual(stock_at(timezone.now() - timedelta(days=1)), {self.product.id: 10})
+        self.assertEqual(stock_at(timezone.now()), {self.product.id: 6})
+
+    def test_compact_stock_command_verify(self):
+        """Testa que o comando aponta divergências com qty_stock"""
+        Product.objects.filter(id=self.product.id).update(qty_stock=8)
+        out = StringIO()
+
+        call_command('compact_stock', verify=True, stdout=out)
+
+        self.assertIn(f'Produto #{self.product.id}: qty_stock=8, razão=10', out.getvalue())
+
+
+class StockCheckpointTest(TestCase):
+    """Testes para os checkpoints de estoque"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Produto 1', price=10, qty_stock=10, supplier=self.supplier
+        )
+        self.now = timezone.now()
+        StockMovement.objects.update(effective_at=self.now - timedelta(days=10))
+        self.sale = StockMovement.objects.create(
+            product=self.product, kind=StockMovement.KIND_SALE, quantity=-3,
+            effective_at=self.now - timedelta(days=5)
+        )
+
+    def test_checkpoint_and_delta(self):
+        """Testa saldo a partir do checkpoint mais próximo"""
+        checkpoint = create_stock_checkpoint(self.now - timedelta(days=7))
+        self.assertEqual(checkpoint.lines.get().quantity, 10)
+
+        # Início do razão, checkpoint, linhas e lançamentos do intervalo
+        with self.assertNumQueries(4):
+            quantities = stock_at(self.now - timedelta(days=1), [self.product.id])
+        self.assertEqual(quantities, {self.product.id: 7})
+        self.assertEqual(stock_at(self.now - timedelta(days=8)), {self.product.id: 10})
+
+    def test_checkpoint_ignores_earlier_movements(self):
+        """Testa que lançamentos anteriores ao checkpoint não são somados de novo"""
+        create_stock_checkpoint(self.now - timedelta(days=2))
+        # Lançamento antigo alterado depois do checkpoint não afeta o saldo posterior
+        StockMovement.objects.filter(id=self.sale.id).update(quantity=-1)
+
+        self.assertEqual(stock_at(self.now - timedelta(days=1)), {self.product.id: 7})
+
+    def test_checkpoint_rejects_recent_instant(self):
+        """Testa que não é possível fotografar lançamentos em andamento"""
+        with self.assertRaises(ValueError):
+            create_stock_checkpoint(timezone.now())
+
+    def test_stock_report_command(self):
+        """Testa relatório de estoque em uma data"""
+        out = StringIO()
+        day = (self.now - timedelta(days=6)).date().isoformat()
+
+        call_command('stock_report', day, stdout=out)
+
+        self.assertIn(f'{self.product.id},Produto 1,10', out.getvalue())
+
+    def test_refuses_dates_before_ledger_start(self):
+        """Testa que datas anteriores ao saldo inicial não são respondidas como estoque zero"""
+        before = self.now - timedelta(days=11)
+        with self.assertRaisesMessage(ValueError, 'não há saldo conhecido antes disso'):
+            stock_at(before)
+        with self.assertRaises(ValueError):
+            create_stock_checkpoint(before)
+        with self.assertRaisesMessage(CommandError, 'não há saldo conhecido antes disso'):
+            call_command('stock_report', before.date().isoformat(), stdout=StringIO())
+
+    def test_commands_reject_invalid_dates(self):
+        """Testa que datas impossíveis ou mal formatadas viram erro do comando, sem traceback"""
+        for value in ('2026-02-30', '30/01/2026', 'ontem'):
+            with self.assertRaisesMessage(CommandError, f'Data inválida: {value}'):
+                call_command('stock_report', value, stdout=StringIO())
+            with self.assertRaisesMessage(CommandError, f'Data inválida: {value}'):
+                call_command('stock_checkpoint', date=value, stdout=StringIO())
+
+
+class ProductApiTest(TestCase):
+    """Testes para a API de produtos"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        cache.clear()
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.other = Supplier.objects.create(
+            name='Outro Fornecedor',
+            cnpj='98.765.432/0001-10',
+            email='outro@test.com'
+        )
+        self.product1 = Product.objects.create(
+            description='Produto 1', price=10, qty_stock=5, supplier=self.supplier
+        )
+        self.product2 = Product.objects.create(
+            description='Produto 2', price=20, qty_stock=0, supplier=self.other
+        )
+
+    def test_list_filters(self):
+        """Testa os filtros por fornecedor e por estoque"""
+        url = reverse('product_api_list')
+        data = self.client.get(url).json()
+        self.assertEqual([p['id'] for p in data['results']], [self.product1.id, self.product2.id])
+        self.assertIsNone(data['next_after'])
+
+        data = self.client.get(url, {'supplier': self.other.id}).json()
+        self.assertEqual([p['id'] for p in data['results']], [self.product2.id])
+
+        data = self.client.get(url, {'in_stock': '1'}).json()
+        self.assertEqual([p['id'] for p in data['results']], [self.product1.id])
+
+        self.assertEqual(self.client.get(url, {'supplier': 'x'}).status_code, 400)
+
+    def test_detail(self):
+        """Testa o detalhe e o produto inexistente"""
+        data = self.client.get(reverse('product_api_detail', args=[self.product1.id])).json()
+        self.assertEqual(data['price'], '10.00')
+        self.assertEqual(data['supplier']['name'], 'Fornecedor Teste')
+        response = self.client.get(reverse('product_api_detail', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CATALOG_API_TOKENS=['pdv-catalogo'])
+    def test_token_auth(self):
+        """Testa que terminais sem sessão acessam a API com token"""
+        client = Client()
+        url = reverse('product_api_detail', args=[self.product1.id])
+        self.assertEqual(client.get(url).status_code, 302)
+        self.assertEqual(client.get(url, HTTP_AUTHORIZATION='Bearer errado').status_code, 302)
+
+        response = client.get(url, HTTP_AUTHORIZATION='Bearer pdv-catalogo')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.product1.id)
+        response = client.get(reverse('product_api_list'), HTTP_AUTHORIZATION='Bearer pdv-catalogo')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get_and_invalidation(self):
+        """Testa o 304 enquanto o catálogo não muda e a invalidação após alterações"""
+        url = reverse('product_api_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('product_product' in q['sql'] for q in queries.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            adjust_stock(self.product2.id, 3)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][1]['qty_stock'], 3)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product1.description = 'Produto Renomeado'
+            self.product1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['results'][0]['description'], 'Produto Renomeado')
+
+    def test_pages_are_cached(self):
+        """Testa que a página serializada é reaproveitada entre requisições"""
+        url = reverse('product_api_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any('product_product' in q['sql'] for q in queries.captured_queries))
+
+
+class ProductSearchTest(TestCase):
+    """Testes para a busca de produtos (typeahead)"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        cache.clear()
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.cafe = Product.objects.create(
+            description='Café Torrado 500g', price=20, qty_stock=5, supplier=self.supplier
+        )
+        self.filtro = Product.objects.create(
+            description='Filtro de Café', price=8, qty_stock=0, supplier=self.supplier
+        )
+        self.acucar = Product.objects.create(
+            description='Açúcar Cristal', price=5, qty_stock=3, supplier=self.supplier
+        )
+
+    def search(self, **params):
+        response = self.client.get(reverse('product_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_prefix_word_and_substring_ranking(self):
+        """Testa a ordem: prefixo da descrição, prefixo de palavra e substring"""
+        self.assertEqual(self.search(q='cafe'), [self.cafe.id, self.filtro.id])
+        self.assertEqual(self.search(q='ucar'), [self.acucar.id])
+        self.assertEqual(self.search(q='ACUC'), [self.acucar.id])
+        self.assertEqual(self.search(q='inexistente'), [])
+
+    def test_in_stock_and_limit(self):
+        """Testa o filtro de estoque e o limite de resultados"""
+        self.assertEqual(self.search(q='cafe', in_stock='1'), [self.cafe.id])
+        self.assertEqual(len(self.search(limit='1')), 1)
+
+    def test_results_use_fresh_stock_and_new_products(self):
+        """Testa que estoque vem do banco e que novos produtos entram no índice"""
+        self.search(q='cafe')
+        Product.objects.filter(id=self.cafe.id).update(qty_stock=0)
+        self.assertEqual(self.search(q='cafe', in_stock='1'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = Product.objects.create(
+                description='Café Especial', price=30, qty_stock=1, supplier=self.supplier
+            )
+        self.assertIn(novo.id, self.search(q='cafe'))
+
+    def test_create_pages_do_not_embed_catalog(self):
+        """Testa que as telas de cadastro não carregam o catálogo inteiro"""
+        response = self.client.get('/order/create/')
+        self.assertNotContains(response, 'Café Torrado')
+        self.assertContains(response, reverse('product_search'))
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/products/', views.view_api_list, name='product_api_list'),
+    path('api/products/<int:id>/', views.view_api_detail, name='product_api_detail'),
+    path('search/', views.view_search, name='product_search'),
+    path('export/', views.view_export, name='product_export'),
+]
@@ -1,3 +1,142 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from config.api_auth import token_or_login_required
+from config.exports import export_response
+from config.pagination import PAGE_SIZE
+from .catalog import catalog_etag, catalog_last_modified, catalog_version
+from .models import Product
+from .search import search_products
 
 # Create your views here.
+
+SEARCH_MAX_LIMIT = 50
+
+API_FIELDS = ('id', 'description', 'price', 'qty_stock', 'supplier_id', 'supplier__name')
+
+
+def _catalog_etag(request, *args, **kwargs):
+    return catalog_etag(catalog_version())
+
+
+def _catalog_last_modified(request, *args, **kwargs):
+    return catalog_last_modified(catalog_version())
+
+
+def _serialize(row):
+    return {
+        'id': row['id'],
+        'description': row['description'],
+        'price': str(row['price']),
+        'qty_stock': row['qty_stock'],
+        'supplier': {'id': row['supplier_id'], 'name': row['supplier__name']},
+    }
+
+
+def _cached_json(key, build):
+    """Devolve o JSON guardado na chave ou o monta com build() e guarda."""
+    body = cache.get(key)
+    if body is None:
+        payload = build()
+        if payload is None:
+            return None
+        body = JsonResponse(payload).content
+        cache.set(key, body, settings.PRODUCT_API_CACHE_TIMEOUT)
+    return HttpResponse(body, content_type='application/json')
+
+
+@token_or_login_required('CATALOG_API_TOKENS')
+@require_GET
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
+def view_api_list(request):
+    """
+    Lista os produtos em JSON, em páginas ordenadas por id.
+
+    Parâmetros: supplier (id do fornecedor), in_stock=1 (apenas com estoque)
+    e after (último id da página anterior, devolvido em `next_after`).
+    Responde 304 quando o catálogo não mudou desde o ETag/Last-Modified
+    enviado pelo cliente.
+    """
+    supplier = request.GET.get('supplier', '').strip()
+    after = request.GET.get('after', '').strip()
+    in_stock = request.GET.get('in_stock') in ('1', 'true')
+    if (supplier and not supplier.isdigit()) or (after and not after.isdigit()):
+        return JsonResponse({'error': 'supplier e after devem ser números'}, status=400)
+
+    def build():
+        products = Product.objects.order_by('id')
+        if supplier:
+            products = products.filter(supplier_id=int(supplier))
+        if in_stock:
+            products = products.filter(qty_stock__gt=0)
+        if after:
+            products = products.filter(id__gt=int(after))
+        rows = list(products.values(*API_FIELDS)[:PAGE_SIZE + 1])
+        has_next = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+        return {
+            'results': [_serialize(row) for row in rows],
+            'next_after': rows[-1]['id'] if has_next else None,
+        }
+
+    key = f'product-api:list:{catalog_version()}:{supplier}:{int(in_stock)}:{after}'
+    return _cached_json(key, build)
+
+
+@token_or_login_required('CATALOG_API_TOKENS')
+@require_GET
+@condition(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified)
+def view_api_detail(request, id):
+    """Detalhe de um produto em JSON, com as mesmas regras de cache da lista."""
+    def build():
+        row = Product.objects.filter(id=id).values(*API_FIELDS).first()
+        return _serialize(row) if row is not None else None
+
+    response = _cached_json(f'product-api:detail:{catalog_version()}:{id}', build)
+    if response is None:
+        return JsonResponse({'error': 'Produto não encontrado'}, status=404)
+    return response
+
+
+@login_required
+@require_GET
+async def view_search(request):
+    """
+    Busca de produtos para os campos com autocompletar.
+
+    Parâmetros: q (texto digitado), limit (até 50) e in_stock=1.
+    """
+    query = request.GET.get('q', '')[:100]
+    in_stock = request.GET.get('in_stock') in ('1', 'true')
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'limit deve ser um número'}, status=400)
+
+    rows = await sync_to_async(search_products)(query, limit=limit, in_stock=in_stock)
+    return JsonResponse({'results': [
+        {
+            'id': row['id'],
+            'description': row['description'],
+            'price': str(row['price']),
+            'qty_stock': row['qty_stock'],
+        }
+        for row in rows
+    ]})
+
+
+@login_required
+def view_export(request):
+    """Exporta os produtos em CSV ou NDJSON."""
+    return export_response(request, Product.objects.all(), [
+        ('id', 'id'),
+        ('description', 'description'),
+        ('price', 'price'),
+        ('qty_stock', 'qty_stock'),
+        ('supplier_id', 'supplier_id'),
+        ('supplier', 'supplier__name'),
+    ], 'products')
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os totais diários de vendas (produto, estado e fornecedor) a partir dos pedidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Recalcula só a partir desta data (AAAA-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since deve estar no formato AAAA-MM-DD')
+
+        for table, count in rebuild_rollups(since).items():
+            self.stdout.write(f'{table}: {count} linha(s)')
+        self.stdout.write(self.style.SUCCESS('Totais diários recalculados'))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('product', '0005_stock_checkpoints'),
+        ('suppliers', '0005_document_digits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStateSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('state', models.CharField(blank=True, default='', max_length=2)),
+            ],
+            options={
+                'verbose_name': 'DailyStateSales',
+                'verbose_name_plural': 'DailyStateSales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'state'), name='daily_state_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, to='product.product')),
+            ],
+            options={
+                'verbose_name': 'DailyProductSales',
+                'verbose_name_plural': 'DailyProductSales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='daily_product_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySupplierSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('supplier', models.ForeignKey(db_column='supplier_id', on_delete=django.db.models.deletion.CASCADE, to='suppliers.supplier')),
+            ],
+            options={
+                'verbose_name': 'DailySupplierSales',
+                'verbose_name_plural': 'DailySupplierSales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'supplier'), name='daily_supplier_sales_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import models
+
+from product.models import Product
+from suppliers.models import Supplier
+
+# Create your models here.
+
+class DailySales(models.Model):
+    """
+    Totais de vendas de um dia, mantidos a cada pedido criado ou excluído.
+
+    revenue é a soma dos valores vendidos, orders a quantidade de pedidos e
+    units a quantidade de itens; o dia é o da data do pedido no fuso local.
+    """
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyProductSales(DailySales):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_column='product_id')
+
+    class Meta:
+        verbose_name = "DailyProductSales"
+        verbose_name_plural = "DailyProductSales"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='daily_product_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - Product #{self.product_id}: {self.revenue}"
+
+
+class DailyStateSales(DailySales):
+    # Vazio quando o cliente não tem estado cadastrado
+    state = models.CharField(max_length=2, blank=True, default='')
+
+    class Meta:
+        verbose_name = "DailyStateSales"
+        verbose_name_plural = "DailyStateSales"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'state'], name='daily_state_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.state or '-'}: {self.revenue}"
+
+
+class DailySupplierSales(DailySales):
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, db_column='supplier_id')
+
+    class Meta:
+        verbose_name = "DailySupplierSales"
+        verbose_name_plural = "DailySupplierSales"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'supplier'], name='daily_supplier_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - Supplier #{self.supplier_id}: {self.revenue}"
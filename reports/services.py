@@ -0,0 +1,247 @@
+"""
+Totais diários de vendas por produto, estado do cliente e fornecedor.
+
+As tabelas são atualizadas de forma incremental: os serviços que criam
+pedidos somam cada pedido novo e a exclusão de um pedido (sinal
+pre_delete, enquanto os itens ainda existem) o subtrai. O estado usado é
+o gravado no pedido na venda (Order.customer_state), então mudar o
+endereço do cliente ou fundi-lo com outro não desencontra soma e
+subtração. Excluir um produto apaga seus itens em cascata, mas os pedidos
+continuam; por isso a exclusão de produtos (sinal pre_delete, também na
+cascata de um fornecedor) subtrai só a parte desses itens. Cada atualização
+garante que as linhas existem, bloqueia-as e grava todos os deltas com um
+bulk_update por tabela, então pedidos simultâneos não perdem valores. O
+comando `rebuild_sales_rollups` recalcula tudo a partir dos pedidos.
+
+Os painéis leem só estas tabelas: um mês de vendas são algumas centenas de
+linhas, independente de quantos pedidos existam.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from order.models import Order, OrderItem
+
+from .models import DailyProductSales, DailyStateSales, DailySupplierSales
+
+# Tabela -> campo que identifica a linha junto com a data
+TABLES = (
+    (DailyProductSales, 'product_id'),
+    (DailyStateSales, 'state'),
+    (DailySupplierSales, 'supplier_id'),
+)
+TOTAL_FIELDS = ['revenue', 'orders', 'units']
+
+
+def _order_deltas(orders):
+    """{tabela: {(data, chave): [valor, pedidos, unidades]}} dos pedidos informados."""
+    deltas = {model: {} for model, _ in TABLES}
+    orders = {order.pk: order for order in orders}
+    if not orders:
+        return deltas
+
+    items = OrderItem.objects.filter(order_id__in=list(orders)).values_list(
+        'order_id', 'product_id', 'product__supplier_id', 'quantity', 'subtotal',
+    )
+
+    units_by_order = {}
+    seen = set()
+    for order_id, product_id, supplier_id, quantity, subtotal in items:
+        day = timezone.localdate(orders[order_id].order_date)
+        units_by_order[order_id] = units_by_order.get(order_id, 0) + quantity
+        for model, key in ((DailyProductSales, product_id), (DailySupplierSales, supplier_id)):
+            totals = deltas[model].setdefault((day, key), [Decimal(0), 0, 0])
+            totals[0] += subtotal
+            totals[2] += quantity
+            # Um pedido com vários itens do mesmo fornecedor conta uma vez
+            if (model, order_id, key) not in seen:
+                seen.add((model, order_id, key))
+                totals[1] += 1
+
+    for order in orders.values():
+        day = timezone.localdate(order.order_date)
+        totals = deltas[DailyStateSales].setdefault((day, order.customer_state or ''), [Decimal(0), 0, 0])
+        totals[0] += order.total_amount
+        totals[1] += 1
+        totals[2] += units_by_order.get(order.pk, 0)
+    return deltas
+
+
+def _product_deltas(product_ids):
+    """Deltas dos itens dos produtos informados, em pedidos que continuam existindo."""
+    deltas = {model: {} for model, _ in TABLES}
+    items = list(
+        OrderItem.objects.filter(product_id__in=product_ids).values_list(
+            'order_id', 'order__order_date', 'order__customer_state', 'product_id', 'product__supplier_id',
+            'quantity', 'subtotal',
+        )
+    )
+    if not items:
+        return deltas
+
+    # Fornecedores que seguem no pedido por outros produtos não perdem o pedido
+    remaining = set(
+        OrderItem.objects.filter(order_id__in={item[0] for item in items})
+        .exclude(product_id__in=product_ids)
+        .values_list('order_id', 'product__supplier_id')
+    )
+    seen = set()
+    for order_id, order_date, state, product_id, supplier_id, quantity, subtotal in items:
+        day = timezone.localdate(order_date)
+        for model, key in ((DailyProductSales, product_id), (DailySupplierSales, supplier_id)):
+            totals = deltas[model].setdefault((day, key), [Decimal(0), 0, 0])
+            totals[0] += subtotal
+            totals[2] += quantity
+            if (model, order_id, key) not in seen:
+                seen.add((model, order_id, key))
+                if model is DailyProductSales or (order_id, key) not in remaining:
+                    totals[1] += 1
+        # O valor do pedido (total_amount) não muda, só as unidades
+        totals = deltas[DailyStateSales].setdefault((day, state or ''), [Decimal(0), 0, 0])
+        totals[2] += quantity
+    return deltas
+
+
+def _apply(deltas, sign):
+    with transaction.atomic():
+        for model, field in TABLES:
+            entries = deltas[model]
+            if not entries:
+                continue
+            model.objects.bulk_create(
+                [model(date=day, **{field: key}) for day, key in entries],
+                ignore_conflicts=True,
+            )
+            rows = model.objects.select_for_update().filter(
+                date__in={day for day, _ in entries},
+                **{f'{field}__in': {key for _, key in entries}},
+            )
+            changed = []
+            for row in rows:
+                totals = entries.get((row.date, getattr(row, field)))
+                if totals is None:
+                    continue
+                row.revenue += sign * totals[0]
+                row.orders += sign * totals[1]
+                row.units += sign * totals[2]
+                changed.append(row)
+            model.objects.bulk_update(changed, TOTAL_FIELDS, batch_size=1000)
+            if sign < 0:
+                model.objects.filter(pk__in=[row.pk for row in changed if row.orders <= 0]).delete()
+
+
+def add_orders(orders):
+    """Soma pedidos recém-criados (com os itens já gravados) aos totais diários."""
+    _apply(_order_deltas(orders), 1)
+
+
+def remove_orders(orders):
+    """Subtrai dos totais diários pedidos que vão ser excluídos."""
+    _apply(_order_deltas(orders), -1)
+
+
+def remove_products(products):
+    """Subtrai dos totais diários os itens de produtos que vão ser excluídos."""
+    _apply(_product_deltas([product.pk for product in products]), -1)
+
+
+def rebuild_rollups(since=None):
+    """
+    Recalcula os totais diários a partir dos pedidos, com consultas agrupadas.
+
+    Args:
+        since: Data inicial (inclusive); None recalcula todo o histórico
+
+    Returns:
+        Dicionário {nome da tabela: linhas gravadas}
+    """
+    orders = Order.objects.order_by()
+    items = OrderItem.objects.order_by()
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        orders = orders.filter(order_date__gte=start)
+        items = items.filter(order__order_date__gte=start)
+
+    items = items.annotate(day=TruncDate('order__order_date'))
+    totals = {'revenue': Sum('subtotal'), 'orders': Count('order_id', distinct=True), 'units': Sum('quantity')}
+    rows = {
+        DailyProductSales: [
+            DailyProductSales(date=row['day'], product_id=row['product_id'], **{f: row[f] for f in TOTAL_FIELDS})
+            for row in items.values('day', 'product_id').annotate(**totals)
+        ],
+        DailySupplierSales: [
+            DailySupplierSales(
+                date=row['day'], supplier_id=row['product__supplier_id'], **{f: row[f] for f in TOTAL_FIELDS}
+            )
+            for row in items.values('day', 'product__supplier_id').annotate(**totals)
+        ],
+    }
+
+    units = {
+        (row['day'], row['order__customer_state'] or ''): row['units']
+        for row in items.values('day', 'order__customer_state').annotate(units=Sum('quantity'))
+    }
+    states = {}
+    for row in (
+        orders.annotate(day=TruncDate('order_date'))
+        .values('day', 'customer_state')
+        .annotate(revenue=Sum('total_amount'), orders=Count('id'))
+    ):
+        key = (row['day'], row['customer_state'] or '')
+        # Sem estado cadastrado, nulo e vazio caem na mesma linha
+        state = states.setdefault(key, DailyStateSales(date=key[0], state=key[1], revenue=0, orders=0, units=0))
+        state.revenue += row['revenue']
+        state.orders += row['orders']
+    for key, state in states.items():
+        state.units = units.get(key, 0)
+    rows[DailyStateSales] = list(states.values())
+
+    with transaction.atomic():
+        for model, _ in TABLES:
+            existing = model.objects.all()
+            if since is not None:
+                existing = existing.filter(date__gte=since)
+            existing.delete()
+            model.objects.bulk_create(rows[model], batch_size=2000)
+
+    return {model._meta.db_table: len(rows[model]) for model, _ in TABLES}
+
+
+def sales_overview(days=30, top=5):
+    """
+    Números do painel inicial para os últimos `days` dias, lidos só das tabelas diárias.
+
+    Returns:
+        Dicionário com start, revenue, orders, units, daily (valor por dia)
+        e as listas top_products, top_states e top_suppliers
+    """
+    start = timezone.localdate() - timedelta(days=days - 1)
+    states = DailyStateSales.objects.filter(date__gte=start)
+    overview = states.aggregate(revenue=Sum('revenue'), orders=Sum('orders'), units=Sum('units'))
+
+    return {
+        'start': start,
+        'revenue': overview['revenue'] or Decimal(0),
+        'orders': overview['orders'] or 0,
+        'units': overview['units'] or 0,
+        'daily': list(states.values('date').annotate(revenue=Sum('revenue'), orders=Sum('orders')).order_by('date')),
+        'top_products': list(
+            DailyProductSales.objects.filter(date__gte=start)
+            .values('product_id', 'product__description')
+            .annotate(revenue=Sum('revenue'), units=Sum('units'))
+            .order_by('-revenue')[:top]
+        ),
+        'top_states': list(
+            states.values('state').annotate(revenue=Sum('revenue'), orders=Sum('orders')).order_by('-revenue')[:top]
+        ),
+        'top_suppliers': list(
+            DailySupplierSales.objects.filter(date__gte=start)
+            .values('supplier_id', 'supplier__name')
+            .annotate(revenue=Sum('revenue'), units=Sum('units'))
+            .order_by('-revenue')[:top]
+        ),
+    }
@@ -0,0 +1,19 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from order.models import Order
+from product.models import Product
+
+from .services import remove_orders, remove_products
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_rollups(sender, instance, **kwargs):
+    """Subtrai o pedido dos totais diários enquanto os itens ainda existem."""
+    remove_orders([instance])
+
+
+@receiver(pre_delete, sender=Product)
+def remove_product_items_from_rollups(sender, instance, **kwargs):
+    """Subtrai os itens do produto, que a exclusão apaga em cascata sem apagar os pedidos."""
+    remove_products([instance])
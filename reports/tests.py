@@ -0,0 +1,156 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from budget.models import Budget, BudgetItem
+from budget.services import convert_budgets
+from customers.models import Customer
+from customers.services import merge_customers
+from order.services import create_order, create_orders_bulk
+from product.models import Product
+from suppliers.models import Supplier
+
+from .models import DailyProductSales, DailyStateSales, DailySupplierSales
+
+
+def rollup_rows():
+    return {
+        'product': sorted(DailyProductSales.objects.values_list('date', 'product_id', 'revenue', 'orders', 'units')),
+        'state': sorted(DailyStateSales.objects.values_list('date', 'state', 'revenue', 'orders', 'units')),
+        'supplier': sorted(DailySupplierSales.objects.values_list('date', 'supplier_id', 'revenue', 'orders', 'units')),
+    }
+
+
+class SalesRollupTest(TestCase):
+    """Testes para os totais diários de vendas"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.sp = Customer.objects.create(name='Cliente SP', state='SP')
+        self.rj = Customer.objects.create(name='Cliente RJ', state='RJ')
+        self.no_state = Customer.objects.create(name='Cliente Sem Estado')
+        self.supplier = Supplier.objects.create(name='Fornecedor A', cnpj='12.345.678/0001-90')
+        self.other_supplier = Supplier.objects.create(name='Fornecedor B', cnpj='98.765.432/0001-10')
+        self.product1 = Product.objects.create(
+            description='Produto 1', price=Decimal('10.00'), qty_stock=100, supplier=self.supplier,
+        )
+        self.product2 = Product.objects.create(
+            description='Produto 2', price=Decimal('5.00'), qty_stock=100, supplier=self.supplier,
+        )
+        self.product3 = Product.objects.create(
+            description='Produto 3', price=Decimal('20.00'), qty_stock=100, supplier=self.other_supplier,
+        )
+        self.today = timezone.localdate()
+
+    def test_incremental_rollups(self):
+        """Testa a soma de pedidos criados e a subtração de pedidos excluídos"""
+        first = create_order(self.sp, [(self.product1.id, 2), (self.product2.id, 1)])
+        create_order(self.sp, [(self.product1.id, 1)])
+        create_order(self.rj, [(self.product3.id, 3)])
+
+        state = DailyStateSales.objects.get(date=self.today, state='SP')
+        self.assertEqual((state.revenue, state.orders, state.units), (Decimal('35.00'), 2, 4))
+        product = DailyProductSales.objects.get(date=self.today, product=self.product1)
+        self.assertEqual((product.revenue, product.orders, product.units), (Decimal('30.00'), 2, 3))
+        supplier = DailySupplierSales.objects.get(date=self.today, supplier=self.supplier)
+        self.assertEqual((supplier.revenue, supplier.orders, supplier.units), (Decimal('35.00'), 2, 4))
+
+        first.delete()
+        state.refresh_from_db()
+        self.assertEqual((state.revenue, state.orders, state.units), (Decimal('10.00'), 1, 1))
+        self.assertFalse(DailyProductSales.objects.filter(product=self.product2).exists())
+
+    def test_state_is_taken_at_sale_time(self):
+        """Testa que mudar o estado do cliente ou fundi-lo não desencontra os totais por estado"""
+        order = create_order(self.sp, [(self.product1.id, 1)])
+        self.sp.state = 'MG'
+        self.sp.save()
+        moved = create_order(self.rj, [(self.product2.id, 1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            merge_customers(self.sp, [self.rj])
+
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(
+            sorted(DailyStateSales.objects.values_list('state', 'revenue')),
+            [('RJ', Decimal('5.00')), ('SP', Decimal('10.00'))],
+        )
+
+        order.delete()
+        moved.delete()
+        self.assertFalse(DailyStateSales.objects.exists())
+
+    def test_bulk_paths_and_rebuild(self):
+        """Testa pedidos em lote e conversão de orçamentos, e que o recálculo chega aos mesmos totais"""
+        yesterday = timezone.now() - timedelta(days=1)
+        results = create_orders_bulk([
+            {'customer': self.rj.id, 'items': [{'product': self.product1.id, 'quantity': 4}]},
+            {
+                'customer': self.no_state.id,
+                'items': [{'product': self.product3.id, 'quantity': 1}, {'product': self.product2.id, 'quantity': 2}],
+                'order_date': yesterday.isoformat(),
+            },
+        ])
+        self.assertEqual([result['status'] for result in results], ['created', 'created'])
+
+        budget = Budget.objects.create(customer=self.sp, total_amount=Decimal('20.00'))
+        BudgetItem.objects.create(budget=budget, product=self.product3, quantity=1, subtotal=Decimal('20.00'))
+        convert_budgets([budget.id])
+
+        self.assertEqual(
+            DailyStateSales.objects.get(date=timezone.localdate(yesterday), state='').revenue, Decimal('30.00')
+        )
+        incremental = rollup_rows()
+
+        out = StringIO()
+        call_command('rebuild_sales_rollups', stdout=out)
+        self.assertIn('Totais diários recalculados', out.getvalue())
+        self.assertEqual(rollup_rows(), incremental)
+
+        call_command('rebuild_sales_rollups', since=self.today.isoformat(), stdout=StringIO())
+        self.assertEqual(rollup_rows(), incremental)
+
+    def test_product_and_supplier_deletion(self):
+        """Testa que excluir produto ou fornecedor (itens em cascata) deixa os totais iguais ao recálculo"""
+        create_order(self.sp, [(self.product1.id, 2), (self.product2.id, 1)])
+        create_order(self.rj, [(self.product2.id, 3), (self.product3.id, 1)])
+        create_order(self.sp, [(self.product3.id, 2)])
+
+        def assert_matches_rebuild():
+            incremental = rollup_rows()
+            call_command('rebuild_sales_rollups', stdout=StringIO())
+            self.assertEqual(rollup_rows(), incremental)
+
+        self.product2.delete()
+        supplier = DailySupplierSales.objects.get(date=self.today, supplier=self.supplier)
+        self.assertEqual((supplier.revenue, supplier.orders, supplier.units), (Decimal('20.00'), 1, 2))
+        state = DailyStateSales.objects.get(date=self.today, state='RJ')
+        self.assertEqual((state.revenue, state.orders, state.units), (Decimal('35.00'), 1, 1))
+        assert_matches_rebuild()
+
+        self.other_supplier.delete()
+        self.assertEqual(DailyStateSales.objects.get(date=self.today, state='SP').units, 2)
+        assert_matches_rebuild()
+
+    def test_home_overview(self):
+        """Testa os números do painel inicial"""
+        create_order(self.sp, [(self.product1.id, 2)])
+        create_order(self.rj, [(self.product3.id, 1)])
+
+        User = get_user_model()
+        User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+
+        sales = client.get(reverse('home')).context['sales']
+        self.assertEqual(sales['revenue'], Decimal('40.00'))
+        self.assertEqual(sales['orders'], 2)
+        self.assertEqual(sales['units'], 3)
+        self.assertEqual(sales['top_products'][0]['product__description'], 'Produto 1')
+        self.assertEqual([row['state'] for row in sales['top_states']], ['SP', 'RJ'])
+        self.assertEqual(len(sales['daily']), 1)
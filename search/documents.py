@@ -0,0 +1,63 @@
+"""
+Montagem do texto indexado de cada tipo de cadastro.
+
+As funções recebem a instância (ou um modelo histórico, na migração de
+carga inicial) e devolvem (título, conteúdo). O conteúdo é normalizado
+para minúsculas sem acentos, e documentos como CPF e CNPJ entram tanto
+formatados quanto só com dígitos.
+"""
+import re
+import unicodedata
+
+NON_DIGITS = re.compile(r'\D')
+
+
+def normalize(text):
+    """Minúsculas e sem acentos, para que 'João' e 'joao' se encontrem."""
+    text = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def _content(*values):
+    parts = []
+    for value in values:
+        if value:
+            value = str(value)
+            parts.append(value)
+            digits = NON_DIGITS.sub('', value)
+            if digits and digits != value and len(digits) >= 8:
+                parts.append(digits)
+    return normalize(' '.join(parts))
+
+
+def customer_document(customer):
+    return customer.name, _content(
+        customer.name, customer.cpf, customer.email, customer.mobile, customer.city,
+    )
+
+
+def supplier_document(supplier):
+    return supplier.name, _content(
+        supplier.name, supplier.cnpj, supplier.email, supplier.mobile, supplier.phone, supplier.city,
+    )
+
+
+def product_document(product):
+    supplier = product.supplier
+    return product.description, _content(
+        product.description, supplier.name if supplier is not None else '',
+    )
+
+
+def order_document(order):
+    customer = order.customer
+    return f'Pedido #{order.pk} - {customer.name}', _content(
+        f'pedido {order.pk}', customer.name, customer.cpf, customer.email,
+    )
+
+
+def budget_document(budget):
+    customer = budget.customer
+    return f'Orçamento #{budget.pk} - {customer.name}', _content(
+        f'orçamento {budget.pk}', customer.name, customer.cpf, customer.email,
+    )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from budget.models import Budget
+from customers.models import Customer
+from order.models import Order
+from product.models import Product
+from search.models import SearchDocument
+from search.services import index_objects
+from suppliers.models import Supplier
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca de clientes, fornecedores, produtos, pedidos e orçamentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sources = [
+            (SearchDocument.KIND_CUSTOMER, Customer.objects.all()),
+            (SearchDocument.KIND_SUPPLIER, Supplier.objects.all()),
+            (SearchDocument.KIND_PRODUCT, Product.objects.select_related('supplier')),
+            (SearchDocument.KIND_ORDER, Order.objects.select_related('customer')),
+            (SearchDocument.KIND_BUDGET, Budget.objects.select_related('customer')),
+        ]
+
+        SearchDocument.objects.all().delete()
+        for kind, queryset in sources:
+            total = 0
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    total += index_objects(kind, batch, batch_size)
+                    batch = []
+            total += index_objects(kind, batch, batch_size)
+            self.stdout.write(f'{kind}: {total} documento(s) indexado(s)')
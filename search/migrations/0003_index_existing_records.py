@@ -0,0 +1,37 @@
+from django.db import migrations
+
+from search.documents import customer_document, product_document, supplier_document
+
+BATCH_SIZE = 500
+
+
+def index_existing(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    sources = [
+        ('customer', apps.get_model('customers', 'Customer').objects.all(), customer_document),
+        ('supplier', apps.get_model('suppliers', 'Supplier').objects.all(), supplier_document),
+        ('product', apps.get_model('product', 'Product').objects.select_related('supplier'), product_document),
+    ]
+    for kind, queryset, build in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+            title, content = build(obj)
+            batch.append(SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], content=content))
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_fulltext_index'),
+        ('customers', '0005_customer_name_id_idx'),
+        ('suppliers', '0004_alter_supplier_id'),
+        ('product', '0005_stock_checkpoints'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
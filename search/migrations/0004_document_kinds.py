@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_index_existing_records'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='searchdocument',
+            name='kind',
+            field=models.CharField(choices=[('customer', 'Cliente'), ('supplier', 'Fornecedor'), ('product', 'Produto'), ('order', 'Pedido'), ('budget', 'Orçamento')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from search.documents import budget_document, order_document
+
+BATCH_SIZE = 500
+
+
+def index_existing(apps, schema_editor):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    sources = [
+        ('order', apps.get_model('order', 'Order').objects.select_related('customer'), order_document),
+        ('budget', apps.get_model('budget', 'Budget').objects.select_related('customer'), budget_document),
+    ]
+    for kind, queryset, build in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+            title, content = build(obj)
+            batch.append(SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], content=content))
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0004_document_kinds'),
+        ('order', '0003_order_idempotency_key'),
+        ('budget', '0007_budget_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import models
+
+# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Texto pesquisável de um cadastro, já em minúsculas e sem acentos.
+
+    No SQLite a tabela é a origem de um índice FTS5 (search_fts) mantido por
+    triggers; no Postgres, de índices GIN de tsvector e trigramas.
+    """
+    KIND_CUSTOMER = 'customer'
+    KIND_SUPPLIER = 'supplier'
+    KIND_PRODUCT = 'product'
+    KIND_ORDER = 'order'
+    KIND_BUDGET = 'budget'
+    KIND_CHOICES = [
+        (KIND_CUSTOMER, 'Cliente'),
+        (KIND_SUPPLIER, 'Fornecedor'),
+        (KIND_PRODUCT, 'Produto'),
+        (KIND_ORDER, 'Pedido'),
+        (KIND_BUDGET, 'Orçamento'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    title = models.CharField(max_length=255)
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.title}"
@@ -0,0 +1,232 @@
+"""
+Busca textual sobre a tabela SearchDocument.
+
+No SQLite usa o índice FTS5 (ordenado por bm25); no Postgres, tsvector com
+ts_rank. Em ambos, cada palavra digitada vira uma busca por prefixo e todas
+precisam aparecer. Se a busca textual não encontrar nada, cai para busca
+por substring sobre o conteúdo normalizado (índice de trigramas no Postgres).
+
+As listagens de cadastros pedem `substrings=True` e `limit=None`: aí os
+resultados da busca textual vêm primeiro e são completados pelos que só
+combinam no meio da palavra ("ana" também acha "Juliana"), sem corte.
+"""
+import re
+import time
+from contextlib import contextmanager
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, IntegerField, Q, When
+
+from .documents import (
+    budget_document, customer_document, normalize, order_document, product_document, supplier_document,
+)
+from .models import SearchDocument
+
+SEARCH_LIMIT = 200
+
+BUILDERS = {
+    SearchDocument.KIND_CUSTOMER: customer_document,
+    SearchDocument.KIND_SUPPLIER: supplier_document,
+    SearchDocument.KIND_PRODUCT: product_document,
+    SearchDocument.KIND_ORDER: order_document,
+    SearchDocument.KIND_BUDGET: budget_document,
+}
+
+
+class SearchTimeout(Exception):
+    """Levantada quando a busca estoura o tempo máximo informado."""
+
+
+def index_objects(kind, objects, batch_size=500):
+    """Cria ou atualiza os documentos dos objetos informados."""
+    build = BUILDERS[kind]
+    documents = []
+    for obj in objects:
+        title, content = build(obj)
+        documents.append(SearchDocument(kind=kind, object_id=obj.pk, title=title[:255], content=content))
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'content', 'updated_at'],
+    )
+    return len(documents)
+
+
+def remove_objects(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+
+def tokenize(query):
+    return re.findall(r'\w+', normalize(query))
+
+
+def _fulltext(tokens, kinds, limit):
+    table = SearchDocument._meta.db_table
+    kind_sql = ', '.join(['%s'] * len(kinds))
+    if connection.vendor == 'sqlite':
+        sql = (
+            f'SELECT d.kind, d.object_id FROM search_fts '
+            f'JOIN {table} d ON d.id = search_fts.rowid '
+            f'WHERE search_fts MATCH %s AND d.kind IN ({kind_sql}) '
+            f'ORDER BY bm25(search_fts)'
+        )
+        match = ' '.join(f'"{token}"*' for token in tokens)
+    elif connection.vendor == 'postgresql':
+        sql = (
+            f"SELECT kind, object_id FROM {table} "
+            f"WHERE to_tsvector('simple', content) @@ to_tsquery('simple', %s) AND kind IN ({kind_sql}) "
+            f"ORDER BY ts_rank(to_tsvector('simple', content), to_tsquery('simple', %s)) DESC"
+        )
+        match = ' & '.join(f'{token}:*' for token in tokens)
+    else:
+        return None
+
+    params = [match, *kinds]
+    if connection.vendor == 'postgresql':
+        params.append(match)
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+@contextmanager
+def _time_limit(seconds):
+    """Interrompe no banco a consulta que passar de `seconds` (SQLite e Postgres)."""
+    if connection.vendor == 'sqlite':
+        connection.ensure_connection()
+        deadline = time.monotonic() + seconds
+        connection.connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        try:
+            yield
+        finally:
+            connection.connection.set_progress_handler(None, 0)
+    elif connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s', [max(int(seconds * 1000), 1)])
+            yield
+    else:
+        yield
+
+
+def _within(deadline, run):
+    if deadline is None:
+        return run()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise SearchTimeout()
+    try:
+        with _time_limit(remaining):
+            return run()
+    except OperationalError as e:
+        if time.monotonic() >= deadline:
+            raise SearchTimeout() from e
+        raise
+
+
+def _substring(tokens, kinds, limit):
+    documents = SearchDocument.objects.filter(kind__in=kinds)
+    for token in tokens:
+        documents = documents.filter(content__contains=token)
+    rows = documents.order_by('title', 'id').values_list('kind', 'object_id')
+    return list(rows if limit is None else rows[:limit])
+
+
+def search(query, kinds=None, limit=SEARCH_LIMIT, timeout=None, substrings=False):
+    """
+    Busca nos cadastros indexados.
+
+    Args:
+        query: Texto digitado (acentos e maiúsculas são ignorados)
+        kinds: Tipos de documento (SearchDocument.KIND_*); todos se omitido
+        limit: Quantidade máxima de resultados; None para todos
+        timeout: Tempo máximo em segundos (opcional)
+        substrings: Completa a busca textual com os documentos que só
+            contêm as palavras no meio (por título), mesmo quando ela acha algo
+
+    Returns:
+        Lista de tuplas (kind, object_id), da mais relevante para a menos
+
+    Raises:
+        SearchTimeout: Se o tempo máximo for ultrapassado
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    deadline = time.monotonic() + timeout if timeout else None
+    return _search(tokens, list(kinds or BUILDERS), limit, deadline, substrings)
+
+
+def _search(tokens, kinds, limit, deadline, substrings=False):
+    rows = _within(deadline, lambda: _fulltext(tokens, kinds, limit))
+    if not rows:
+        return _within(deadline, lambda: _substring(tokens, kinds, limit))
+    if substrings and (limit is None or len(rows) < limit):
+        found = set(rows)
+        rows = list(rows)
+        for row in _within(deadline, lambda: _substring(tokens, kinds, limit)):
+            if row not in found:
+                rows.append(row)
+        if limit is not None:
+            rows = rows[:limit]
+    return rows
+
+
+def grouped_search(query, per_kind=5, timeout=None):
+    """
+    Melhores resultados de cada tipo de cadastro para a busca global.
+
+    Cada tipo tem sua própria consulta limitada a `per_kind`, todas dentro
+    do mesmo prazo: pedidos e orçamentos repetem nome, CPF e e-mail do
+    cliente, e numa consulta única um cliente com muitos pedidos tiraria
+    todos os outros grupos (inclusive o próprio cliente) do resultado.
+
+    Returns:
+        Tupla (dicionário {kind: [(object_id, title), ...]}, estourou o tempo);
+        se o tempo estourar, vêm os grupos encontrados até ali
+    """
+    tokens = tokenize(query)
+    deadline = time.monotonic() + timeout if timeout else None
+    groups = {}
+    timed_out = False
+    if tokens:
+        for kind in BUILDERS:
+            try:
+                rows = _search(tokens, [kind], per_kind, deadline)
+            except SearchTimeout:
+                timed_out = True
+                break
+            if rows:
+                groups[kind] = [object_id for _, object_id in rows]
+
+    titles = {}
+    if groups:
+        condition = Q()
+        for kind, object_ids in groups.items():
+            condition |= Q(kind=kind, object_id__in=object_ids)
+        titles = {
+            (kind, object_id): title
+            for kind, object_id, title in SearchDocument.objects.filter(condition).values_list('kind', 'object_id', 'title')
+        }
+    return {
+        kind: [(object_id, titles.get((kind, object_id), '')) for object_id in object_ids]
+        for kind, object_ids in groups.items()
+    }, timed_out
+
+
+def search_ids(kind, query, limit=SEARCH_LIMIT, substrings=False):
+    """Ids dos objetos de um tipo que combinam com a busca, por relevância."""
+    return [object_id for _, object_id in search(query, [kind], limit, substrings=substrings)]
+
+
+def rank_by(queryset, ids):
+    """Filtra o queryset pelos ids e ordena na mesma ordem da lista."""
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
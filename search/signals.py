@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from budget.models import Budget
+from customers.models import Customer
+from order.models import Order
+from product.models import Product
+from suppliers.models import Supplier
+
+from .models import SearchDocument
+from .services import index_objects, remove_objects
+
+
+# Campos do cliente que entram nos documentos de pedidos e orçamentos
+ORDER_DOCUMENT_FIELDS = ('name', 'cpf', 'email')
+
+
+@receiver(pre_save, sender=Customer)
+def remember_customer_document_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Guarda os valores gravados antes de salvar, para o post_save saber se mudaram."""
+    instance._document_fields = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(ORDER_DOCUMENT_FIELDS):
+        instance._document_fields = tuple(getattr(instance, field) for field in ORDER_DOCUMENT_FIELDS)
+        return
+    instance._document_fields = (
+        Customer.objects.filter(pk=instance.pk).values_list(*ORDER_DOCUMENT_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Customer)
+def index_customer(sender, instance, created=False, raw=False, **kwargs):
+    """Reindexa o cliente e, se nome, CPF ou e-mail mudaram, seus pedidos e orçamentos."""
+    if raw:
+        return
+    index_objects(SearchDocument.KIND_CUSTOMER, [instance])
+    previous = getattr(instance, '_document_fields', None)
+    if created or previous == tuple(getattr(instance, field) for field in ORDER_DOCUMENT_FIELDS):
+        return
+    index_objects(SearchDocument.KIND_ORDER, Order.objects.filter(customer=instance).select_related('customer'))
+    index_objects(SearchDocument.KIND_BUDGET, Budget.objects.filter(customer=instance).select_related('customer'))
+
+
+@receiver(post_save, sender=Supplier)
+def index_supplier(sender, instance, raw=False, **kwargs):
+    """Reindexa o fornecedor e seus produtos, que incluem o nome dele."""
+    if not raw:
+        index_objects(SearchDocument.KIND_SUPPLIER, [instance])
+        index_objects(SearchDocument.KIND_PRODUCT, instance.product_set.select_related('supplier'))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects(SearchDocument.KIND_PRODUCT, [instance])
+
+
+@receiver(post_save, sender=Order)
+def index_order(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects(SearchDocument.KIND_ORDER, [instance])
+
+
+@receiver(post_save, sender=Budget)
+def index_budget(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects(SearchDocument.KIND_BUDGET, [instance])
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Budget)
+def remove_document(sender, instance, **kwargs):
+    kind = {
+        Customer: SearchDocument.KIND_CUSTOMER,
+        Supplier: SearchDocument.KIND_SUPPLIER,
+        Product: SearchDocument.KIND_PRODUCT,
+        Order: SearchDocument.KIND_ORDER,
+        Budget: SearchDocument.KIND_BUDGET,
+    }[sender]
+    remove_objects(kind, [instance.pk])
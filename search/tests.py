@@ -0,0 +1,217 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from budget.services import convert_budgets, create_budget
+from config.pagination import PAGE_SIZE
+from customers.models import Customer
+from order.models import Order
+from order.services import create_order
+from product.models import Product
+from suppliers.models import Supplier
+
+from .models import SearchDocument
+from .services import SEARCH_LIMIT, SearchTimeout, grouped_search, search, search_ids
+
+Employee = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+    """Testes para o índice de busca"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.joao = Customer.objects.create(name='João Conceição', cpf='529.982.247-25', email='jc@test.com')
+        self.maria = Customer.objects.create(name='Maria Joana', email='maria@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Distribuidora Café Bom',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Pó de Café 500g', price=20, qty_stock=5, supplier=self.supplier
+        )
+
+    def test_accent_insensitive_prefix_search(self):
+        """Testa que acentos e maiúsculas são ignorados e que palavras valem como prefixo"""
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'joao conceicao'), [self.joao.id])
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'JOÃO CONC'), [self.joao.id])
+        self.assertEqual(
+            sorted(search_ids(SearchDocument.KIND_CUSTOMER, 'jo')), sorted([self.joao.id, self.maria.id])
+        )
+
+    def test_documents_by_digits_and_kind(self):
+        """Testa busca por CPF/CNPJ com ou sem formatação e o filtro por tipo"""
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, '52998224725'), [self.joao.id])
+        self.assertEqual(search_ids(SearchDocument.KIND_SUPPLIER, '12.345.678'), [self.supplier.id])
+        self.assertEqual(
+            sorted(search('cafe')),
+            [(SearchDocument.KIND_PRODUCT, self.product.id), (SearchDocument.KIND_SUPPLIER, self.supplier.id)],
+        )
+
+    def test_substring_fallback(self):
+        """Testa a busca por trecho do meio quando não há prefixo correspondente"""
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, '8224'), [self.joao.id])
+
+    def test_index_follows_changes(self):
+        """Testa que alterações e exclusões atualizam o índice"""
+        self.joao.name = 'José Conceição'
+        self.joao.save()
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'joao'), [])
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'jose'), [self.joao.id])
+
+        self.supplier.name = 'Atacado Central'
+        self.supplier.save()
+        self.assertEqual(search_ids(SearchDocument.KIND_PRODUCT, 'atacado'), [self.product.id])
+
+        self.maria.delete()
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'maria'), [])
+
+    def test_rebuild_command(self):
+        """Testa a reconstrução completa do índice"""
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search('joao'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search_ids(SearchDocument.KIND_CUSTOMER, 'joao'), [self.joao.id])
+        self.assertEqual(SearchDocument.objects.count(), 4)
+
+    def test_list_views_use_index(self):
+        """Testa as listagens de clientes e fornecedores com busca"""
+        client = Client()
+        Employee.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        client.login(username='testuser', password='testpass123')
+
+        response = client.get(reverse('customers:customer_list'), {'search': 'conceicao'})
+        self.assertEqual(list(response.context['customers']), [self.joao])
+
+        response = client.get('/suppliers/', {'search': 'cafe'})
+        self.assertEqual(list(response.context['suppliers']), [self.supplier])
+
+    def test_list_search_is_paginated(self):
+        """Testa que a listagem pagina todos os resultados e inclui trechos do meio das palavras"""
+        Customer.objects.bulk_create([Customer(name=f'Ana Cliente {i}') for i in range(SEARCH_LIMIT + 10)])
+        call_command('rebuild_search_index', stdout=StringIO())
+        juliana = Customer.objects.create(name='Juliana Prado')
+
+        client = Client()
+        Employee.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        client.login(username='testuser', password='testpass123')
+
+        customers = []
+        query = {'search': 'ana'}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(reverse('customers:customer_list'), query)
+                page = list(response.context['customers'])
+            self.assertLessEqual(len(page), PAGE_SIZE)
+            # Só os ids da página entram no CASE da ordenação
+            self.assertLessEqual(max(query['sql'].count(' WHEN ') for query in queries.captured_queries), PAGE_SIZE)
+            customers.extend(page)
+            if not response.context['next_query']:
+                break
+            query = QueryDict(response.context['next_query'])
+
+        self.assertEqual(len(customers), SEARCH_LIMIT + 12)
+        self.assertEqual(len(set(customers)), SEARCH_LIMIT + 12)
+        # Os resultados por prefixo vêm antes dos que só contêm o trecho, por título
+        self.assertEqual(customers[-2:], [juliana, self.maria])
+        self.assertEqual(len(search_ids(SearchDocument.KIND_CUSTOMER, 'ana')), SEARCH_LIMIT)
+
+
+class GlobalSearchTest(TestCase):
+    """Testes para a busca global"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        Employee.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.customer = Customer.objects.create(name='Renata Albuquerque', email='renata@test.com')
+        self.supplier = Supplier.objects.create(
+            name='Albuquerque Distribuidora',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com'
+        )
+        self.product = Product.objects.create(
+            description='Caneta Azul', price=2, qty_stock=50, supplier=self.supplier
+        )
+
+    def test_grouped_results(self):
+        """Testa os grupos por tipo de cadastro, incluindo pedidos e orçamentos"""
+        order = create_order(self.customer, [(self.product.id, 1)])
+        budget = create_budget(self.customer, [(self.product.id, 2)])
+
+        data = self.client.get(reverse('global_search'), {'q': 'albuquerque'}).json()
+        self.assertFalse(data['timed_out'])
+        groups = {group['kind']: group['results'] for group in data['groups']}
+        self.assertEqual(
+            set(groups),
+            {SearchDocument.KIND_CUSTOMER, SearchDocument.KIND_SUPPLIER, SearchDocument.KIND_PRODUCT,
+             SearchDocument.KIND_ORDER, SearchDocument.KIND_BUDGET},
+        )
+        self.assertEqual(groups[SearchDocument.KIND_ORDER][0]['id'], order.id)
+        self.assertEqual(groups[SearchDocument.KIND_ORDER][0]['url'], reverse('order_detail', args=[order.id]))
+        self.assertEqual(groups[SearchDocument.KIND_BUDGET][0]['id'], budget.id)
+        self.assertEqual(groups[SearchDocument.KIND_PRODUCT][0]['url'], f'/suppliers/edit/{self.supplier.id}/')
+
+        data = self.client.get(reverse('global_search'), {'q': f'pedido {order.id}'}).json()
+        self.assertEqual([group['kind'] for group in data['groups']], [SearchDocument.KIND_ORDER])
+
+    def test_each_kind_has_its_own_quota(self):
+        """Testa que um cliente com muitos pedidos ainda aparece no grupo de clientes"""
+        # Celular e cidade deixam o documento do cliente mais longo (bm25 menor) que os dos pedidos
+        customer = Customer.objects.create(
+            name='João Pereira', email='joao.pereira@exemplo.com', mobile='(11) 98765-4321', city='São José dos Campos',
+        )
+        Order.objects.bulk_create([Order(customer=customer, total_amount=10) for _ in range(120)])
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        for query in ('joao', 'pereira'):
+            groups, timed_out = grouped_search(query)
+            self.assertFalse(timed_out)
+            self.assertEqual(groups[SearchDocument.KIND_CUSTOMER], [(customer.id, 'João Pereira')])
+            self.assertEqual(len(groups[SearchDocument.KIND_ORDER]), 5)
+
+    def test_customer_rename_reindexes_documents(self):
+        """Testa que pedidos acompanham a troca de nome do cliente"""
+        order = create_order(self.customer, [(self.product.id, 1)])
+        self.customer.name = 'Renata Figueiredo'
+        self.customer.save()
+        self.assertEqual(search_ids(SearchDocument.KIND_ORDER, 'figueiredo'), [order.id])
+
+    def test_customer_save_skips_unchanged_documents(self):
+        """Testa que pedidos só são reindexados quando nome, CPF ou e-mail mudam"""
+        order = create_order(self.customer, [(self.product.id, 1)])
+        documents = SearchDocument.objects.filter(kind=SearchDocument.KIND_ORDER, object_id=order.id)
+        documents.delete()
+
+        self.customer.city = 'Recife'
+        self.customer.save()
+        self.customer.email = 'renata@test.com'
+        self.customer.save(update_fields=['city', 'email'])
+        self.assertFalse(documents.exists())
+
+        self.customer.email = 'renata.a@test.com'
+        self.customer.save()
+        self.assertTrue(documents.exists())
+
+    def test_bulk_conversion_is_indexed(self):
+        """Testa que pedidos criados em lote também entram no índice"""
+        budget = create_budget(self.customer, [(self.product.id, 1)])
+        result, = convert_budgets([budget.id])
+        self.assertIn(result['order'].id, search_ids(SearchDocument.KIND_ORDER, 'renata'))
+
+    def test_timeout(self):
+        """Testa que a busca respeita o tempo máximo"""
+        with self.assertRaises(SearchTimeout):
+            search('albuquerque', timeout=1e-9)
+        with self.settings(GLOBAL_SEARCH_TIMEOUT_MS=0.000001):
+            data = self.client.get(reverse('global_search'), {'q': 'albuquerque'}).json()
+        self.assertTrue(data['timed_out'])
+        self.assertEqual(data['groups'], [])
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0004_alter_supplier_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='cnpj_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='mobile_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Preenche as colunas só com dígitos dos fornecedores já cadastrados
+# (o comando backfill_document_digits continua disponível para reexecuções)
+
+from django.db import migrations
+
+from config.validators import only_digits
+
+BATCH_SIZE = 2000
+COLUMNS = {'cnpj_digits': 'cnpj', 'mobile_digits': 'mobile', 'phone_digits': 'phone'}
+
+
+def fill_digits(apps, schema_editor):
+    Model = apps.get_model('suppliers', 'Supplier')
+    batch = []
+    for row in Model.objects.only('id', *COLUMNS.values()).iterator(chunk_size=BATCH_SIZE):
+        for shadow, source in COLUMNS.items():
+            setattr(row, shadow, only_digits(getattr(row, source)))
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            Model.objects.bulk_update(batch, list(COLUMNS))
+            batch = []
+    Model.objects.bulk_update(batch, list(COLUMNS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0005_document_digits'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_digits, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import RegexValidator, EmailValidator
 
+from config.validators import only_digits
+
 class Supplier(models.Model):
     BRAZILIAN_STATES = [
         ('AC', 'Acre'),
@@ -60,6 +62,11 @@ class Supplier(models.Model):
         validators=[RegexValidator(r'^\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}$')],
     )
 
+    # Cópias só com dígitos, indexadas, para buscas exatas por documento/telefone
+    cnpj_digits = models.CharField(max_length=18, blank=True, null=True, editable=False, db_index=True)
+    mobile_digits = models.CharField(max_length=15, blank=True, null=True, editable=False, db_index=True)
+    phone_digits = models.CharField(max_length=15, blank=True, null=True, editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -69,3 +76,12 @@ class Supplier(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.cnpj}"
+
+    def save(self, *args, **kwargs):
+        self.cnpj_digits = only_digits(self.cnpj)
+        self.mobile_digits = only_digits(self.mobile)
+        self.phone_digits = only_digits(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'cnpj_digits', 'mobile_digits', 'phone_digits'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,22 @@
+from config.validators import only_digits
+
+from .models import Supplier
+
+
+def find_supplier_by_cnpj(cnpj):
+    """Fornecedor com o CNPJ informado (formatado ou não), pela coluna indexada."""
+    digits = only_digits(cnpj)
+    if not digits:
+        return None
+    return Supplier.objects.filter(cnpj_digits=digits).first()
+
+
+def cnpj_in_use(cnpj, exclude_id=None):
+    """Indica se o CNPJ já pertence a outro fornecedor, independente da formatação."""
+    digits = only_digits(cnpj)
+    if not digits:
+        return False
+    suppliers = Supplier.objects.filter(cnpj_digits=digits)
+    if exclude_id is not None:
+        suppliers = suppliers.exclude(id=exclude_id)
+    return suppliers.exists()
@@ -1,7 +1,11 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from .models import Supplier
+from .services import cnpj_in_use, find_supplier_by_cnpj
 
 Employee = get_user_model()
 
@@ -95,3 +99,61 @@ class SupplierViewTest(TestCase):
         
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Fornecedor Teste', response.content)
+
+
+class SupplierDocumentDigitsTest(TestCase):
+    """Testes para as colunas só com dígitos de CNPJ e telefones"""
+
+    def setUp(self):
+        """Configuração inicial"""
+        self.client = Client()
+        self.user = Employee.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.supplier = Supplier.objects.create(
+            name='Fornecedor Teste',
+            cnpj='12.345.678/0001-90',
+            email='supplier@test.com',
+            mobile='(11) 98765-4321',
+        )
+
+    def form_data(self, **extra):
+        data = {
+            'name': 'Outro Fornecedor', 'email': 'outro@test.com', 'mobile': '', 'phone': '',
+            'postal_code': '', 'address': '', 'neighborhood': '', 'city': '', 'state': '',
+            'complement': '', 'cnpj': '12345678000190',
+        }
+        data.update(extra)
+        return data
+
+    def test_digits_are_kept_in_sync(self):
+        """Testa o preenchimento das colunas ao salvar"""
+        self.assertEqual(self.supplier.cnpj_digits, '12345678000190')
+        self.assertEqual(self.supplier.mobile_digits, '11987654321')
+        self.assertIsNone(self.supplier.phone_digits)
+        self.assertEqual(find_supplier_by_cnpj('12345678000190'), self.supplier)
+        self.assertTrue(cnpj_in_use('12.345.678/0001-90'))
+        self.assertFalse(cnpj_in_use('12.345.678/0001-90', exclude_id=self.supplier.id))
+
+    def test_duplicate_cnpj_with_other_formatting_is_rejected(self):
+        """Testa que o mesmo CNPJ sem formatação não gera outro cadastro"""
+        response = self.client.post('/suppliers/create/', self.form_data())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Supplier.objects.count(), 1)
+
+    def test_exact_search_by_cnpj(self):
+        """Testa a busca exata pelo CNPJ, com ou sem formatação"""
+        for search in ('12345678000190', '12.345.678/0001-90'):
+            response = self.client.get('/suppliers/', {'search': search})
+            self.assertEqual(list(response.context['suppliers']), [self.supplier])
+
+    def test_backfill_command(self):
+        """Testa o preenchimento em lote dos registros existentes"""
+        Supplier.objects.update(cnpj_digits=None, mobile_digits=None)
+        call_command('backfill_document_digits', batch_size=1, stdout=StringIO())
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.cnpj_digits, '12345678000190')
+        self.assertEqual(self.supplier.mobile_digits, '11987654321')
@@ -6,4 +6,5 @@ urlpatterns = [
     path('create/', views.view_create),
     path('edit/<int:id>/', views.view_edit),
     path('delete/<int:id>/', views.view_delete, name='delete'),
+    path('export/', views.view_export, name='supplier_export'),
 ]
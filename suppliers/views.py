@@ -2,28 +2,51 @@ from django.shortcuts import render, redirect
 from django.http import HttpResponse
 from . import models
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from config.exports import export_response
+from search.models import SearchDocument
+from search.services import rank_by, search_ids
+from .services import cnpj_in_use, find_supplier_by_cnpj
+from config.pagination import id_page, page_query
+from config.validators import only_digits
 
 @login_required
 def view_index(request):
     search = request.GET.get("search", "").strip()
     suppliers = models.Supplier.objects.all()
+    page, has_next = 1, False
 
     if search:
-        suppliers = suppliers.filter(
-            Q(cnpj__icontains=search) |
-            Q(name__icontains=search)
-        )
+        digits = only_digits(search)
+        if digits and len(digits) == 14 and not search.strip(' .-/0123456789'):
+            # CNPJ completo: busca exata pela coluna indexada
+            supplier = find_supplier_by_cnpj(digits)
+            suppliers = suppliers.filter(id=supplier.id) if supplier else suppliers.none()
+        else:
+            # Todos os ids que combinam, mas só os da página são ordenados no banco
+            ids = search_ids(SearchDocument.KIND_SUPPLIER, search, limit=None, substrings=True)
+            ids, page, has_next = id_page(ids, request.GET.get("page"))
+            suppliers = rank_by(suppliers, ids)
 
     return render(request, 'suppliers.html', {
         'suppliers': suppliers,
         'search': search,
+        'next_query': page_query(request, str(page + 1), 'page') if has_next else None,
+        'first_query': page_query(request, None, 'page') if page > 1 else None,
     })
 
 @login_required
 def view_create(request):
     if request.method == "POST":
+        if cnpj_in_use(request.POST["cnpj"]):
+            messages.error(request, "Já existe um fornecedor com este CNPJ.")
+            return render(request, "supplier_form.html", {
+                "title": "Cadastrar Fornecedor",
+                "states": models.Supplier.BRAZILIAN_STATES,
+                "supplier": request.POST,
+            })
+
         models.Supplier.objects.create(
             name=request.POST["name"],
             email=request.POST["email"],
@@ -67,6 +90,14 @@ def view_edit(request, id):
         supplier.complement = request.POST["complement"]
         supplier.cnpj = request.POST["cnpj"]
 
+        if cnpj_in_use(supplier.cnpj, exclude_id=supplier.id):
+            messages.error(request, "Já existe um fornecedor com este CNPJ.")
+            return render(request, "supplier_form.html", {
+                "title": "Editar Fornecedor",
+                "states": models.Supplier.BRAZILIAN_STATES,
+                "supplier": supplier,
+            })
+
         supplier.save()
 
         return redirect("/suppliers/")
@@ -76,3 +107,22 @@ def view_edit(request, id):
         "states": models.Supplier.BRAZILIAN_STATES,
         "supplier": supplier,
     })
+
+@login_required
+def view_export(request):
+    """Exporta os fornecedores em CSV ou NDJSON."""
+    return export_response(request, models.Supplier.objects.all(), [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('cnpj', 'cnpj'),
+        ('email', 'email'),
+        ('mobile', 'mobile'),
+        ('phone', 'phone'),
+        ('postal_code', 'postal_code'),
+        ('address', 'address'),
+        ('neighborhood', 'neighborhood'),
+        ('city', 'city'),
+        ('state', 'state'),
+        ('complement', 'complement'),
+        ('created_at', 'created_at'),
+    ], 'suppliers', date_field='created_at')